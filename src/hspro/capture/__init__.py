@@ -0,0 +1,3 @@
+from hspro.capture.scope import Scope, ScopeFrame
+
+__all__ = ["Scope", "ScopeFrame"]
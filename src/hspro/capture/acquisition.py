@@ -0,0 +1,99 @@
+import time
+from typing import Iterator
+
+from hspro_api import TriggerType, WaveformAvailable
+
+from hspro.capture.frame_format import ChannelRecord, Frame
+from hspro.gui.metrics import METRICS
+from hspro.gui.model import BoardModel
+
+# interval between checks whether a capture is available
+POLL_INTERVAL_S = 0.01
+
+
+def connect(model: BoardModel, board_id: int | None) -> None:
+    """ Connects to the board, which must be the only one connected unless `board_id` is given. """
+    from hspro_api.board import mk_board
+    from hspro_api.conn.connection_op import connect as raw_connect
+
+    connections = raw_connect(debug=False)
+    if board_id is not None:
+        connections = [c for c in connections if c.board == board_id]
+    match len(connections):
+        case 0:
+            raise RuntimeError("No HaasoscopePro found" if board_id is None else f"Board #{board_id} not found")
+        case 1:
+            connection = connections[0]
+        case _:
+            boards = ", ".join(f"#{c.board}" for c in connections)
+            raise RuntimeError(f"Found multiple boards ({boards}). Board number must be given.")
+
+    board = mk_board(connection, debug=False, debug_spi=False, show_board_call_trace=False)
+    model.link_to_live_board(board, connection.board)
+    model.init_board_from_model()
+
+
+class Acquisition:
+    """
+    Arms the trigger and yields captured frames. This follows the same arming logic as the GUI worker: trigger
+    is re-armed after every capture and, in auto mode, acquisition is forced when no trigger occurs within
+    period set by trigger auto frequency.
+    """
+
+    def __init__(self, model: BoardModel, trigger_type: TriggerType, auto: bool):
+        self.model = model
+        self.trigger_type = trigger_type
+        self.auto = auto
+        self.stopped = False
+
+    def stop(self) -> None:
+        """ Makes `frames()` return at its next check for a capture; may be called from another thread. """
+        self.stopped = True
+
+    def frames(self, deadline_s: float | None = None) -> Iterator[Frame]:
+        """ Yields frames until `time.time()` reaches `deadline_s`, even if trigger does not occur until then. """
+        frame_num = 0
+        self.model.trigger.force_arm_trigger(self.trigger_type)
+        armed_at_s = time.time()
+        forced = False
+        try:
+            while not self.stopped and (deadline_s is None or time.time() < deadline_s):
+                match self.model.is_capture_available():
+                    case WaveformAvailable():
+                        captured_at_s = time.time()
+                        with METRICS.usb_read_latency.time():
+                            waveforms = self.model.get_waveforms()
+                        METRICS.acquired(triggered=not forced)
+                        self.model.trigger.force_arm_trigger(self.trigger_type)
+                        armed_at_s = time.time()
+                        forced = False
+                        yield self.to_frame(frame_num, captured_at_s, waveforms)
+                        frame_num += 1
+
+                    case _:
+                        if self.auto and (time.time() - armed_at_s) > self.model.trigger.max_dt_auto_trig_s:
+                            self.model.trigger.force_arm_trigger(TriggerType.AUTO)
+                            armed_at_s = time.time()
+                            forced = True
+                        else:
+                            time.sleep(POLL_INTERVAL_S)
+        finally:
+            self.model.trigger.force_arm_trigger(TriggerType.DISABLED)
+
+    def to_frame(self, frame_num: int, captured_at_s: float, waveforms) -> Frame:
+        return Frame(
+            frame_num=frame_num,
+            captured_at_s=captured_at_s,
+            channels=[
+                ChannelRecord(
+                    channel=channel,
+                    dt_s=wf.dt_s,
+                    dV=wf.dV,
+                    offset_V=self.model.channel[channel].offset_V,
+                    trigger_pos=wf.trigger_pos,
+                    trigger_level_V=wf.trigger_level_V,
+                    vs=wf.vs
+                )
+                for channel, wf in enumerate(waveforms) if wf is not None
+            ]
+        )
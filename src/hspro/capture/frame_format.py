@@ -0,0 +1,90 @@
+"""
+Binary format of captured frames.
+
+Stream starts with file header (magic b"HSPF" and format version) followed by frames. Each frame consists of frame
+header (frame number, capture time, number of channel records) and one record per captured channel. Channel record
+header is followed by samples as little-endian float32. Samples are in vertical divisions as returned by the board;
+voltage is `sample * dV - offset_V`. All integers and floats are little-endian.
+"""
+import struct
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator
+
+import numpy as np
+
+MAGIC = b"HSPF"
+FORMAT_VERSION = 1
+
+# magic, format version
+FILE_HEADER = struct.Struct("<4sH")
+
+# frame number, capture time in seconds since epoch, number of channel records
+FRAME_HEADER = struct.Struct("<QdB")
+
+# channel number, dt_s, dV, offset_V, trigger position (sample index), trigger level V, number of samples
+CHANNEL_HEADER = struct.Struct("<Bdddqdi")
+
+SAMPLE_DTYPE = np.dtype("<f4")
+
+
+@dataclass
+class ChannelRecord:
+    channel: int
+    dt_s: float
+    dV: float
+    offset_V: float
+    trigger_pos: int
+    trigger_level_V: float
+    vs: np.ndarray
+
+
+@dataclass
+class Frame:
+    frame_num: int
+    captured_at_s: float
+    channels: list[ChannelRecord]
+
+
+def write_file_header(out: BinaryIO) -> None:
+    out.write(FILE_HEADER.pack(MAGIC, FORMAT_VERSION))
+
+
+def write_frame(out: BinaryIO, frame: Frame) -> int:
+    """ Writes frame and returns number of bytes written. """
+    num_bytes = out.write(FRAME_HEADER.pack(frame.frame_num, frame.captured_at_s, len(frame.channels)))
+    for record in frame.channels:
+        samples = np.asarray(record.vs, dtype=SAMPLE_DTYPE)
+        num_bytes += out.write(CHANNEL_HEADER.pack(
+            record.channel, record.dt_s, record.dV, record.offset_V, record.trigger_pos, record.trigger_level_V,
+            samples.size
+        ))
+        num_bytes += out.write(memoryview(samples).cast("B"))
+    return num_bytes
+
+
+def read_frames(inp: BinaryIO) -> Iterator[Frame]:
+    magic, version = FILE_HEADER.unpack(_read_exactly(inp, FILE_HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("Not a Haasoscope Pro frame stream")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported frame format version {version}")
+
+    while (header := inp.read(FRAME_HEADER.size)) != b"":
+        if len(header) < FRAME_HEADER.size:
+            header += _read_exactly(inp, FRAME_HEADER.size - len(header))
+        frame_num, captured_at_s, num_channels = FRAME_HEADER.unpack(header)
+        channels = []
+        for _ in range(num_channels):
+            channel, dt_s, dV, offset_V, trigger_pos, trigger_level_V, num_samples = CHANNEL_HEADER.unpack(
+                _read_exactly(inp, CHANNEL_HEADER.size)
+            )
+            vs = np.frombuffer(_read_exactly(inp, num_samples * SAMPLE_DTYPE.itemsize), dtype=SAMPLE_DTYPE)
+            channels.append(ChannelRecord(channel, dt_s, dV, offset_V, trigger_pos, trigger_level_V, vs))
+        yield Frame(frame_num, captured_at_s, channels)
+
+
+def _read_exactly(inp: BinaryIO, num_bytes: int) -> bytes:
+    data = inp.read(num_bytes)
+    if len(data) != num_bytes:
+        raise EOFError("Frame stream ended in the middle of a frame")
+    return data
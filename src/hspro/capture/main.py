@@ -0,0 +1,89 @@
+import argparse
+import sys
+import time
+from contextlib import closing, nullcontext
+from typing import BinaryIO
+
+from hspro_api import TriggerType
+
+from hspro.capture.acquisition import Acquisition, connect
+from hspro.capture.frame_format import write_file_header, write_frame
+from hspro.gui.default_config import mk_app_persistence
+from hspro.gui.metrics import METRICS, MetricsServer, metrics_port_from_env
+from hspro.gui.model import BoardModel, TriggerTypeModel
+
+
+def parse_args(args: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="hspro-capture",
+        description="Capture waveforms from Haasoscope Pro without GUI using settings last used in GUI."
+    )
+    limit = parser.add_mutually_exclusive_group(required=True)
+    limit.add_argument("-n", "--frames", type=int, help="number of frames to capture")
+    limit.add_argument("-t", "--duration", type=float, help="capture for this many seconds")
+    parser.add_argument("-o", "--output", default="-", help="output file or '-' for stdout (default)")
+    parser.add_argument("--board", type=int, default=None, help="number of the board to use if several are connected")
+    parser.add_argument(
+        "--trigger", choices=[t.value for t in TriggerTypeModel], default=None,
+        help="trigger type; defaults to the one last used in GUI"
+    )
+    parser.add_argument(
+        "--mode", choices=["normal", "auto"], default="normal",
+        help="in auto mode acquisition is forced when trigger does not occur in time (default normal)"
+    )
+    parser.add_argument("--demo", action="store_true", help="capture generated demo waveforms without a board")
+    parser.add_argument(
+        "--metrics-port", type=int, default=metrics_port_from_env(),
+        help="serve Prometheus metrics at http://127.0.0.1:<port>/metrics (default from HSPRO_METRICS_PORT)"
+    )
+    return parser.parse_args(args)
+
+
+def capture(acquisition: Acquisition, out: BinaryIO, max_frames: int | None, max_duration_s: float | None) -> int:
+    write_file_header(out)
+    num_frames = 0
+    deadline_s = None if max_duration_s is None else time.time() + max_duration_s
+    with closing(acquisition.frames(deadline_s)) as frames:
+        for frame in frames:
+            METRICS.recording_bytes_written.inc(write_frame(out, frame))
+            num_frames += 1
+            if max_frames is not None and num_frames >= max_frames:
+                break
+    out.flush()
+    return num_frames
+
+
+def main(args: list[str] | None = None):
+    opts = parse_args(sys.argv[1:] if args is None else args)
+    persistence = mk_app_persistence()
+    model = BoardModel(persistence)
+    if opts.metrics_port is not None:
+        MetricsServer(opts.metrics_port)
+    try:
+        if not opts.demo:
+            connect(model, opts.board)
+
+        trigger_type = model.trigger.trigger_type if opts.trigger is None else TriggerTypeModel.value_of(opts.trigger)
+        acquisition = Acquisition(model, trigger_type.to_trigger_type(), auto=opts.mode == "auto")
+
+        started_at_s = time.time()
+        with open(opts.output, "wb") if opts.output != "-" else nullcontext(sys.stdout.buffer) as out:
+            num_frames = capture(acquisition, out, opts.frames, opts.duration)
+        elapsed_s = time.time() - started_at_s
+        print(
+            f"Captured {num_frames} frames in {elapsed_s:.2f} s ({num_frames / max(elapsed_s, 1e-9):.1f} frames/s)",
+            file=sys.stderr
+        )
+    except KeyboardInterrupt:
+        pass
+    except Exception as ex:
+        print(f"Error: {ex}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        model.trigger.force_arm_trigger(TriggerType.DISABLED)
+        model.cleanup()
+        persistence.close()
+
+
+if __name__ == '__main__':
+    main()
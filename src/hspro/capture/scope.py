@@ -0,0 +1,192 @@
+import asyncio
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator
+
+import numpy as np
+from hspro_api import TriggerType
+
+from hspro.capture.acquisition import Acquisition, connect
+from hspro.capture.frame_format import Frame
+from hspro.gui.default_config import mk_app_persistence
+from hspro.gui.model import BoardModel, TriggerTypeModel
+from hspro.gui.persistence import WriteBehindPersistence
+
+
+@dataclass
+class ScopeFrame:
+    """
+    One captured frame. Row `i` of `data` holds samples (in vertical divisions) of channel `channels[i]`.
+    `data` is a view into a buffer that is reused for later frames; copy it to keep it.
+    """
+    frame_num: int
+    captured_at_s: float
+    channels: tuple[int, ...]
+    data: np.ndarray
+    dt_s: float
+    dV: tuple[float, ...]
+    offset_V: tuple[float, ...]
+    trigger_pos: int
+    trigger_level_V: float
+
+    def volts(self) -> np.ndarray:
+        """ Returns new array of samples in volts. """
+        return self.data * np.array(self.dV, dtype=np.float32)[:, None] - np.array(self.offset_V, np.float32)[:, None]
+
+    def t_s(self) -> np.ndarray:
+        """ Returns time of each sample relative to the trigger. """
+        return (np.arange(self.data.shape[1]) - self.trigger_pos) * self.dt_s
+
+
+def expected_num_samples(model: BoardModel) -> int:
+    """ Number of samples per channel in a frame acquired with current settings. """
+    samples_per_row_per_waveform = 20 if model.channel[1].active else 40
+    return samples_per_row_per_waveform * model.mem_depth
+
+
+class FrameBufferPool:
+    """
+    Fixed number of preallocated sample buffers handed out in turn. Buffer is reused once `num_buffers`
+    further frames were taken, so that consumer may still look at a few previous frames. Buffers are sized for
+    `num_samples` and grown only if a longer frame arrives.
+    """
+
+    def __init__(self, num_buffers: int, num_channels: int = 2, num_samples: int = 0):
+        self.buffers = [np.empty((num_channels, num_samples), dtype=np.float32) for _ in range(num_buffers)]
+        self.next_buffer = 0
+
+    def fill(self, frame: Frame) -> ScopeFrame:
+        num_samples = max((len(record.vs) for record in frame.channels), default=0)
+        buffer = self.buffers[self.next_buffer]
+        if buffer.shape[1] < num_samples:
+            # frame length changes only when settings change; buffers are then grown once
+            buffer = np.empty((buffer.shape[0], num_samples), dtype=np.float32)
+            self.buffers[self.next_buffer] = buffer
+        self.next_buffer = (self.next_buffer + 1) % len(self.buffers)
+
+        data = buffer[:len(frame.channels), :num_samples]
+        for row, record in zip(data, frame.channels):
+            row[:len(record.vs)] = record.vs
+            row[len(record.vs):] = np.nan
+
+        first = frame.channels[0] if frame.channels != [] else None
+        return ScopeFrame(
+            frame_num=frame.frame_num,
+            captured_at_s=frame.captured_at_s,
+            channels=tuple(record.channel for record in frame.channels),
+            data=data,
+            dt_s=first.dt_s if first is not None else 0.0,
+            dV=tuple(record.dV for record in frame.channels),
+            offset_V=tuple(record.offset_V for record in frame.channels),
+            trigger_pos=first.trigger_pos if first is not None else 0,
+            trigger_level_V=first.trigger_level_V if first is not None else 0.0
+        )
+
+
+class Scope:
+    """
+    Scripting access to the oscilloscope, configured with the settings last used in GUI.
+
+        with Scope.open() as scope:
+            for frame in scope.stream(trigger="Rising Edge", max_frames=100):
+                print(frame.volts().max(axis=1))
+
+    Frames are acquired only when asked for, so a slow consumer slows down acquisition rather than causing frames
+    to pile up in memory.
+    """
+
+    def __init__(self, model: BoardModel, persistence: WriteBehindPersistence, num_buffers: int = 2):
+        self.model = model
+        self.persistence = persistence
+        self.num_buffers = num_buffers
+
+    @staticmethod
+    def open(board_id: int | None = None, demo: bool = False, num_buffers: int = 2) -> "Scope":
+        persistence = mk_app_persistence()
+        model = BoardModel(persistence)
+        try:
+            if not demo:
+                connect(model, board_id)
+        except Exception:
+            persistence.close()
+            raise
+        return Scope(model, persistence, num_buffers)
+
+    def close(self) -> None:
+        self.model.trigger.force_arm_trigger(TriggerType.DISABLED)
+        self.model.cleanup()
+        self.persistence.close()
+
+    def __enter__(self) -> "Scope":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def stream(
+            self,
+            trigger: TriggerTypeModel | str | None = None,
+            max_frames: int | None = None,
+            max_duration_s: float | None = None,
+            auto: bool = False
+    ) -> Iterator[ScopeFrame]:
+        """
+        Yields captured frames until `max_frames` frames were yielded or `max_duration_s` passed, whichever
+        comes first, or indefinitely if neither is given. Trigger defaults to the one last used in GUI.
+        """
+        return self.__stream(self.__acquisition(trigger, auto), max_frames, max_duration_s)
+
+    def __acquisition(self, trigger: TriggerTypeModel | str | None, auto: bool) -> Acquisition:
+        match trigger:
+            case None:
+                trigger_type = self.model.trigger.trigger_type
+            case str():
+                trigger_type = TriggerTypeModel.value_of(trigger)
+            case _:
+                trigger_type = trigger
+        return Acquisition(self.model, trigger_type.to_trigger_type(), auto)
+
+    def __stream(
+            self,
+            acquisition: Acquisition,
+            max_frames: int | None,
+            max_duration_s: float | None
+    ) -> Iterator[ScopeFrame]:
+        pool = FrameBufferPool(self.num_buffers, len(self.model.channel), expected_num_samples(self.model))
+        deadline_s = None if max_duration_s is None else time.time() + max_duration_s
+        num_frames = 0
+        with closing(acquisition.frames(deadline_s)) as frames:
+            for frame in frames:
+                yield pool.fill(frame)
+                num_frames += 1
+                if max_frames is not None and num_frames >= max_frames:
+                    break
+
+    async def astream(
+            self,
+            trigger: TriggerTypeModel | str | None = None,
+            max_frames: int | None = None,
+            max_duration_s: float | None = None,
+            auto: bool = False
+    ) -> AsyncIterator[ScopeFrame]:
+        """
+        Same as `stream()` for asyncio code. Waiting for each frame runs in a worker thread, so that the event loop
+        is not blocked, and next frame is acquired only when asked for.
+        """
+        acquisition = self.__acquisition(trigger, auto)
+        frames = self.__stream(acquisition, max_frames, max_duration_s)
+        next_frame: asyncio.Future | None = None
+        try:
+            while True:
+                # shielded, so that cancellation of the caller does not lose track of the thread still in `next`
+                next_frame = asyncio.ensure_future(asyncio.to_thread(next, frames, None))
+                if (frame := await asyncio.shield(next_frame)) is None:
+                    break
+                yield frame
+        finally:
+            # generator can only be closed once it is no longer executing in the thread
+            acquisition.stop()
+            if next_frame is not None and not next_frame.done():
+                await asyncio.wait([next_frame])
+            await asyncio.to_thread(frames.close)
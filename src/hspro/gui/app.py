@@ -1,33 +1,56 @@
-import dataclasses
 import json
+import threading
 import time
+from dataclasses import replace
+from datetime import datetime
 from enum import Enum, auto
 from functools import cache
 from pathlib import Path
 from queue import Queue, ShutDown
-from typing import Callable, Optional
+from typing import Callable, Optional, TYPE_CHECKING
 
+import numpy as np
 from PySide6.QtCore import QThreadPool, QRunnable, Signal, QObject, QRectF
 from PySide6.QtGui import QPalette, QPen, Qt
-from PySide6.QtWidgets import QMessageBox, QFileDialog
+from PySide6.QtWidgets import QMessageBox, QFileDialog, QInputDialog, QProgressDialog
 from hspro_api import TriggerType, WaveformAvailable, Waveform
+from hspro_api.board import Board
 from pytide6 import MainWindow
 from pytide6.palette import Palette
-from sprats.config import AppPersistence
 from unlib import Duration
 
-from hspro.gui.model import BoardModel, ChannelCouplingModel, ChannelImpedanceModel
-from hspro.gui.scene import Scene, SceneCheckpoint, ChannelData
-from hspro.gui.waveform_ext import WaveformExt
-from hspro.gui.zoom_dialog import ZoomDialog
+from hspro.gui.auto_reconnect import BoardFingerprint, driver_version, save_fingerprint
+from hspro.gui.control_lattice import seconds
+from hspro.gui.decoders import DecoderSettings
+from hspro.gui.export import ExportFormat, ExportTrace, traces_from_checkpoint, traces_from_waveforms
+from hspro.gui.filters import ChannelFilter, FilterStage
+from hspro.gui.gui_ext.svg_icon import SvgIcon
+from hspro.gui.math_channels import MathChannelDefinition, default_math_channels, MathChannels, ExpressionError
+from hspro.gui.mask import MaskTester, Polygon, load_mask, save_mask
+from hspro.gui.metrics import METRICS
+from hspro.gui.model import BoardModel, ChannelCouplingModel, ChannelImpedanceModel, BoardSettings, TriggerTypeModel
+from hspro.gui.persistence import WriteBehindPersistence
+from hspro.gui.qualifiers import QualifierAction, QualifierKind, QualifierSettings, qualify
+from hspro.gui.roll import ROLL_MODE_MIN_TIME_SCALE_S, RollSegment, RollSegmenter
+from hspro.gui.scene import Scene, SceneCheckpoint, ChannelData, SCENE_VERSION
+from hspro.gui.waveform_ext import WaveformExt, copy_waveform
+
+if TYPE_CHECKING:
+    from hspro.gui.eye_dialog import EyeDiagramDialog
+    from hspro.gui.export_task import ExportTask
+    from hspro.gui.plot_export import PlotSnapshot
+    from hspro.gui.remote_control import RemoteControlServer
+    from hspro.gui.waterfall_dialog import WaterfallDialog
+    from hspro.gui.zoom_dialog import ZoomDialog
 
 
 class App:
-    app_persistence: AppPersistence
+    app_persistence: WriteBehindPersistence
     model: BoardModel
     main_window: Callable[[], MainWindow] = lambda _: None
     exit_application: Callable[[], bool] = lambda: True
     set_connection_status_label: Callable[[str], None] = lambda _: None
+    set_board_init_progress: Callable[[int | None], None] = lambda _: None
     set_live_info_label: Callable[[str], None] = lambda _: None
     update_scene_data: Callable[[Scene], None] = lambda _: None
     update_scene_history_dialog: Callable[[Scene], None] = lambda _: None
@@ -45,6 +68,7 @@ class App:
     set_show_grid_state: Callable[[bool], None] = lambda _: None
     set_show_y_axis_labels: Callable[[bool], None] = lambda _: None
     set_show_zero_line: Callable[[bool], None] = lambda _: None
+    set_snap_cursor: Callable[[bool], None] = lambda _: None
     set_show_trigger_level_line: Callable[[bool], None] = lambda _: None
     set_show_trig_pos_line: Callable[[bool], None] = lambda _: None
     make_trig_level_line_visible_temp: Callable[[bool], None] = lambda _: None
@@ -65,6 +89,7 @@ class App:
     update_channel_10x: Callable[[int, bool], None] = lambda a, b: None
     plot_waveforms: Callable[[tuple[Optional[Waveform], Optional[Waveform]]], None] = lambda _: None
     plot_held_waveforms: Callable[[list[Optional[Waveform]]], None] = lambda _: None
+    plot_roll_segment: Callable[[RollSegment], None] = lambda _: None
     show_held_waveforms: Callable[[bool], None] = lambda _: None
     update_y_axis_ticks: Callable[[int | None], None] = lambda _: None
     set_grid_opacity: Callable[[float], None] = lambda _: None
@@ -75,9 +100,18 @@ class App:
     update_trigger_lines_color: Callable[[int], None] = lambda _: None
     set_trigger_lines_color_map: Callable[[str], None] = lambda _: None
 
+    snapshot_plot: Callable[[], "PlotSnapshot"] = lambda: None
+    set_math_channels: Callable[[MathChannels], None] = lambda _: None
+    set_decoder_settings: Callable[[DecoderSettings], None] = lambda _: None
+    show_mask: Callable[[list[Polygon]], None] = lambda _: None
+    set_drawing_mask: Callable[[bool], None] = lambda _: None
+    show_mask_failure: Callable[[list[WaveformExt | None]], None] = lambda _: None
+    show_mask_counts: Callable[[bool], None] = lambda _: None
+    show_holding: Callable[[], None] = lambda: None
     apply_checkpoint_to_trace_menu: Callable[[SceneCheckpoint], None] = lambda _: None
     apply_checkpoint_to_trigger_panel: Callable[[SceneCheckpoint], None] = lambda _: None
     apply_checkpoint_to_channels_panel: Callable[[SceneCheckpoint], None] = lambda _: None
+    apply_checkpoint_to_general_options_panel: Callable[[SceneCheckpoint], None] = lambda _: None
 
     update_zoom_rect_on_main_plot: Callable[[QRectF], None] = lambda _: None
 
@@ -92,45 +126,63 @@ class App:
     holding = False
     showing_holding_traces = True
 
+    # icons are read on first use
+    icon_zoom_inactive_svg = SvgIcon("zoom.svg")
+    icon_zoom_inactive_hoover_svg = SvgIcon("zoom-hoover.svg")
+    icon_zoom_inactive_pressed_svg = SvgIcon("zoom-pressed.svg")
+    icon_zoom_active_svg = SvgIcon("zoom-active.svg")
+    icon_zoom_active_hoover_svg = SvgIcon("zoom-active-hoover.svg")
+    icon_zoom_active_pressed_svg = SvgIcon("zoom-active-pressed.svg")
+
+    icon_snapshot_svg = SvgIcon("snapshot.svg")
+    icon_snapshot_hoover_svg = SvgIcon("snapshot-hoover.svg")
+    icon_snapshot_pressed_svg = SvgIcon("snapshot-pressed.svg")
+
+    icon_holding_svg = SvgIcon("holding.svg")
+    icon_holding_hoover_svg = SvgIcon("holding-hoover.svg")
+    icon_holding_pressed_svg = SvgIcon("holding-pressed.svg")
+    icon_released_svg = SvgIcon("released.svg")
+    icon_released_hoover_svg = SvgIcon("released-hoover.svg")
+    icon_released_pressed_svg = SvgIcon("released-pressed.svg")
+
+    icon_shown_svg = SvgIcon("shown.svg")
+    icon_shown_hoover_svg = SvgIcon("shown-hoover.svg")
+    icon_shown_pressed_svg = SvgIcon("shown-pressed.svg")
+    icon_hidden_svg = SvgIcon("hidden.svg")
+    icon_hidden_hoover_svg = SvgIcon("hidden-hoover.svg")
+    icon_hidden_pressed_svg = SvgIcon("hidden-pressed.svg")
+
     def __init__(self, screen_dim: tuple[int, int]):
         self.last_plotted_waveforms: list[Waveform] = []
+        self.held_waveforms: list[WaveformExt | None] = []
+        # exports running in background, each with its progress dialog
+        self.running_exports: list[tuple["ExportTask", QProgressDialog]] = []
+        self.running_plot_exports: list[QObject] = []
+        self.running_frame_saves: list[QObject] = []
         self.screen_dim: tuple[int, int] = screen_dim
 
         self.update_trigger_on_channel_label: Callable[[int], None] = lambda _: None
         self.waveforms_updated: Callable[[], None] = lambda: None
         self.set_channel_color_in_zoom_window: Callable[[int, str, bool], None] = lambda a, b, c: None
+        self.show_measurement_cursors_in_plot: Callable[[bool], None] = lambda _: None
+        self.show_measurement_cursors_in_zoom_window: Callable[[bool], None] = lambda _: None
+
+        # called by the worker thread with every newly acquired pair of waveforms; must return quickly
+        self.frame_listeners: list[Callable[[tuple[Optional[Waveform], Optional[Waveform]]], None]] = []
+        self.remote_control_server: "RemoteControlServer | None" = None
 
-        # load icons
-        icons_dir = Path(__file__).parent / "icons"
-        self.icon_zoom_inactive_svg = (icons_dir / "zoom.svg").read_bytes()
-        self.icon_zoom_inactive_hoover_svg = (icons_dir / "zoom-hoover.svg").read_bytes()
-        self.icon_zoom_inactive_pressed_svg = (icons_dir / "zoom-pressed.svg").read_bytes()
-        self.icon_zoom_active_svg = (icons_dir / "zoom-active.svg").read_bytes()
-        self.icon_zoom_active_hoover_svg = (icons_dir / "zoom-active-hoover.svg").read_bytes()
-        self.icon_zoom_active_pressed_svg = (icons_dir / "zoom-active-pressed.svg").read_bytes()
-
-        self.icon_snapshot_svg = (icons_dir / "snapshot.svg").read_bytes()
-        self.icon_snapshot_hoover_svg = (icons_dir / "snapshot-hoover.svg").read_bytes()
-        self.icon_snapshot_pressed_svg = (icons_dir / "snapshot-pressed.svg").read_bytes()
-
-        self.icon_holding_svg = (icons_dir / "holding.svg").read_bytes()
-        self.icon_holding_hoover_svg = (icons_dir / "holding-hoover.svg").read_bytes()
-        self.icon_holding_pressed_svg = (icons_dir / "holding-pressed.svg").read_bytes()
-        self.icon_released_svg = (icons_dir / "released.svg").read_bytes()
-        self.icon_released_hoover_svg = (icons_dir / "released-hoover.svg").read_bytes()
-        self.icon_released_pressed_svg = (icons_dir / "released-pressed.svg").read_bytes()
-
-        self.icon_shown_svg = (icons_dir / "shown.svg").read_bytes()
-        self.icon_shown_hoover_svg = (icons_dir / "shown-hoover.svg").read_bytes()
-        self.icon_shown_pressed_svg = (icons_dir / "shown-pressed.svg").read_bytes()
-        self.icon_hidden_svg = (icons_dir / "hidden.svg").read_bytes()
-        self.icon_hidden_hoover_svg = (icons_dir / "hidden-hoover.svg").read_bytes()
-        self.icon_hidden_pressed_svg = (icons_dir / "hidden-pressed.svg").read_bytes()
-
-        self.scene = Scene("N/A", version=1, data=[])  # default scene
+        self.scene = Scene("N/A", version=SCENE_VERSION, data=[])  # default scene
         self.scene_file: Path | None = None
 
-        self.zoom_dialog: ZoomDialog | None = None
+        self.zoom_dialog: "ZoomDialog | None" = None
+        self.eye_diagram_dialog: "EyeDiagramDialog | None" = None
+        self.waterfall_dialog: "WaterfallDialog | None" = None
+
+        self.mask_tester = MaskTester([])
+        # last frame that failed the mask test
+        self.mask_failed_waveforms: list[WaveformExt | None] = []
+        self.mask_failure_pending = False
+        self.mask_stop_on_fail = False
 
         self.board_thread_pool = QThreadPool()
         self.worker = GUIWorker(self)
@@ -142,6 +194,7 @@ class App:
         self.worker.msg_out.trigger_armed_forced_acq.connect(self.do_trigger_armed_forced_acq)
         self.worker.msg_out.plot_waveforms.connect(self.do_plot_waveforms, conn_type)
         self.worker.msg_out.plot_held_waveforms.connect(self.do_plot_held_waveforms, conn_type)
+        self.worker.msg_out.plot_roll_segment.connect(self.do_plot_roll_segment, conn_type)
         self.worker.msg_out.show_held_waveforms.connect(self.do_show_held_waveforms, conn_type)
         self.worker.msg_out.update_y_ticks.connect(self.do_update_y_axis_ticks, conn_type)
         self.worker.msg_out.correct_trigger_position.connect(self.do_correct_trigger_position, conn_type)
@@ -155,6 +208,11 @@ class App:
         self.worker.msg_out.apply_checkpoint.connect(self.apply_checkpoint, conn_type)
         self.worker.msg_out.notify_waveforms_updated.connect(self.do_waveforms_updated,
                                                              Qt.ConnectionType.QueuedConnection)
+        self.worker.msg_out.board_linked.connect(self.do_board_linked, conn_type)
+        self.worker.msg_out.remote_command_processed.connect(self.sync_controls_with_model, conn_type)
+        self.worker.msg_out.mask_failed.connect(self.do_mask_failed, Qt.ConnectionType.QueuedConnection)
+        self.worker.msg_out.frame_qualified.connect(self.do_frame_qualified, Qt.ConnectionType.QueuedConnection)
+        METRICS.worker_queue_depth.value_fn = self.worker.messages.qsize
         self.board_thread_pool.start(self.worker)
 
     def record_last_plotted_waveforms(self, waveforms: list[Waveform]):
@@ -170,9 +228,9 @@ class App:
                 break
             else:
                 self.scene_file = Path(file).with_suffix(".hss")
-                self.scene = Scene(f"{self.scene_file.name}", version=1, data=[])
+                self.scene = Scene(f"{self.scene_file.name}", version=SCENE_VERSION, data=[])
                 self.app_persistence.state.set_value("last_dir_scene", f"{self.scene_file.parent.absolute()}")
-                self.scene_file.write_text(json.dumps(dataclasses.asdict(self.scene), indent=2))
+                self.scene_file.write_text(json.dumps(self.scene.to_json(), indent=2))
                 self.do_update_scene_data(self.scene)
                 break
 
@@ -182,6 +240,8 @@ class App:
                 self.zoom_dialog = None
                 self.hide_zoom_box()
 
+            from hspro.gui.zoom_dialog import ZoomDialog
+
             self.zoom_dialog = ZoomDialog(self.main_window(), app=self, on_close=unregister)
             self.zoom_dialog.update_zoom_bounds(view_bounds)
             self.zoom_dialog.set_plot_color_scheme(self.plot_color_scheme)
@@ -189,10 +249,34 @@ class App:
         else:
             self.zoom_dialog.update_zoom_bounds(view_bounds)
 
+    def open_eye_diagram_dialog(self):
+        if self.eye_diagram_dialog is None:
+            def unregister():
+                self.eye_diagram_dialog = None
+
+            from hspro.gui.eye_dialog import EyeDiagramDialog
+
+            self.eye_diagram_dialog = EyeDiagramDialog(self.main_window(), app=self, on_close=unregister)
+            self.eye_diagram_dialog.show()
+        else:
+            self.eye_diagram_dialog.raise_()
+
+    def open_waterfall_dialog(self):
+        if self.waterfall_dialog is None:
+            def unregister():
+                self.waterfall_dialog = None
+
+            from hspro.gui.waterfall_dialog import WaterfallDialog
+
+            self.waterfall_dialog = WaterfallDialog(self.main_window(), app=self, on_close=unregister)
+            self.waterfall_dialog.show()
+        else:
+            self.waterfall_dialog.raise_()
+
     def get_scene(self) -> Scene:
         return self.scene
 
-    def record_state_in_scene(self):
+    def mk_checkpoint(self) -> SceneCheckpoint:
         waveforms = self.model.get_waveforms(use_last_shown_waveform=True)
         cds: list[ChannelData] = []
         for ch in self.channels:
@@ -208,7 +292,7 @@ class App:
                     ten_x_probe=self.model.channel[ch].ten_x_probe,
                     t_s_0=0,
                     dt_s=0,
-                    v=[]
+                    v=np.empty(0, dtype=np.float32)
                 ))
             else:
                 cds.append(ChannelData(
@@ -221,10 +305,10 @@ class App:
                     ten_x_probe=self.model.channel[ch].ten_x_probe,
                     t_s_0=(- wf.dt_s * wf.trigger_pos),
                     dt_s=wf.dt_s,
-                    v=wf.vs
+                    v=np.array(wf.vs, dtype=np.float32)
                 ))
 
-        state = SceneCheckpoint(
+        return SceneCheckpoint(
             plot_color_scheme=self.app_persistence.config.get_by_xpath("/plot_color_scheme", str),
             show_trigger_level_line=self.app_persistence.config.get_by_xpath("/show_trigger_level_line", bool),
             show_trigger_position_line=self.app_persistence.config.get_by_xpath("/show_trigger_position_line", bool),
@@ -244,9 +328,14 @@ class App:
             trigger_position=self.app_persistence.config.get_by_xpath("/trigger/position", float),
             trigger_auto_frequency=self.app_persistence.config.get_by_xpath("/trigger/auto_frequency", str),
             selected_channel=(-1 if self.selected_channel is None else self.selected_channel),
-            channels=cds
+            channels=cds,
+            created_at=datetime.now().isoformat(sep=" ", timespec="seconds"),
+            math_channels=self.get_math_channel_definitions()
         )
 
+    def record_state_in_scene(self):
+        state = self.mk_checkpoint()
+
         if self.scene_file is None:
             self.create_new_scene()
 
@@ -262,6 +351,9 @@ class App:
     def init(self):
         plot_color_scheme: str | None = self.app_persistence.config.get_value("plot_color_scheme", str)
         self.plot_color_scheme = plot_color_scheme
+        self.worker.qualifier = self.get_qualifier_settings()
+        self.worker.roll_mode_enabled = self.is_roll_mode_enabled()
+        self.worker.filters = FilterStage([self.get_channel_filter(ch) for ch in self.channels])
 
     @cache
     def side_pannels_palette(self):
@@ -298,6 +390,108 @@ class App:
                         f"or insufficient permissions."
                     )
 
+    def export_plot(self):
+        from hspro.gui.plot_export import PlotExportTask
+
+        last_used_dir = self.app_persistence.state.get_value("last_dir_screenshot", f"{Path.home().absolute()}")
+        file, selected_filter = QFileDialog.getSaveFileName(
+            None, "Export plot", dir=last_used_dir, filter="PNG (*.png);;JPEG (*.jpg);;SVG (*.svg);;PDF (*.pdf)"
+        )
+        if file == "":
+            return
+
+        file_path = Path(file)
+        if file_path.suffix == "":
+            file_path = file_path.with_suffix(selected_filter[selected_filter.index("*") + 1:-1])
+        self.app_persistence.state.set_value("last_dir_screenshot", f"{file_path.parent.absolute()}")
+
+        dpi = int(self.app_persistence.state.get_value("plot_export_dpi", "300"))
+        # SVG is laid out at screen resolution; PDF resolution only matters for text and line placement
+        if file_path.suffix.lower() != ".svg":
+            dpi, ok = QInputDialog.getInt(self.main_window(), "Export plot", "Resolution (DPI):", dpi, 72, 2400)
+            if not ok:
+                return
+            self.app_persistence.state.set_value("plot_export_dpi", f"{dpi}")
+
+        # snapshot is taken right away, so that plot is exported as it is now even while acquisition continues
+        task = PlotExportTask(self.snapshot_plot(), file_path, dpi)
+        task.signals.finished.connect(
+            lambda path: QMessageBox.information(None, "Info", f"Plot saved into file {path}")
+        )
+        task.signals.failed.connect(
+            lambda error: QMessageBox.critical(
+                None, "Error", f"Failed to save plot into file:\n\n{file_path}\n\n{error}"
+            )
+        )
+        self.running_plot_exports.append(task.signals)
+        task.signals.finished.connect(lambda _: self.running_plot_exports.remove(task.signals))
+        task.signals.failed.connect(lambda _: self.running_plot_exports.remove(task.signals))
+        QThreadPool.globalInstance().start(task)
+
+    def export_current_frame(self):
+        offsets_V = [self.model.channel[ch].offset_V for ch in self.channels]
+        self.export_traces(traces_from_waveforms(self.last_plotted_waveforms, offsets_V), "Export current frame")
+
+    def export_held_traces(self):
+        offsets_V = [self.model.channel[ch].offset_V for ch in self.channels]
+        waveforms = [None if w is None else w.waveform for w in self.held_waveforms]
+        self.export_traces(traces_from_waveforms(waveforms, offsets_V), "Export held traces")
+
+    def export_scene(self):
+        traces = [trace for i, cpt in enumerate(self.scene.data) for trace in traces_from_checkpoint(i + 1, cpt)]
+        self.export_traces(traces, "Export scene history")
+
+    def export_traces(self, traces: list[ExportTrace], title: str):
+        from hspro.gui.export_task import ExportTask
+
+        if traces == []:
+            QMessageBox.information(None, "Info", "There is nothing to export.")
+            return
+
+        last_used_dir = self.app_persistence.state.get_value("last_dir_export", f"{Path.home().absolute()}")
+        file, selected_filter = QFileDialog.getSaveFileName(
+            None, title, dir=last_used_dir, filter="NumPy (*.npy);;CSV (*.csv);;Parquet (*.parquet)"
+        )
+        if file == "":
+            return
+
+        file_path = Path(file)
+        if file_path.suffix == "":
+            file_path = file_path.with_suffix(selected_filter[selected_filter.index("*") + 1:-1])
+        self.app_persistence.state.set_value("last_dir_export", f"{file_path.parent.absolute()}")
+        try:
+            export_format = ExportFormat.value_of_suffix(file_path.suffix)
+        except ValueError as ex:
+            QMessageBox.critical(None, "Error", f"{ex}. Use .npy, .csv or .parquet file.")
+            return
+
+        task = ExportTask(traces, file_path, export_format)
+        progress_dialog = QProgressDialog(f"Exporting into {file_path.name}", "Cancel", 0, 100, self.main_window())
+        progress_dialog.setWindowTitle(title)
+        progress_dialog.setMinimumDuration(500)
+        progress_dialog.setAutoClose(False)
+        progress_dialog.canceled.connect(task.cancel)
+        running_export = (task, progress_dialog)
+        self.running_exports.append(running_export)
+
+        def done():
+            progress_dialog.close()
+            self.running_exports.remove(running_export)
+
+        def finished(path: str, num_rows: int):
+            done()
+            QMessageBox.information(None, "Info", f"Exported {num_rows} samples into file {path}")
+
+        def failed(error: str):
+            done()
+            QMessageBox.critical(None, "Error", f"Failed to export into file:\n\n{file_path}\n\n{error}")
+
+        task.signals.progress.connect(progress_dialog.setValue)
+        task.signals.finished.connect(finished)
+        task.signals.cancelled.connect(done)
+        task.signals.failed.connect(failed)
+        QThreadPool.globalInstance().start(task)
+
     def open_scene(self):
         while True:
             try:
@@ -316,7 +510,7 @@ class App:
                 QMessageBox.critical(None, "Error", f"Error: Failed to open scene file.\n{ex}")
 
     def save_scene(self):
-        self.scene_file.write_text(json.dumps(dataclasses.asdict(self.scene), indent=2))
+        self.scene_file.write_text(json.dumps(self.scene.to_json(), indent=2))
 
     def do_update_zoom_rect_on_main_plot(self, rect: QRectF):
         self.update_zoom_rect_on_main_plot(rect)
@@ -328,6 +522,174 @@ class App:
     def do_waveforms_updated(self):
         self.waveforms_updated()
 
+    def do_show_measurement_cursors(self, show: bool):
+        self.app_persistence.state.set_value("show_measurement_cursors", "true" if show else "false")
+        self.show_measurement_cursors_in_plot(show)
+        self.show_measurement_cursors_in_zoom_window(show)
+
+    def is_showing_measurement_cursors(self) -> bool:
+        return self.app_persistence.state.get_value("show_measurement_cursors", "false") == "true"
+
+    def get_math_channel_definitions(self) -> list[MathChannelDefinition]:
+        json_data = self.app_persistence.state.get_value("math_channels", "")
+        if json_data == "":
+            return default_math_channels()
+        return [MathChannelDefinition.value_of(mc) for mc in json.loads(json_data)]
+
+    def do_set_math_channels(self, definitions: list[MathChannelDefinition]) -> bool:
+        try:
+            math_channels = MathChannels(definitions)
+        except ExpressionError as ex:
+            QMessageBox.critical(None, "Error", f"Invalid math channel expression: {ex}")
+            return False
+        self.app_persistence.state.set_value("math_channels", json.dumps([mc.to_json() for mc in definitions]))
+        self.set_math_channels(math_channels)
+        self.do_replot_waveforms()
+        return True
+
+    def get_decoder_settings(self) -> DecoderSettings:
+        json_data = self.app_persistence.state.get_value("protocol_decoder", "")
+        return DecoderSettings() if json_data == "" else DecoderSettings.value_of(json.loads(json_data))
+
+    def do_set_decoder_settings(self, settings: DecoderSettings):
+        self.app_persistence.state.set_value("protocol_decoder", json.dumps(settings.to_json()))
+        self.set_decoder_settings(settings)
+        self.do_replot_waveforms()
+
+    def get_mask_polygons(self) -> list[Polygon]:
+        json_data = self.app_persistence.state.get_value("mask_polygons", "")
+        return [] if json_data == "" else [[(x, y) for x, y in polygon] for polygon in json.loads(json_data)]
+
+    def do_set_mask_polygons(self, polygons: list[Polygon]):
+        self.app_persistence.state.set_value("mask_polygons", json.dumps(polygons))
+        self.mask_tester.set_polygons(polygons)
+        self.show_mask(polygons)
+        self.do_reset_mask_counts()
+
+    def load_mask(self):
+        last_used_dir = self.app_persistence.state.get_value("last_dir_mask", f"{Path.home().absolute()}")
+        file, _ = QFileDialog.getOpenFileName(None, "Load mask", dir=last_used_dir, filter="*.json")
+        if file != "":
+            try:
+                polygons = load_mask(Path(file))
+            except Exception as ex:
+                QMessageBox.critical(None, "Error", f"Error: Failed to load mask.\n{ex}")
+                return
+            self.app_persistence.state.set_value("last_dir_mask", f"{Path(file).parent.absolute()}")
+            self.do_set_mask_polygons(polygons)
+
+    def save_mask(self):
+        last_used_dir = self.app_persistence.state.get_value("last_dir_mask", f"{Path.home().absolute()}")
+        file, _ = QFileDialog.getSaveFileName(None, "Save mask", dir=last_used_dir, filter="*.json")
+        if file != "":
+            path = Path(file).with_suffix(".json")
+            self.app_persistence.state.set_value("last_dir_mask", f"{path.parent.absolute()}")
+            save_mask(path, self.mask_tester.polygons)
+
+    def is_mask_test_enabled(self) -> bool:
+        return self.app_persistence.state.get_value("mask_test_enabled", "false") == "true"
+
+    def is_mask_stop_on_fail(self) -> bool:
+        return self.app_persistence.state.get_value("mask_stop_on_fail", "false") == "true"
+
+    def do_enable_mask_test(self, enabled: bool):
+        self.app_persistence.state.set_value("mask_test_enabled", "true" if enabled else "false")
+        self.mask_stop_on_fail = self.is_mask_stop_on_fail()
+        self.do_reset_mask_counts()
+        if enabled and self.check_mask not in self.frame_listeners:
+            self.frame_listeners.append(self.check_mask)
+        elif not enabled and self.check_mask in self.frame_listeners:
+            self.frame_listeners.remove(self.check_mask)
+        self.show_mask_counts(enabled)
+
+    def do_reset_mask_counts(self):
+        self.mask_tester.reset_counts()
+        self.do_mask_failed([])
+
+    def do_set_mask_stop_on_fail(self, stop_on_fail: bool):
+        self.app_persistence.state.set_value("mask_stop_on_fail", "true" if stop_on_fail else "false")
+        self.mask_stop_on_fail = stop_on_fail
+
+    def do_set_mask_time_window(self, t_min: float, t_max: float):
+        """ Visible time window in visual time units, which the mask spans horizontally. """
+        time_scale = self.model.visual_time_scale
+        unit_s = seconds(time_scale) / time_scale.value
+        self.mask_tester.set_time_window(t_min * unit_s, t_max * unit_s)
+
+    def check_mask(self, waveforms: tuple[Optional[Waveform], ...]) -> None:
+        """ Called by the worker with each acquired frame. """
+        if self.mask_tester.check(waveforms):
+            return
+        if self.mask_stop_on_fail:
+            self.worker.messages.put(WorkerMessage.Disarm())
+        # frames failing before the previous failure is shown are only counted
+        if not self.mask_failure_pending:
+            self.mask_failure_pending = True
+            self.worker.msg_out.mask_failed.emit(
+                [None if wf is None else WaveformExt(copy_waveform(wf), "red") for wf in waveforms]
+            )
+
+    def do_mask_failed(self, ws: list[WaveformExt | None]):
+        self.mask_failure_pending = False
+        self.mask_failed_waveforms = ws
+        self.show_mask_failure(ws)
+
+    def get_qualifier_settings(self) -> QualifierSettings:
+        json_data = self.app_persistence.state.get_value("software_trigger", "")
+        return QualifierSettings() if json_data == "" else QualifierSettings.value_of(json.loads(json_data))
+
+    def do_set_qualifier_settings(self, settings: QualifierSettings):
+        self.app_persistence.state.set_value("software_trigger", json.dumps(settings.to_json()))
+        self.worker.qualifier = settings
+
+    def do_frame_qualified(self, settings: QualifierSettings, ws: list[WaveformExt | None]):
+        if settings.action == QualifierAction.HOLD:
+            self.show_holding()
+        if settings.save_dir != "":
+            self.save_qualified_frame(settings, [None if w is None else w.waveform for w in ws])
+
+    def save_qualified_frame(self, settings: QualifierSettings, waveforms: list[Optional[Waveform]]):
+        from hspro.gui.export_task import ExportTask
+
+        if self.running_frame_saves != []:
+            # frames matching while the previous one is being saved are dropped, so that frequent matches cannot
+            # pile up export tasks faster than disk takes them
+            return
+
+        offsets_V = [self.model.channel[ch].offset_V for ch in self.channels]
+        file_path = Path(settings.save_dir) / f"frame-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.npy"
+        task = ExportTask(traces_from_waveforms(waveforms, offsets_V), file_path, ExportFormat.NPY)
+
+        def failed(error: str):
+            # saving is turned off, so that the error is not reported for every following frame
+            if self.worker.qualifier.save_dir == settings.save_dir:
+                self.do_set_qualifier_settings(replace(self.worker.qualifier, save_dir=""))
+                QMessageBox.critical(
+                    None, "Error", f"Failed to save frame into file:\n\n{file_path}\n\n{error}\n\nSaving is off."
+                )
+
+        self.running_frame_saves.append(task.signals)
+        task.signals.finished.connect(lambda _, __: self.running_frame_saves.remove(task.signals))
+        task.signals.failed.connect(lambda _: self.running_frame_saves.remove(task.signals))
+        task.signals.failed.connect(failed)
+        QThreadPool.globalInstance().start(task)
+
+    def is_roll_mode_enabled(self) -> bool:
+        return self.app_persistence.state.get_value("roll_mode", "false") == "true"
+
+    def do_enable_roll_mode(self, enabled: bool):
+        self.app_persistence.state.set_value("roll_mode", "true" if enabled else "false")
+        self.worker.roll_mode_enabled = enabled
+
+    def get_channel_filter(self, channel: int) -> ChannelFilter:
+        json_data = self.app_persistence.state.get_value(f"channel_filter_{channel}", "")
+        return ChannelFilter() if json_data == "" else ChannelFilter.value_of(json.loads(json_data))
+
+    def do_set_channel_filter(self, channel: int, channel_filter: ChannelFilter):
+        self.app_persistence.state.set_value(f"channel_filter_{channel}", json.dumps(channel_filter.to_json()))
+        self.worker.filters.set_filter(channel, channel_filter)
+        self.worker.messages.put(WorkerMessage.RefilterWaveforms())
+
     def do_disarm_trigger(self):
         self.trigger_disarmed()
 
@@ -344,9 +706,15 @@ class App:
         self.trigger_force_acq()
 
     def do_plot_waveforms(self, ws: tuple[Optional[Waveform], Optional[Waveform]]):
-        self.plot_waveforms(ws)
+        with METRICS.gui_frame_time.time():
+            self.plot_waveforms(ws)
+
+    def do_plot_roll_segment(self, segment: RollSegment):
+        with METRICS.gui_frame_time.time():
+            self.plot_roll_segment(segment)
 
     def do_plot_held_waveforms(self, ws: list[WaveformExt | None]):
+        self.held_waveforms = ws
         self.plot_held_waveforms(ws)
 
     def do_show_held_waveforms(self, show: bool):
@@ -392,6 +760,10 @@ class App:
         self.apply_checkpoint_to_trace_menu(checkpoint)
         self.apply_checkpoint_to_trigger_panel(checkpoint)
         self.apply_checkpoint_to_channels_panel(checkpoint)
+        self.apply_checkpoint_to_general_options_panel(checkpoint)
+        # scenes recorded before math channels existed keep current definitions
+        if checkpoint.math_channels != []:
+            self.do_set_math_channels(checkpoint.math_channels)
 
     def do_select_channel(self, channel: int):
         self.set_selected_channel(channel)
@@ -405,6 +777,18 @@ class App:
     def do_remove_all_y_axis_ticks_labels(self):
         self.remove_all_y_axis_ticks_labels()
 
+    def sync_controls_with_model(self):
+        """ Updates GUI controls after settings were changed other than through them, e.g. remotely. """
+        checkpoint = self.mk_checkpoint()
+        self.apply_checkpoint_to_trigger_panel(checkpoint)
+        self.apply_checkpoint_to_channels_panel(checkpoint)
+        self.apply_checkpoint_to_general_options_panel(checkpoint)
+
+    def do_board_linked(self):
+        self.set_board_init_progress(None)
+        self.set_connection_status_label(f"Connected to #{self.model.board_id}")
+        save_fingerprint(self.app_persistence.state, BoardFingerprint(self.model.board_id, driver_version()))
+
 
 class WorkerMessage:
     class ArmSingle:
@@ -472,6 +856,9 @@ class WorkerMessage:
         def __init__(self, checkpoint_num: int):
             self.checkpoint_num = checkpoint_num - 1
 
+    class RefilterWaveforms:
+        pass
+
     class HoldWaveforms:
         pass
 
@@ -500,10 +887,12 @@ class WorkerMessage:
             self.trigger_level = trigger_level
 
     class SetTriggerType:
-        __match_args__ = ("trigger_type",)
+        __match_args__ = ("trigger_type", "model_trigger_type")
 
-        def __init__(self, trigger_type: TriggerType):
+        def __init__(self, trigger_type: TriggerType, model_trigger_type: Optional[TriggerTypeModel] = None):
             self.trigger_type = trigger_type
+            # also stored in the model when given, i.e. when not set through the trigger panel
+            self.model_trigger_type = model_trigger_type
 
     class SetTriggerOnChannel:
         __match_args__ = ("channel",)
@@ -605,6 +994,39 @@ class WorkerMessage:
         def __init__(self, rect: QRectF):
             self.rect = rect
 
+    class LinkBoard:
+        __match_args__ = ("board", "board_id")
+
+        def __init__(self, board: Board, board_id: int):
+            self.board = board
+            self.board_id = board_id
+
+    class RemoteCommand:
+        """
+        Wraps message sent by remote control client, which waits for `done` to be set once it is processed. Client
+        that gives up waiting abandons the command, which worker then skips unless it already started processing it.
+        """
+        __match_args__ = ("message",)
+
+        def __init__(self, message):
+            self.message = message
+            self.done = threading.Event()
+            self.lock = threading.Lock()
+            self.started = False
+            self.abandoned = False
+
+        def start(self) -> bool:
+            """ Called by the worker before processing; returns False if command was abandoned. """
+            with self.lock:
+                self.started = not self.abandoned
+                return self.started
+
+        def abandon(self) -> bool:
+            """ Returns False if worker already started processing the command, which is then still completed. """
+            with self.lock:
+                self.abandoned = not self.started
+                return self.abandoned
+
     class Quit:
         pass
 
@@ -613,6 +1035,9 @@ class MessagesFromGUIWorker(QObject):
     disarm_trigger = Signal()
     plot_waveforms = Signal(tuple)
     plot_held_waveforms = Signal(list)
+    plot_roll_segment = Signal(object)
+    mask_failed = Signal(list)
+    frame_qualified = Signal(object, list)
     show_held_waveforms = Signal(bool)
     correct_trigger_position = Signal(float)
     replot_last_waveforms = Signal()
@@ -629,6 +1054,8 @@ class MessagesFromGUIWorker(QObject):
     update_y_ticks = Signal(int)
     apply_checkpoint = Signal(SceneCheckpoint)
     notify_waveforms_updated = Signal()
+    board_linked = Signal()
+    remote_command_processed = Signal()
 
 
 class ArmType(Enum):
@@ -647,15 +1074,35 @@ class GUIWorker(QRunnable, ):
         self.msg_out = MessagesFromGUIWorker()
         self.disable_queue_draining = False
         self.arm_type = ArmType.DISARMED
+        # software trigger qualifier; replaced as a whole from GUI thread
+        self.qualifier = QualifierSettings()
+        # frames are rolled rather than plotted at slow time scales if enabled; segmenter exists while rolling
+        self.roll_mode_enabled = False
+        self.roll_segmenter: RollSegmenter | None = None
+        # applied to frames shown in GUI only; filter of a channel is replaced from GUI thread
+        self.filters = FilterStage([ChannelFilter() for _ in app.channels])
 
     def drain_queue(self) -> bool:
         if self.disable_queue_draining:
             return False
         else:
+            # newly initialized board must be linked and remote commands processed, since their senders wait
+            # for them, even if other pending messages are discarded
+            preserved_messages = []
             while not self.messages.empty():
-                if isinstance(self.messages.get(), WorkerMessage.Quit):
+                message = self.messages.get()
+                if isinstance(message, WorkerMessage.Quit):
+                    for preserved_message in preserved_messages:
+                        if isinstance(preserved_message, WorkerMessage.LinkBoard):
+                            preserved_message.board.cleanup()
+                        else:
+                            preserved_message.done.set()
                     return True
+                elif isinstance(message, WorkerMessage.LinkBoard | WorkerMessage.RemoteCommand):
+                    preserved_messages.append(message)
 
+            for preserved_message in preserved_messages:
+                self.messages.put(preserved_message)
             return False
 
     def run(self):
@@ -672,6 +1119,8 @@ class GUIWorker(QRunnable, ):
         self.arm_type = ArmType.DISARMED
         current_trigger_type = TriggerType.DISABLED
         last_auto_armed_at_s = 0.0
+        # set when acquisition was forced rather than armed to wait for trigger
+        acquisition_forced = False
 
         def disarm_if_armed():
             if is_armed:
@@ -688,9 +1137,60 @@ class GUIWorker(QRunnable, ):
                     case ArmType.AUTO:
                         self.messages.put(WorkerMessage.ArmAuto(current_trigger_type, True))
 
+        def get_and_plot_waveforms():
+            with METRICS.usb_read_latency.time():
+                waveforms = self.app.model.get_waveforms()
+            waveforms = self.filters.apply(waveforms)
+            self.app.model.cache_waveforms(waveforms)
+            METRICS.acquired(triggered=not acquisition_forced)
+            screen_time_s = 10 * seconds(self.app.model.visual_time_scale)
+            if self.roll_mode_enabled and screen_time_s >= 10 * ROLL_MODE_MIN_TIME_SCALE_S:
+                if self.roll_segmenter is None:
+                    self.roll_segmenter = RollSegmenter(len(waveforms))
+                segment = self.roll_segmenter.segment(
+                    [None if w is None else w.vs for w in waveforms], time.time(), screen_time_s
+                )
+                if segment is not None:
+                    self.msg_out.plot_roll_segment.emit(segment)
+            else:
+                self.roll_segmenter = None
+                self.msg_out.plot_waveforms.emit(waveforms)
+            # listeners are added and removed on GUI thread, so that a snapshot of them is iterated over
+            for frame_listener in tuple(self.app.frame_listeners):
+                frame_listener(waveforms)
+            qualify_waveforms(waveforms)
+
+        def qualify_waveforms(waveforms):
+            qualifier = self.qualifier
+            if qualifier.kind == QualifierKind.NONE or qualifier.channel >= len(waveforms):
+                return
+            wf = waveforms[qualifier.channel]
+            if wf is None or not qualify(
+                    qualifier, wf.vs, wf.dV, self.app.model.channel[qualifier.channel].offset_V, wf.dt_s
+            ):
+                return
+
+            qualified_waveforms = [
+                None if w is None else WaveformExt(copy_waveform(w), self.app.model.channel[ch].color)
+                for ch, w in enumerate(waveforms)
+            ]
+            match qualifier.action:
+                case QualifierAction.HOLD:
+                    self.msg_out.plot_held_waveforms.emit(qualified_waveforms)
+                case QualifierAction.STOP:
+                    # disarming drains the queue, so trigger is not rearmed after this frame
+                    self.messages.put(WorkerMessage.Disarm())
+            self.msg_out.frame_qualified.emit(qualifier, qualified_waveforms)
+
         while True:
             message = self.messages.get()
             self.messages.task_done()
+            remote_command = None
+            if isinstance(message, WorkerMessage.RemoteCommand):
+                if not message.start():
+                    continue
+                remote_command, message = message, message.message
+
             match message:
                 case WorkerMessage.ArmSingle(trigger_type):
                     if self.drain_queue():
@@ -698,6 +1198,7 @@ class GUIWorker(QRunnable, ):
                     self.arm_type = ArmType.SINGLE
                     current_trigger_type = trigger_type
                     self.app.model.trigger.force_arm_trigger(trigger_type)
+                    acquisition_forced = False
                     self.messages.put(WorkerMessage.PlotAndDisarm())
                     self.msg_out.trigger_armed_single.emit()
                     is_armed = True
@@ -711,6 +1212,7 @@ class GUIWorker(QRunnable, ):
                     self.arm_type = ArmType.NORMAL
                     current_trigger_type = trigger_type
                     self.app.model.trigger.force_arm_trigger(trigger_type)
+                    acquisition_forced = False
                     self.messages.put(WorkerMessage.PlotAndRearmNormal())
                     is_armed = True
 
@@ -724,6 +1226,7 @@ class GUIWorker(QRunnable, ):
                     self.arm_type = ArmType.AUTO
                     current_trigger_type = trigger_type
                     self.app.model.trigger.force_arm_trigger(trigger_type)
+                    acquisition_forced = False
                     last_auto_armed_at_s = time.time()
                     self.messages.put(WorkerMessage.PlotAndRearmAuto())
                     is_armed = True
@@ -733,6 +1236,7 @@ class GUIWorker(QRunnable, ):
                         break
                     self.msg_out.trigger_armed_forced_acq.emit()
                     self.app.model.trigger.force_arm_trigger(TriggerType.AUTO)
+                    acquisition_forced = True
                     is_armed = True
                     match self.arm_type:
                         case ArmType.DISARMED:
@@ -748,8 +1252,7 @@ class GUIWorker(QRunnable, ):
                     if is_armed:
                         match self.app.model.is_capture_available():
                             case WaveformAvailable():
-                                w1, w2 = self.app.model.get_waveforms()
-                                self.msg_out.plot_waveforms.emit((w1, w2))
+                                get_and_plot_waveforms()
                                 self.messages.put(WorkerMessage.ArmSingle(current_trigger_type))
 
                             case _:
@@ -759,8 +1262,7 @@ class GUIWorker(QRunnable, ):
                     if is_armed:
                         match self.app.model.is_capture_available():
                             case WaveformAvailable():
-                                w1, w2 = self.app.model.get_waveforms()
-                                self.msg_out.plot_waveforms.emit((w1, w2))
+                                get_and_plot_waveforms()
                                 if notify_gui:
                                     self.msg_out.trigger_armed_normal.emit()
                                 self.messages.put(WorkerMessage.ArmNormal(current_trigger_type, False))
@@ -772,8 +1274,7 @@ class GUIWorker(QRunnable, ):
                     if is_armed:
                         match self.app.model.is_capture_available():
                             case WaveformAvailable():
-                                w1, w2 = self.app.model.get_waveforms()
-                                self.msg_out.plot_waveforms.emit((w1, w2))
+                                get_and_plot_waveforms()
                                 if notify_gui:
                                     self.msg_out.trigger_armed_auto.emit()
                                 self.messages.put(WorkerMessage.ArmAuto(current_trigger_type, False))
@@ -781,6 +1282,7 @@ class GUIWorker(QRunnable, ):
                             case _:
                                 if (time.time() - last_auto_armed_at_s) > self.app.model.trigger.max_dt_auto_trig_s:
                                     self.app.model.trigger.force_arm_trigger(TriggerType.AUTO)
+                                    acquisition_forced = True
                                     last_auto_armed_at_s = time.time()
 
                                 self.messages.put(WorkerMessage.PlotAndRearmAuto())
@@ -806,6 +1308,10 @@ class GUIWorker(QRunnable, ):
                     self.arm_type = ArmType.DISARMED
 
                     checkpoint = self.app.scene.data[checkpoint_num - 1]
+                    self.app.model.apply_settings(BoardSettings.from_checkpoint(checkpoint))
+                    self.msg_out.correct_trigger_position.emit(self.app.model.trigger.position_live)
+                    self.msg_out.correct_trigger_level.emit(self.app.model.trigger.level)
+                    self.msg_out.replot_last_waveforms.emit()
                     self.msg_out.apply_checkpoint.emit(checkpoint)
                     self.messages.put(WorkerMessage.PlotFromCheckpoint(checkpoint_num))
                     self.messages.put(WorkerMessage.Disarm(False))
@@ -816,6 +1322,13 @@ class GUIWorker(QRunnable, ):
                     self.app.model.cache_waveforms((w1, w2))
                     self.msg_out.plot_waveforms.emit((w1, w2))
 
+                case WorkerMessage.RefilterWaveforms():
+                    # frame shown from a scene checkpoint or rolled display is left as it is
+                    waveforms = self.filters.reapply(self.app.model.get_waveforms(use_last_shown_waveform=True))
+                    if waveforms is not None and self.roll_segmenter is None:
+                        self.app.model.cache_waveforms(waveforms)
+                        self.msg_out.plot_waveforms.emit(waveforms)
+
                 case WorkerMessage.HoldWaveforms():
                     waveforms = self.app.model.get_waveforms(use_last_shown_waveform=True)
                     held_waveforms = [
@@ -835,8 +1348,7 @@ class GUIWorker(QRunnable, ):
                         available = self.app.model.is_capture_available()
                         match available:
                             case WaveformAvailable():
-                                w1, w2 = self.app.model.get_waveforms()
-                                self.msg_out.plot_waveforms.emit((w1, w2))
+                                get_and_plot_waveforms()
                                 self.app.model.trigger.force_arm_trigger(TriggerType.DISABLED)
                                 self.msg_out.disarm_trigger.emit()
                                 self.arm_type = ArmType.DISARMED
@@ -865,10 +1377,12 @@ class GUIWorker(QRunnable, ):
                     self.msg_out.correct_trigger_level.emit(self.app.model.trigger.level)
                     rearm_if_required()
 
-                case WorkerMessage.SetTriggerType(trigger_type):
+                case WorkerMessage.SetTriggerType(trigger_type, model_trigger_type):
                     if self.drain_queue():
                         break
                     disarm_if_armed()
+                    if model_trigger_type is not None:
+                        self.app.model.trigger.trigger_type = model_trigger_type
                     current_trigger_type = trigger_type
                     rearm_if_required()
 
@@ -1039,9 +1553,26 @@ class GUIWorker(QRunnable, ):
                 case WorkerMessage.UpdateZoomRect(rect):
                     self.app.main_window().glw.zoomBox.setRect(rect)
 
+                case WorkerMessage.LinkBoard(board, board_id):
+                    # swapping in the board between messages ensures that no acquisition is in flight
+                    disarm_if_armed()
+                    self.app.model.link_to_live_board(board, board_id)
+                    self.app.model.init_board_from_model()
+                    for channel in self.app.channels:
+                        self.msg_out.correct_offset.emit(channel)
+                        self.msg_out.correct_dV.emit(channel)
+                    self.msg_out.correct_trigger_position.emit(self.app.model.trigger.position_live)
+                    self.msg_out.correct_trigger_level.emit(self.app.model.trigger.level)
+                    self.msg_out.board_linked.emit()
+                    rearm_if_required()
+
                 case WorkerMessage.Quit():
                     self.app.model.cleanup()
                     self.drain_queue()
                     self.messages.shutdown(True)
                     self.app.main_window().request_exit.emit()
                     break
+
+            if remote_command is not None:
+                self.msg_out.remote_command_processed.emit()
+                remote_command.done.set()
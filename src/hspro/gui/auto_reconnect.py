@@ -0,0 +1,48 @@
+"""
+Auto-reconnect to the board used last time. Board fingerprint identifies the last fully initialized board, so that
+on the next launch its initialization starts right away and it is picked without asking when several boards are
+connected. Board is still initialized in full: its registers do not survive power cycle and cannot be read back.
+"""
+import json
+from dataclasses import dataclass
+from importlib.metadata import PackageNotFoundError, version
+
+BOARD_FINGERPRINT_STATE_KEY = "board_fingerprint"
+
+
+def driver_version() -> str:
+    try:
+        return version("HaasoscopeProPy")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+@dataclass(frozen=True)
+class BoardFingerprint:
+    """ Identifies last fully initialized board together with version of the driver that initialized it. """
+    board_id: int
+    driver_version: str
+
+    def to_json(self) -> dict:
+        return {"board_id": self.board_id, "driver_version": self.driver_version}
+
+    @staticmethod
+    def value_of(json_data: dict) -> "BoardFingerprint":
+        return BoardFingerprint(
+            board_id=json_data["board_id"],
+            driver_version=json_data["driver_version"]
+        )
+
+
+def load_fingerprint(state) -> BoardFingerprint | None:
+    """ Returns fingerprint of the last board if it was initialized by the current version of the driver. """
+    try:
+        fingerprint = BoardFingerprint.value_of(json.loads(state.get_value(BOARD_FINGERPRINT_STATE_KEY, "{}")))
+    except (ValueError, KeyError, TypeError):
+        return None
+
+    return fingerprint if fingerprint.driver_version == driver_version() else None
+
+
+def save_fingerprint(state, fingerprint: BoardFingerprint) -> None:
+    state.set_value(BOARD_FINGERPRINT_STATE_KEY, json.dumps(fingerprint.to_json()))
@@ -0,0 +1,64 @@
+from PySide6.QtCore import QObject, QRunnable, Signal
+from hspro_api.board import mk_board
+from hspro_api.conn.connection import Connection
+
+# number of progress steps reported by `mk_board` while initializing the board
+BOARD_INIT_PROGRESS_STEPS = 34
+
+
+class BoardConnectorSignals(QObject):
+    progress = Signal(int)
+    no_boards_found = Signal()
+    multiple_boards_found = Signal(list)
+    # initialized board and its id
+    board_ready = Signal(object, int)
+    failed = Signal(str)
+
+
+class BoardConnector(QRunnable):
+    """
+    Discovers connected boards and initializes one of them off the GUI thread. If `connection` is not given and
+    more than one board is found, the connections are reported back, so that the user can pick one, and
+    a new connector is started for the selected connection. The exception is `preferred_board_id`, i.e. the board
+    used last time, which is connected to right away when found among others.
+    """
+
+    def __init__(self, connection: Connection | None = None, preferred_board_id: int | None = None):
+        super().__init__()
+        self.setAutoDelete(True)
+        self.connection = connection
+        self.preferred_board_id = preferred_board_id
+        self.signals = BoardConnectorSignals()
+
+    def run(self):
+        try:
+            connection = self.connection if self.connection is not None else self.discover()
+            if connection is None:
+                return
+
+            board = mk_board(
+                connection, debug=False, debug_spi=False, show_board_call_trace=False,
+                progress_callback=self.signals.progress.emit,
+                wrap_progress_counter_at=BOARD_INIT_PROGRESS_STEPS
+            )
+            self.signals.board_ready.emit(board, connection.board)
+        except Exception as ex:
+            self.signals.failed.emit(f"{ex}")
+
+    def discover(self) -> Connection | None:
+        from hspro_api.conn.connection_op import connect as raw_connect
+
+        connections = raw_connect(debug=False)
+        match len(connections):
+            case 0:
+                self.signals.no_boards_found.emit()
+                return None
+            case 1:
+                return connections[0]
+            case _:
+                for connection in connections:
+                    if connection.board == self.preferred_board_id:
+                        return connection
+
+                self.signals.multiple_boards_found.emit(connections)
+                return None
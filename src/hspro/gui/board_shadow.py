@@ -0,0 +1,46 @@
+from typing import Any, Callable, Hashable
+
+
+class BoardShadow:
+    """
+    Shadow copy of the values last written to the live board. Writing a value equal to the one already
+    written is skipped, and the value board returned for it the last time (e.g. corrected offset) is returned
+    instead. Entries that depend on other board state must be invalidated when that state changes.
+    """
+
+    def __init__(self):
+        self.__written: dict[Hashable, tuple[Any, Any]] = {}
+        self.writes_issued = 0
+        self.writes_avoided = 0
+
+    def write[V, R](
+            self,
+            key: Hashable,
+            value: V,
+            do_write: Callable[[V], R],
+            invalidates: tuple[Hashable, ...] = ()
+    ) -> R:
+        """
+        Writes value to the board using `do_write` unless the same value was the last one written under this key.
+        When a write is issued, entries listed in `invalidates` are dropped, so that they are written again next time.
+        """
+        last_write = self.__written.get(key)
+        if last_write is not None and last_write[0] == value:
+            self.writes_avoided += 1
+            return last_write[1]
+
+        result = do_write(value)
+        self.__written[key] = (value, result)
+        self.writes_issued += 1
+        self.invalidate(*invalidates)
+        return result
+
+    def invalidate(self, *keys: Hashable) -> None:
+        for key in keys:
+            self.__written.pop(key, None)
+
+    def reset(self) -> None:
+        self.__written.clear()
+
+    def summary(self) -> str:
+        return f"Board writes issued: {self.writes_issued}, avoided: {self.writes_avoided}"
@@ -0,0 +1,120 @@
+from functools import lru_cache
+from typing import Callable, Sequence
+
+import numpy as np
+from hspro_api.time_constants import TimeConstants
+from unlib import Duration, MetricValue, Scale, TimeUnit
+
+VISUAL_TIME_PER_DIVISION = [
+    Duration(1, TimeUnit.NS),
+    Duration(2, TimeUnit.NS),
+    Duration(5, TimeUnit.NS),
+    Duration(10, TimeUnit.NS),
+    Duration(20, TimeUnit.NS),
+    Duration(50, TimeUnit.NS),
+    Duration(100, TimeUnit.NS),
+    Duration(200, TimeUnit.NS),
+    Duration(500, TimeUnit.NS),
+    Duration(1, TimeUnit.US),
+    Duration(2, TimeUnit.US),
+    Duration(5, TimeUnit.US),
+    Duration(10, TimeUnit.US),
+    Duration(20, TimeUnit.US),
+    Duration(50, TimeUnit.US),
+    Duration(100, TimeUnit.US),
+    Duration(200, TimeUnit.US),
+    Duration(500, TimeUnit.US),
+    Duration(1, TimeUnit.MS),
+    Duration(2, TimeUnit.MS),
+    Duration(5, TimeUnit.MS),
+    Duration(10, TimeUnit.MS),
+    Duration(20, TimeUnit.MS),
+    Duration(50, TimeUnit.MS),
+    Duration(100, TimeUnit.MS),
+    Duration(200, TimeUnit.MS),
+    Duration(500, TimeUnit.MS),
+    Duration(1, TimeUnit.S),
+    Duration(2, TimeUnit.S)
+]
+
+# relative tolerance used when locating current value in the lattice, so that value which went through
+# conversion to and from string or different unit scale is still found at its own position
+RELATIVE_TOLERANCE = 1e-9
+
+
+class ControlLattice[T]:
+    """
+    Immutable ordered set of valid values of one control, such as a spinner. Values are kept as floats and
+    searched with bisection; objects shown in GUI are made only for the values actually picked.
+    """
+
+    def __init__(self, values: Sequence[float], mk_display_value: Callable[[int], T], descending: bool = False):
+        # descending lattice is stored negated, so that both kinds can be searched in ascending array
+        self.__sign = -1.0 if descending else 1.0
+        self.__values = np.array(values, dtype=np.float64) * self.__sign
+        self.__values.setflags(write=False)
+        self.__mk_display_value = mk_display_value
+
+    def __len__(self) -> int:
+        return len(self.__values)
+
+    def index_of(self, current_value: float) -> int:
+        """
+        Returns index of the first value not below `current_value` (not above it for descending lattice),
+        or 0 if there is no such value.
+        """
+        value = current_value * self.__sign
+        index = int(np.searchsorted(self.__values, value - abs(value) * RELATIVE_TOLERANCE, side="left"))
+        return 0 if index == len(self.__values) else index
+
+    def step(self, current_value: float, index_offset: int) -> T:
+        next_index = min(max(self.index_of(current_value) + index_offset, 0), len(self.__values) - 1)
+        return self.__mk_display_value(next_index)
+
+    def display_values(self) -> list[T]:
+        return [self.__mk_display_value(i) for i in range(len(self.__values))]
+
+
+def seconds(duration: Duration) -> float:
+    return duration.to_float(TimeUnit.S)
+
+
+def volts(value: MetricValue) -> float:
+    return value.to_float(Scale.UNIT)
+
+
+@lru_cache(maxsize=32)
+def time_scale_lattice(two_channel_operation: bool, mem_depth: int) -> ControlLattice[Duration]:
+    samples_per_row_per_waveform = 20 if two_channel_operation else 40
+    num_samples_per_division = samples_per_row_per_waveform * mem_depth / 10
+    sample_periods = [a[2] for a in (TimeConstants.dt_two_ch if two_channel_operation else TimeConstants.dt_one_ch)]
+    return ControlLattice(
+        values=[seconds(dt) * num_samples_per_division for dt in sample_periods],
+        mk_display_value=lambda i: (sample_periods[i] * num_samples_per_division).optimize()
+    )
+
+
+@lru_cache(maxsize=64)
+def offset_lattice(dV: float, do_oversample: bool) -> ControlLattice[MetricValue]:
+    scaling = 1.5 * dV / 160 * (2 if do_oversample else 1)  # compare to 0 dB gain
+    steps = range(-990, 990, 10)
+    return ControlLattice(
+        values=[scaling * n for n in steps],
+        mk_display_value=lambda i: MetricValue.value_of(f"{scaling * steps[i]} V").optimize()
+    )
+
+
+@lru_cache(maxsize=4)
+def voltage_scale_lattice(ten_x_probe: bool) -> ControlLattice[MetricValue]:
+    values_V = [4, 2, 1, 0.5, 0.25, 0.1] if ten_x_probe else [0.4, 0.2, 0.1, 0.05, 0.025, 0.01]
+    return ControlLattice(
+        values=values_V,
+        mk_display_value=lambda i: MetricValue(values_V[i], Scale.UNIT, "V").optimize(),
+        descending=True
+    )
+
+
+VISUAL_TIME_SCALE_LATTICE = ControlLattice(
+    values=[seconds(d) for d in VISUAL_TIME_PER_DIVISION],
+    mk_display_value=lambda i: VISUAL_TIME_PER_DIVISION[i]
+)
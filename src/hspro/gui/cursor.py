@@ -0,0 +1,34 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class CursorReadout:
+    # index, time and value of the sample nearest to the cursor
+    sample_index: int
+    sample_t: float
+    sample_v: float
+    # value linearly interpolated between samples around the cursor time
+    interpolated_v: float
+
+
+def read_out(t: np.ndarray, v: np.ndarray, cursor_t: float) -> CursorReadout | None:
+    """
+    Finds sample nearest to `cursor_t` by binary search in the ascending time axis, so that cost does not grow
+    with the capture length. Returns None if there are no samples.
+    """
+    if t is None or len(t) == 0:
+        return None
+
+    i = int(np.searchsorted(t, cursor_t))
+    if i == 0:
+        return CursorReadout(0, float(t[0]), float(v[0]), float(v[0]))
+    if i == len(t):
+        return CursorReadout(i - 1, float(t[-1]), float(v[-1]), float(v[-1]))
+
+    t0, t1 = float(t[i - 1]), float(t[i])
+    v0, v1 = float(v[i - 1]), float(v[i])
+    nearest = i - 1 if cursor_t - t0 <= t1 - cursor_t else i
+    interpolated_v = v0 + (v1 - v0) * (cursor_t - t0) / (t1 - t0) if t1 != t0 else v0
+    return CursorReadout(nearest, float(t[nearest]), float(v[nearest]), interpolated_v)
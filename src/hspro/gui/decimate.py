@@ -0,0 +1,15 @@
+import numpy as np
+
+
+def min_max_decimate(v: np.ndarray, num_buckets: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Splits samples into `num_buckets` contiguous buckets of (nearly) equal size and returns minimum and maximum
+    value within each bucket. Drawing vertical line between min and max in each pixel column preserves spikes
+    and envelope of the trace regardless of how many samples fall into one column.
+    """
+    samples = np.asarray(v)
+    if samples.size <= num_buckets:
+        return samples, samples
+
+    bucket_starts = (np.arange(num_buckets) * samples.size) // num_buckets
+    return np.minimum.reduceat(samples, bucket_starts), np.maximum.reduceat(samples, bucket_starts)
@@ -0,0 +1,79 @@
+from PySide6.QtWidgets import QDoubleSpinBox, QLabel, QSpinBox
+from pytide6 import Dialog, VBoxLayout, PushButton, HBoxPanel, W, ComboBox
+
+from hspro.gui.app import App
+from hspro.gui.decoders import DecoderSettings, Protocol
+
+
+class DecoderDialog(Dialog):
+    def __init__(self, parent, app: App):
+        super().__init__(parent, windowTitle="Protocol decoder", modal=True)
+
+        settings = app.get_decoder_settings()
+
+        protocol_cbox = ComboBox(
+            items=[protocol.value for protocol in Protocol],
+            current_selection=settings.protocol.value,
+            min_width=80
+        )
+
+        channel_cbox = ComboBox(
+            items=[f"CH{channel + 1}" for channel in app.channels],
+            current_selection=f"CH{settings.channel + 1}",
+            min_width=80
+        )
+        channel_label = QLabel()
+
+        baud_rate_sb = QSpinBox()
+        baud_rate_sb.setMinimum(1)
+        baud_rate_sb.setMaximum(100_000_000)
+        baud_rate_sb.setValue(settings.baud_rate)
+
+        threshold_sb = QDoubleSpinBox()
+        threshold_sb.setDecimals(3)
+        threshold_sb.setMinimum(-100)
+        threshold_sb.setMaximum(100)
+        threshold_sb.setValue(settings.threshold_V)
+        threshold_sb.setSuffix(" V")
+
+        def update_controls():
+            protocol = Protocol.value_of(protocol_cbox.currentText())
+            channel = channel_cbox.currentIndex()
+            match protocol:
+                case Protocol.SPI:
+                    channel_label.setText(f"Clock; data on CH{2 - channel}")
+                case Protocol.I2C:
+                    channel_label.setText(f"SCL; SDA on CH{2 - channel}")
+                case _:
+                    channel_label.setText("Line")
+            channel_cbox.setEnabled(protocol != Protocol.NONE)
+            baud_rate_sb.setEnabled(protocol == Protocol.UART)
+            threshold_sb.setEnabled(protocol != Protocol.NONE)
+
+        protocol_cbox.currentTextChanged.connect(update_controls)
+        channel_cbox.currentTextChanged.connect(update_controls)
+        update_controls()
+
+        def on_ok():
+            new_settings = DecoderSettings(
+                protocol=Protocol.value_of(protocol_cbox.currentText()),
+                channel=channel_cbox.currentIndex(),
+                baud_rate=baud_rate_sb.value(),
+                threshold_V=threshold_sb.value()
+            )
+            if new_settings != settings:
+                app.do_set_decoder_settings(new_settings)
+            self.close()
+
+        self.setLayout(VBoxLayout([
+            HBoxPanel([protocol_cbox, QLabel("Protocol")], margins=0),
+            HBoxPanel([channel_cbox, channel_label], margins=0),
+            HBoxPanel([baud_rate_sb, QLabel("UART baud rate (8N1)")], margins=0),
+            HBoxPanel([threshold_sb, QLabel("Logic threshold")], margins=0),
+
+            HBoxPanel([
+                W(HBoxPanel(), stretch=1),
+                PushButton("Ok", on_clicked=on_ok),
+                PushButton("Cancel", on_clicked=self.close)
+            ])
+        ]))
@@ -0,0 +1,202 @@
+"""
+Decoding of UART, SPI and I2C from captured frames.
+
+Each channel is first turned into logic levels with a single comparison against a threshold and packed eight samples
+per byte with `np.packbits`. Edges are then found on packed logic: a byte is xor-ed with itself shifted by one bit,
+`np.flatnonzero` skips all bytes without a transition and only the few remaining bytes are unpacked. Decoders only
+work with edge indices and levels sampled at given indices, so the cost of decoding is proportional to the number of
+edges rather than to the number of samples.
+"""
+from dataclasses import dataclass
+from enum import Enum
+
+import numpy as np
+
+BIT_WEIGHTS_MSB_FIRST = 1 << np.arange(7, -1, -1)
+BIT_WEIGHTS_LSB_FIRST = 1 << np.arange(8)
+
+
+class Protocol(Enum):
+    NONE = "None"
+    UART = "UART"
+    SPI = "SPI"
+    I2C = "I2C"
+
+    @staticmethod
+    def value_of(value: str) -> "Protocol":
+        for protocol in Protocol:
+            if protocol.value == value:
+                return protocol
+        raise ValueError(f"Unknown protocol {value}")
+
+
+@dataclass(frozen=True)
+class DecoderSettings:
+    protocol: Protocol = Protocol.NONE
+    # UART line, SPI clock or I2C SCL; the other channel is SPI data or I2C SDA
+    channel: int = 0
+    baud_rate: int = 115200
+    threshold_V: float = 1.65
+
+    @classmethod
+    def value_of(cls, json_data) -> "DecoderSettings":
+        return DecoderSettings(
+            protocol=Protocol.value_of(json_data["protocol"]),
+            channel=json_data["channel"],
+            baud_rate=json_data["baud_rate"],
+            threshold_V=json_data["threshold_V"],
+        )
+
+    def to_json(self) -> dict:
+        return {
+            "protocol": self.protocol.value,
+            "channel": self.channel,
+            "baud_rate": self.baud_rate,
+            "threshold_V": self.threshold_V,
+        }
+
+    @property
+    def channels(self) -> list[int]:
+        """ Channels used by the decoder, first one being the `channel`. """
+        match self.protocol:
+            case Protocol.NONE:
+                return []
+            case Protocol.UART:
+                return [self.channel]
+            case _:
+                return [self.channel, 1 - self.channel]
+
+
+@dataclass(frozen=True)
+class Annotation:
+    # sample indices of the first and the last sample of decoded item
+    start: int
+    end: int
+    text: str
+
+
+class LogicTrace:
+    """ Logic levels of `n` samples packed eight per byte, first sample in the most significant bit. """
+
+    def __init__(self, vs, threshold: float):
+        samples = np.asarray(vs)
+        self.n = samples.size
+        self.packed = np.packbits(samples > threshold)
+
+    def edges(self) -> np.ndarray:
+        """ Indices `i` of samples that differ from sample `i - 1`. """
+        p = self.packed
+        if self.n < 2:
+            return np.empty(0, dtype=np.int64)
+        # bit k of `following` holds sample following the one in bit k of `p`
+        following = np.empty_like(p)
+        following[:-1] = (p[:-1] << 1) | (p[1:] >> 7)
+        following[-1] = p[-1] << 1
+        changes = p ^ following
+        changed_bytes = np.flatnonzero(changes)
+        rows, bits = np.nonzero(np.unpackbits(changes[changed_bytes]).reshape(-1, 8))
+        positions = changed_bytes[rows] * 8 + bits
+        return positions[positions < self.n - 1] + 1
+
+    def levels_at(self, indices: np.ndarray) -> np.ndarray:
+        indices = np.asarray(indices, dtype=np.int64)
+        return (self.packed[indices >> 3] >> (7 - (indices & 7))) & 1
+
+
+def decode_uart(line: LogicTrace, samples_per_bit: float) -> list[Annotation]:
+    """ 8N1, idle high, least significant bit first. """
+    annotations = []
+    if samples_per_bit < 1:
+        return annotations
+    edges = line.edges()
+    falling = edges[line.levels_at(edges) == 0]
+    bit_centers = (np.arange(1, 9) + 0.5) * samples_per_bit
+    stop_center = 9.5 * samples_per_bit
+    i = 0
+    while i < falling.size:
+        start = int(falling[i])
+        if start + stop_center >= line.n:
+            break
+        bits = line.levels_at((start + bit_centers).astype(np.int64))
+        stop_ok = line.levels_at([int(start + stop_center)])[0] == 1
+        value = int(bits @ BIT_WEIGHTS_LSB_FIRST)
+        end = int(start + 10 * samples_per_bit) - 1
+        annotations.append(Annotation(start, end, f"{value:02X}" if stop_ok else f"{value:02X}!"))
+        # next start bit can only begin after the stop bit
+        i = int(np.searchsorted(falling, start + stop_center, side="right"))
+    return annotations
+
+
+def bursts(clock_edges: np.ndarray) -> list[np.ndarray]:
+    """ Splits clock edges into bursts separated by pauses longer than four typical clock periods. """
+    if clock_edges.size < 2:
+        return [clock_edges] if clock_edges.size > 0 else []
+    gaps = np.diff(clock_edges)
+    pause = 4 * np.median(gaps)
+    return np.split(clock_edges, np.flatnonzero(gaps > pause) + 1)
+
+
+def decode_spi(clock: LogicTrace, data: LogicTrace) -> list[Annotation]:
+    """
+    Mode 0 (data sampled on rising clock edge), most significant bit first. Without chip select, words are framed by
+    pauses in the clock.
+    """
+    annotations = []
+    clock_edges = clock.edges()
+    rising = clock_edges[clock.levels_at(clock_edges) == 1]
+    for burst in bursts(rising):
+        num_bytes = burst.size // 8
+        if num_bytes == 0:
+            continue
+        sampled_at = burst[:num_bytes * 8].reshape(num_bytes, 8)
+        values = data.levels_at(sampled_at) @ BIT_WEIGHTS_MSB_FIRST
+        for j, value in enumerate(values.tolist()):
+            annotations.append(Annotation(int(sampled_at[j, 0]), int(sampled_at[j, 7]), f"{value:02X}"))
+    return annotations
+
+
+def decode_i2c(scl: LogicTrace, sda: LogicTrace) -> list[Annotation]:
+    """ Bytes between start and stop conditions; first byte after start is address with read/write bit. """
+    annotations = []
+    sda_edges = sda.edges()
+    scl_high = scl.levels_at(sda_edges) == 1
+    sda_levels = sda.levels_at(sda_edges)
+    starts = sda_edges[scl_high & (sda_levels == 0)]
+    stops = sda_edges[scl_high & (sda_levels == 1)]
+    if starts.size == 0:
+        return annotations
+
+    scl_edges = scl.edges()
+    scl_rising = scl_edges[scl.levels_at(scl_edges) == 1]
+    conditions = np.sort(np.concatenate((starts, stops)))
+    for start in starts.tolist():
+        next_condition = conditions[np.searchsorted(conditions, start, side="right"):][:1]
+        end = int(next_condition[0]) if next_condition.size > 0 else sda.n
+        clocks = scl_rising[np.searchsorted(scl_rising, start):np.searchsorted(scl_rising, end)]
+        num_bytes = clocks.size // 9
+        if num_bytes == 0:
+            continue
+        sampled_at = clocks[:num_bytes * 9].reshape(num_bytes, 9)
+        bits = sda.levels_at(sampled_at)
+        values = bits[:, :8] @ BIT_WEIGHTS_MSB_FIRST
+        acks = bits[:, 8] == 0
+        for j, (value, ack) in enumerate(zip(values.tolist(), acks.tolist())):
+            if j == 0:
+                text = f"{'R' if value & 1 else 'W'} {value >> 1:02X}"
+            else:
+                text = f"{value:02X}"
+            annotations.append(Annotation(int(sampled_at[j, 0]), int(sampled_at[j, 8]), text + ("" if ack else " N")))
+    return annotations
+
+
+def decode(settings: DecoderSettings, logic: list[LogicTrace], dt_s: float) -> list[Annotation]:
+    """ `logic` holds traces of `settings.channels` in the same order. """
+    match settings.protocol:
+        case Protocol.UART:
+            return decode_uart(logic[0], 1 / (settings.baud_rate * dt_s))
+        case Protocol.SPI:
+            return decode_spi(logic[0], logic[1])
+        case Protocol.I2C:
+            return decode_i2c(logic[0], logic[1])
+        case _:
+            return []
@@ -0,0 +1,59 @@
+from sprats.config import AppPersistence
+
+from hspro.gui.model import ChannelCouplingModel, ChannelImpedanceModel
+from hspro.gui.persistence import WriteBehindPersistence
+
+
+def mk_app_persistence() -> WriteBehindPersistence:
+    """ Opens persistent config and state of the application, shared by GUI and headless capture. """
+    return WriteBehindPersistence(AppPersistence(
+        app_name="hspro",
+        override_config_if_different_version=True,
+        init_config_data={
+            "config_version": 14,
+            "plot_color_scheme": "dark",
+            "show_trigger_level_line": False,
+            "show_trigger_position_line": False,
+            "show_grid": True,
+            "show_y_axis_labels": True,
+            "show_zero_line": True,
+            "general": {
+                "highres": True,
+                "mem_depth": 100,
+                "delay": 0,
+                "f_delay": 0,
+                "visual_time_scale": "1 us"
+            },
+            "trigger": {
+                "on_channel": 0,
+                "trigger_type": "Rising Edge",
+                "tot": 2,
+                "delta": 2,
+                "level": 0.0,
+                "position": 0.5,
+                "auto_frequency": "5 Hz"
+            },
+            "channels": {
+                "0": {
+                    "active": True,
+                    "color": "#ffee2e",
+                    "offset_V": 0.0,
+                    "dV": 0.2,
+                    "coupling": ChannelCouplingModel.DC.value,
+                    "impedance": ChannelImpedanceModel.FIFTY_OHM.value,
+                    "ten_x_probe": False,
+                    "five_x_attenuation": False
+                },
+                "1": {
+                    "active": False,
+                    "color": "#40cc1a",
+                    "offset_V": 0.0,
+                    "dV": 0.2,
+                    "coupling": ChannelCouplingModel.DC.value,
+                    "impedance": ChannelImpedanceModel.FIFTY_OHM.value,
+                    "ten_x_probe": False,
+                    "five_x_attenuation": False
+                }
+            }
+        }
+    ))
@@ -0,0 +1,265 @@
+"""
+Export of waveforms into NPY, CSV or Parquet files.
+
+All formats hold the same table with one row per sample: `item` (number of the scene checkpoint or 0 for
+the current frame and held traces), `channel` (numbered from 1), `t_s` (time relative to the trigger) and `V`. Rows
+are produced and written in chunks, so that exporting long scenes never holds more than one chunk of formatted
+output in memory.
+"""
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Callable, Optional, BinaryIO
+
+import numpy as np
+from hspro_api import Waveform
+
+from hspro.gui.scene import SceneCheckpoint
+
+# number of samples formatted and written at a time
+CHUNK_ROWS = 1 << 18
+
+EXPORT_DTYPE = np.dtype([("item", "<u4"), ("channel", "<u1"), ("t_s", "<f8"), ("V", "<f4")])
+
+
+class ExportFormat(Enum):
+    NPY = "npy"
+    CSV = "csv"
+    PARQUET = "parquet"
+
+    @staticmethod
+    def value_of_suffix(suffix: str) -> "ExportFormat":
+        for export_format in ExportFormat:
+            if export_format.value == suffix.lower().lstrip("."):
+                return export_format
+        raise ValueError(f"Unsupported export format {suffix}")
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+@dataclass
+class ExportTrace:
+    item: int
+    channel: int
+    t_s_0: float
+    dt_s: float
+    dV: float
+    offset_V: float
+    # samples in vertical divisions
+    v: np.ndarray
+
+
+def traces_from_waveforms(
+        waveforms: list[Optional[Waveform]],
+        offsets_V: list[float],
+        item: int = 0
+) -> list[ExportTrace]:
+    return [
+        ExportTrace(
+            item=item,
+            channel=channel + 1,
+            t_s_0=-wf.dt_s * wf.trigger_pos,
+            dt_s=wf.dt_s,
+            dV=wf.dV,
+            offset_V=offsets_V[channel],
+            v=np.array(wf.vs, dtype=np.float32)
+        )
+        for channel, wf in enumerate(waveforms) if wf is not None
+    ]
+
+
+def traces_from_checkpoint(item: int, checkpoint: SceneCheckpoint) -> list[ExportTrace]:
+    return [
+        ExportTrace(
+            item=item, channel=channel + 1, t_s_0=cd.t_s_0, dt_s=cd.dt_s, dV=cd.dV, offset_V=cd.offset_V, v=cd.v
+        )
+        for channel, cd in enumerate(checkpoint.channels) if cd.active and cd.v.size > 0
+    ]
+
+
+class NpyExportWriter:
+    """ Writes structured array of EXPORT_DTYPE; header is written upfront since total number of rows is known. """
+
+    def __init__(self, out: BinaryIO, num_rows: int):
+        self.out = out
+        np.lib.format.write_array_header_1_0(out, {
+            "descr": np.lib.format.dtype_to_descr(EXPORT_DTYPE), "fortran_order": False, "shape": (num_rows,)
+        })
+        self.rows = np.empty(0, dtype=EXPORT_DTYPE)
+
+    def write(self, item: int, channel: int, t_s: np.ndarray, V: np.ndarray) -> None:
+        if self.rows.size != t_s.size:
+            self.rows = np.empty(t_s.size, dtype=EXPORT_DTYPE)
+        self.rows["item"] = item
+        self.rows["channel"] = channel
+        self.rows["t_s"] = t_s
+        self.rows["V"] = V
+        self.out.write(memoryview(self.rows).cast("B"))
+
+    def close(self) -> None:
+        pass
+
+
+# CSV rows are formatted in blocks of this many, so that intermediate arrays stay in CPU cache
+CSV_FORMAT_BLOCK_ROWS = 1 << 14
+
+# powers of ten indexed by exponent + POWERS_OF_TEN_OFFSET; half of the scaling of any finite float64 value
+POWERS_OF_TEN_OFFSET = 200
+POWERS_OF_TEN = np.power(10.0, np.arange(-POWERS_OF_TEN_OFFSET, POWERS_OF_TEN_OFFSET + 1))
+
+
+def ascii_scientific(x: np.ndarray, digits: int) -> np.ndarray:
+    """
+    Formats values in scientific notation with `digits` significant digits and trailing zeros dropped, like `%g`
+    does for small and large values, e.g. `-1.25e-06`, without formatting any value in Python. Returns ASCII codes
+    with one column per value and one row per character position; positions not used by shorter values are 0.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = x.size
+    finite = np.isfinite(x)
+    a = np.where(finite, np.abs(x), 0.0)
+    nonzero = a > 0
+
+    exponent = np.zeros(n, dtype=np.int64)
+    np.floor(np.log10(a, where=nonzero, out=np.zeros(n)), out=exponent, where=nonzero, casting="unsafe")
+    # scaled in two steps, so that neither factor overflows for subnormal values
+    scale = digits - 1 - exponent
+    half = scale // 2
+    mantissa = np.rint(
+        a * POWERS_OF_TEN[half + POWERS_OF_TEN_OFFSET] * POWERS_OF_TEN[scale - half + POWERS_OF_TEN_OFFSET]
+    ).astype(np.int64)
+    # rounding may carry into one more digit, e.g. 9.999 into 10.00
+    carried = mantissa >= 10 ** digits
+    mantissa[carried] //= 10
+    exponent[carried] += 1
+
+    chars = np.zeros((digits + 7, n), dtype=np.uint8)
+    # digits of the fraction from the last one, which is dropped as long as it and all after it are zero
+    trailing_zero = np.ones(n, dtype=bool)
+    for position in range(digits + 1, 2, -1):
+        mantissa, digit = np.divmod(mantissa, 10)
+        trailing_zero &= digit == 0
+        np.add(digit, ord("0"), out=chars[position], where=~trailing_zero, casting="unsafe")
+    chars[0] = np.where(np.signbit(x) & nonzero, ord("-"), 0)
+    chars[1] = mantissa + ord("0")
+    chars[2] = np.where(trailing_zero, 0, ord("."))
+    # exponent has at least two digits, like in C
+    e = np.abs(exponent)
+    chars[digits + 2] = ord("e")
+    chars[digits + 3] = np.where(exponent < 0, ord("-"), ord("+"))
+    chars[digits + 4] = np.where(e >= 100, e // 100 + ord("0"), 0)
+    chars[digits + 5] = (e // 10) % 10 + ord("0")
+    chars[digits + 6] = e % 10 + ord("0")
+
+    specials = [(~nonzero & finite, b"0"), (np.isnan(x), b"nan"), (x == np.inf, b"inf"), (x == -np.inf, b"-inf")]
+    for special, text in specials:
+        if special.any():
+            chars[:, special] = 0
+            chars[:len(text), special] = np.frombuffer(text, dtype=np.uint8)[:, None]
+    return chars
+
+
+class CsvExportWriter:
+    """
+    Formats whole columns with NumPy: `ascii_scientific` turns time and voltage columns into ASCII codes, which are
+    stacked with the row prefix and separators, transposed into rows and written with unused positions dropped.
+    Item and channel are constant within a chunk and are part of the row prefix.
+    """
+
+    def __init__(self, out: BinaryIO):
+        self.out = out
+        self.out.write(b"item,channel,t_s,V\n")
+
+    def write(self, item: int, channel: int, t_s: np.ndarray, V: np.ndarray) -> None:
+        prefix = np.frombuffer(f"{item},{channel},".encode("ascii"), dtype=np.uint8)[:, None]
+        for start in range(0, t_s.size, CSV_FORMAT_BLOCK_ROWS):
+            end = min(start + CSV_FORMAT_BLOCK_ROWS, t_s.size)
+            n = end - start
+            columns = np.concatenate([
+                np.broadcast_to(prefix, (prefix.size, n)),
+                ascii_scientific(t_s[start:end], 12),
+                np.full((1, n), ord(","), dtype=np.uint8),
+                ascii_scientific(V[start:end], 6),
+                np.full((1, n), ord("\n"), dtype=np.uint8)
+            ])
+            rows = columns.T.ravel()
+            self.out.write(np.compress(rows != 0, rows).tobytes())
+
+    def close(self) -> None:
+        pass
+
+
+class ParquetExportWriter:
+    """ Each chunk becomes one row group. Requires optional `pyarrow` package. """
+
+    def __init__(self, out: BinaryIO):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Export to Parquet requires pyarrow package to be installed")
+
+        self.pa = pa
+        self.schema = pa.schema([
+            ("item", pa.uint32()), ("channel", pa.uint8()), ("t_s", pa.float64()), ("V", pa.float32())
+        ])
+        self.writer = pq.ParquetWriter(out, self.schema)
+
+    def write(self, item: int, channel: int, t_s: np.ndarray, V: np.ndarray) -> None:
+        self.writer.write_table(self.pa.Table.from_arrays([
+            self.pa.array(np.full(t_s.size, item, dtype=np.uint32)),
+            self.pa.array(np.full(t_s.size, channel, dtype=np.uint8)),
+            self.pa.array(t_s),
+            self.pa.array(V)
+        ], schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def export_traces(
+        traces: list[ExportTrace],
+        path: Path,
+        export_format: ExportFormat,
+        progress: Callable[[int], None] = lambda _: None,
+        is_cancelled: Callable[[], bool] = lambda: False,
+        chunk_rows: int = CHUNK_ROWS
+) -> int:
+    """
+    Writes traces into file, reporting progress in percent after each chunk. Raises ExportCancelled if cancelled,
+    in which case partially written file is removed. Returns number of rows written.
+    """
+    num_rows = sum(trace.v.size for trace in traces)
+    rows_written = 0
+    try:
+        with open(path, "wb") as out:
+            match export_format:
+                case ExportFormat.NPY:
+                    writer = NpyExportWriter(out, num_rows)
+                case ExportFormat.CSV:
+                    writer = CsvExportWriter(out)
+                case ExportFormat.PARQUET:
+                    writer = ParquetExportWriter(out)
+
+            t_s = np.empty(min(chunk_rows, max(num_rows, 1)), dtype=np.float64)
+            V = np.empty(t_s.size, dtype=np.float32)
+            for trace in traces:
+                for start in range(0, trace.v.size, chunk_rows):
+                    if is_cancelled():
+                        raise ExportCancelled()
+                    end = min(start + chunk_rows, trace.v.size)
+                    n = end - start
+                    np.multiply(np.arange(start, end, dtype=np.float64), trace.dt_s, out=t_s[:n])
+                    t_s[:n] += trace.t_s_0
+                    np.multiply(trace.v[start:end], trace.dV, out=V[:n])
+                    V[:n] -= trace.offset_V
+                    writer.write(trace.item, trace.channel, t_s[:n], V[:n])
+                    rows_written += n
+                    progress(int(100 * rows_written / num_rows))
+            writer.close()
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return rows_written
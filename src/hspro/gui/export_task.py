@@ -0,0 +1,43 @@
+import threading
+from pathlib import Path
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from hspro.gui.export import ExportCancelled, ExportFormat, ExportTrace, export_traces
+
+
+class ExportTaskSignals(QObject):
+    progress = Signal(int)
+    # path of written file and number of rows
+    finished = Signal(str, int)
+    cancelled = Signal()
+    failed = Signal(str)
+
+
+class ExportTask(QRunnable):
+    """ Writes export file off the GUI thread. Traces are a snapshot taken on GUI thread before the task starts. """
+
+    def __init__(self, traces: list[ExportTrace], path: Path, export_format: ExportFormat):
+        super().__init__()
+        self.setAutoDelete(True)
+        self.traces = traces
+        self.path = path
+        self.export_format = export_format
+        self.cancel_requested = threading.Event()
+        self.signals = ExportTaskSignals()
+
+    def cancel(self) -> None:
+        self.cancel_requested.set()
+
+    def run(self):
+        try:
+            num_rows = export_traces(
+                self.traces, self.path, self.export_format,
+                progress=self.signals.progress.emit,
+                is_cancelled=self.cancel_requested.is_set
+            )
+            self.signals.finished.emit(f"{self.path.absolute()}", num_rows)
+        except ExportCancelled:
+            self.signals.cancelled.emit()
+        except Exception as ex:
+            self.signals.failed.emit(f"{ex}")
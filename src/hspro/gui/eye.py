@@ -0,0 +1,233 @@
+"""
+Eye diagram accumulated from acquired frames.
+
+Every sample is folded into two unit intervals (UI) by its time relative to the trigger, so that a data transition
+at the trigger point lands on the edge of the diagram, and counted in a 2D histogram of phase and voltage with
+a single `np.bincount`. Bit period is either given or recovered from the first frame as the common divisor of
+intervals between threshold crossings. Frames are folded on a background thread fed by the acquisition worker.
+"""
+import math
+import threading
+from dataclasses import dataclass
+from queue import Queue, Full
+from typing import Optional
+
+import numpy as np
+
+NUM_UIS = 2
+NUM_PHASE_BINS = 256
+NUM_VOLTAGE_BINS = 256
+
+# frames waiting to be folded; further frames are skipped
+MAX_QUEUED_FRAMES = 16
+
+
+def threshold_crossings(v: np.ndarray, threshold: float) -> np.ndarray:
+    """ Fractional sample indices at which signal crosses threshold, linearly interpolated between samples. """
+    above = v > threshold
+    i = np.flatnonzero(above[1:] != above[:-1])
+    v0 = v[i]
+    v1 = v[i + 1]
+    return i + (threshold - v0) / (v1 - v0)
+
+
+def recover_bit_period(v: np.ndarray, threshold: float, dt_s: float) -> Optional[float]:
+    """
+    Intervals between crossings are whole multiples of the bit period. Shortest intervals give initial estimate,
+    which is then refined over all intervals. Returns None if there are too few crossings.
+    """
+    crossings = threshold_crossings(v, threshold)
+    if crossings.size < 3:
+        return None
+    intervals = np.diff(crossings)
+    estimate = np.percentile(intervals, 10)
+    # long intervals are rounded to a wrong number of bits with a rough estimate, so it is refined a few times
+    for _ in range(4):
+        if estimate <= 0:
+            return None
+        num_bits = np.rint(intervals / estimate)
+        valid = num_bits >= 1
+        estimate = intervals[valid].sum() / num_bits[valid].sum()
+    return float(estimate * dt_s)
+
+
+@dataclass(frozen=True)
+class EyeFrame:
+    v: np.ndarray
+    t_s_0: float
+    dt_s: float
+    dV: float
+    offset_V: float
+    threshold_V: float
+
+
+@dataclass(frozen=True)
+class EyeMeasurement:
+    bit_period_s: float
+    # vertical and horizontal opening at the threshold; nan if eye is not open
+    eye_height_V: float
+    eye_width_s: float
+
+
+class EyeDiagram:
+    """
+    Histogram of sample counts indexed by phase bin (over NUM_UIS unit intervals) and voltage bin. Voltage range is
+    the visible range of the channel. Accumulation restarts whenever channel scale or sample rate change.
+    """
+
+    def __init__(self, bit_period_s: Optional[float] = None):
+        self.lock = threading.Lock()
+        self.histogram = np.zeros((NUM_PHASE_BINS, NUM_VOLTAGE_BINS), dtype=np.uint64)
+        # threshold crossings by phase bin, interpolated between samples, so that fast edges are not missed
+        self.crossings = np.zeros(NUM_PHASE_BINS, dtype=np.uint64)
+        self.requested_bit_period_s = bit_period_s
+        self.bit_period_s: Optional[float] = bit_period_s
+        self.v_min = 0.0
+        self.v_max = 1.0
+        self.threshold_V = 0.0
+        self.num_frames = 0
+        self.num_skipped_frames = 0
+        self.scale: Optional[tuple[float, float, float]] = None
+
+    def reset(self, bit_period_s: Optional[float] = None) -> None:
+        with self.lock:
+            self.requested_bit_period_s = bit_period_s
+            self.bit_period_s = bit_period_s
+            self.histogram[:] = 0
+            self.crossings[:] = 0
+            self.num_frames = 0
+            self.num_skipped_frames = 0
+            self.scale = None
+
+    def fold(self, frame: EyeFrame) -> None:
+        v = np.asarray(frame.v, dtype=np.float64) * frame.dV - frame.offset_V
+        if v.size < 2:
+            return
+
+        with self.lock:
+            scale = (frame.dV, frame.offset_V, frame.dt_s)
+            if scale != self.scale:
+                self.histogram[:] = 0
+                self.crossings[:] = 0
+                self.num_frames = 0
+                self.bit_period_s = self.requested_bit_period_s
+                self.scale = scale
+                self.v_min = -5 * frame.dV - frame.offset_V
+                self.v_max = 5 * frame.dV - frame.offset_V
+            if self.bit_period_s is None:
+                self.bit_period_s = recover_bit_period(v, frame.threshold_V, frame.dt_s)
+                if self.bit_period_s is None:
+                    return
+            if frame.threshold_V != self.threshold_V:
+                # crossings are counted at the threshold, so those of the old one do not apply; samples still do
+                self.crossings[:] = 0
+                self.threshold_V = frame.threshold_V
+            bit_period_s = self.bit_period_s
+            v_min, v_max = self.v_min, self.v_max
+
+        t_s = np.arange(v.size) * frame.dt_s + frame.t_s_0
+        phase = np.mod(t_s / bit_period_s, NUM_UIS)
+        phase_bins = (phase * (NUM_PHASE_BINS / NUM_UIS)).astype(np.int64)
+        voltage_bins = np.floor((v - v_min) * (NUM_VOLTAGE_BINS / (v_max - v_min))).astype(np.int64)
+        visible = (voltage_bins >= 0) & (voltage_bins < NUM_VOLTAGE_BINS) & (phase_bins < NUM_PHASE_BINS)
+        counts = np.bincount(
+            phase_bins[visible] * NUM_VOLTAGE_BINS + voltage_bins[visible],
+            minlength=NUM_PHASE_BINS * NUM_VOLTAGE_BINS
+        )
+        crossing_phase = np.mod(
+            (threshold_crossings(v, frame.threshold_V) * frame.dt_s + frame.t_s_0) / bit_period_s, NUM_UIS
+        )
+        crossing_counts = np.bincount(
+            np.minimum((crossing_phase * (NUM_PHASE_BINS / NUM_UIS)).astype(np.int64), NUM_PHASE_BINS - 1),
+            minlength=NUM_PHASE_BINS
+        )
+
+        with self.lock:
+            # histogram may have been reset while folding
+            if self.scale == scale and self.bit_period_s == bit_period_s:
+                self.histogram += counts.reshape(NUM_PHASE_BINS, NUM_VOLTAGE_BINS).astype(np.uint64)
+                if self.threshold_V == frame.threshold_V:
+                    self.crossings += crossing_counts.astype(np.uint64)
+                self.num_frames += 1
+
+    def snapshot(self) -> tuple[np.ndarray, int, Optional[EyeMeasurement]]:
+        with self.lock:
+            histogram = self.histogram.copy()
+            crossings = self.crossings.copy()
+            num_frames = self.num_frames
+            bit_period_s = self.bit_period_s
+            v_min, v_max, threshold_V = self.v_min, self.v_max, self.threshold_V
+        if bit_period_s is None or num_frames == 0:
+            return histogram, num_frames, None
+        return histogram, num_frames, measure(histogram, crossings, v_min, v_max, threshold_V, bit_period_s)
+
+
+def measure(
+        histogram: np.ndarray,
+        crossings: np.ndarray,
+        v_min: float,
+        v_max: float,
+        threshold_V: float,
+        bit_period_s: float
+) -> EyeMeasurement:
+    """
+    Eye width is the longest run of phase bins without threshold crossings. Eye height is the gap between the lowest
+    sample above and the highest sample below the threshold in the middle of that run.
+    """
+    bins_per_ui = NUM_PHASE_BINS // NUM_UIS
+    v_step = (v_max - v_min) / NUM_VOLTAGE_BINS
+    threshold_bin = int((threshold_V - v_min) / v_step)
+    # all unit intervals folded onto one
+    per_ui = histogram.reshape(NUM_UIS, bins_per_ui, NUM_VOLTAGE_BINS).sum(axis=0)
+    if not 0 <= threshold_bin < NUM_VOLTAGE_BINS:
+        return EyeMeasurement(bit_period_s, math.nan, math.nan)
+
+    crossing = crossings.reshape(NUM_UIS, bins_per_ui).sum(axis=0) > 0
+    if crossing.all() or not crossing.any():
+        return EyeMeasurement(bit_period_s, math.nan, math.nan)
+
+    # longest circular run of bins without crossings, found on two copies of the phase axis
+    open_bins = np.concatenate((~crossing, ~crossing)).astype(np.int8)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], open_bins, [0]))))
+    starts, ends = edges[0::2], edges[1::2]
+    longest = int(np.argmax(ends - starts))
+    run = min(int(ends[longest] - starts[longest]), bins_per_ui)
+    center = (int(starts[longest]) + run // 2) % bins_per_ui
+
+    column = per_ui[center]
+    above = np.flatnonzero(column[threshold_bin + 1:]) + threshold_bin + 1
+    below = np.flatnonzero(column[:threshold_bin])
+    if above.size == 0 or below.size == 0:
+        eye_height_V = math.nan
+    else:
+        eye_height_V = float(above[0] - below[-1] - 1) * v_step
+    return EyeMeasurement(bit_period_s, eye_height_V, run * bit_period_s / bins_per_ui)
+
+
+class EyeDiagramAccumulator:
+    """ Folds frames into the eye diagram on its own thread, so that acquisition worker only queues them. """
+
+    def __init__(self, eye: EyeDiagram):
+        self.eye = eye
+        self.frames: Queue[Optional[EyeFrame]] = Queue(maxsize=MAX_QUEUED_FRAMES)
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, name="eye-diagram", daemon=True)
+        self.thread.start()
+
+    def offer(self, frame: EyeFrame) -> None:
+        try:
+            self.frames.put_nowait(frame)
+        except Full:
+            with self.eye.lock:
+                self.eye.num_skipped_frames += 1
+
+    def stop(self) -> None:
+        self.stopped = True
+        try:
+            self.frames.put_nowait(None)
+        except Full:
+            pass
+
+    def run(self) -> None:
+        while (frame := self.frames.get()) is not None and not self.stopped:
+            self.eye.fold(frame)
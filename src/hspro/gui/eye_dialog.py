@@ -0,0 +1,137 @@
+from typing import Callable, Optional
+
+import numpy as np
+from PySide6.QtCore import QRectF, QTimer
+from PySide6.QtWidgets import QDoubleSpinBox, QLabel, QWidget
+from hspro_api import Waveform
+from pyqtgraph import GraphicsLayoutWidget, ImageItem, colormap
+from pyqtgraph.graphicsItems.PlotItem import PlotItem
+from pytide6 import Dialog, VBoxLayout, HBoxPanel, PushButton, ComboBox, W, set_geometry
+
+from hspro.gui.eye import EyeDiagram, EyeDiagramAccumulator, EyeFrame, NUM_UIS
+from hspro.gui.measurements import si
+
+# interval between refreshes of the displayed histogram
+REFRESH_INTERVAL_MS = 100
+
+
+class EyeDiagramDialog(Dialog):
+    """
+    Shows eye diagram of one channel accumulated over all triggers since it was opened or reset. Acquisition worker
+    only queues each frame; folding happens on the accumulator thread and this dialog periodically shows a snapshot.
+    Threshold and time reference are the trigger level and trigger position.
+    """
+
+    def __init__(self, parent: QWidget, app, on_close: Callable[[], None]):
+        super().__init__(parent, windowTitle="Eye diagram")
+        from hspro.gui.app import App
+        self.app: App = app
+        self.on_close = on_close
+        self.setObjectName("EyeDiagramDialog")
+
+        self.channel = app.selected_channel if app.selected_channel is not None else 0
+        self.eye = EyeDiagram()
+        self.accumulator = EyeDiagramAccumulator(self.eye)
+
+        self.channel_cbox = ComboBox(
+            items=[f"CH{channel + 1}" for channel in app.channels],
+            current_selection=f"CH{self.channel + 1}",
+            min_width=60
+        )
+        self.channel_cbox.currentTextChanged.connect(self.reset)
+
+        self.bit_period_sb = QDoubleSpinBox()
+        self.bit_period_sb.setDecimals(3)
+        self.bit_period_sb.setMinimum(0)
+        self.bit_period_sb.setMaximum(1e9)
+        self.bit_period_sb.setSuffix(" ns")
+        self.bit_period_sb.setSpecialValueText("recover")
+        self.bit_period_sb.setValue(float(app.app_persistence.state.get_value("eye_bit_period_ns", "0")))
+        self.bit_period_sb.editingFinished.connect(self.reset)
+
+        self.stats_label = QLabel()
+
+        self.glw = GraphicsLayoutWidget(self)
+        self.plot: PlotItem = self.glw.addPlot(0, 0)
+        self.plot.setMenuEnabled(False)
+        self.plot.setMouseEnabled(False, False)
+        self.plot.hideButtons()
+        self.plot.setLabel("bottom", "UI")
+        self.plot.setLabel("left", "V")
+        self.image = ImageItem()
+        self.image.setColorMap(colormap.get("inferno"))
+        self.plot.addItem(self.image)
+
+        self.setLayout(VBoxLayout([
+            HBoxPanel([
+                self.channel_cbox, QLabel("Bit period"), self.bit_period_sb,
+                PushButton("Reset", on_clicked=self.reset), W(self.stats_label, stretch=1)
+            ], margins=0),
+            W(self.glw, stretch=1)
+        ]))
+        set_geometry(app_state=app.app_persistence.state, widget=self, screen_dim=app.screen_dim, win_size_fraction=0.4)
+
+        self.reset()
+        self.app.frame_listeners.append(self.on_frame)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start()
+
+    def reset(self):
+        self.channel = self.channel_cbox.currentIndex()
+        bit_period_ns = self.bit_period_sb.value()
+        self.app.app_persistence.state.set_value("eye_bit_period_ns", f"{bit_period_ns}")
+        self.eye.reset(None if bit_period_ns == 0 else bit_period_ns * 1e-9)
+        self.image.clear()
+
+    def on_frame(self, waveforms: tuple[Optional[Waveform], ...]) -> None:
+        """ Called by the worker with each acquired frame. """
+        channel = self.channel
+        wf = waveforms[channel] if channel < len(waveforms) else None
+        if wf is None:
+            return
+        offset_V = self.app.model.channel[channel].offset_V
+        self.accumulator.offer(EyeFrame(
+            v=np.array(wf.vs, dtype=np.float32),
+            t_s_0=-wf.dt_s * wf.trigger_pos,
+            dt_s=wf.dt_s,
+            dV=wf.dV,
+            offset_V=offset_V,
+            threshold_V=wf.dV * 5 * self.app.model.trigger.level - offset_V
+        ))
+
+    def refresh(self):
+        histogram, num_frames, measurement = self.eye.snapshot()
+        if num_frames == 0:
+            self.stats_label.setText("Waiting for frames")
+            return
+        # logarithmic intensity keeps rarely visited bins visible next to the most visited ones
+        self.image.setImage(np.log1p(histogram.astype(np.float32)), autoLevels=True)
+        self.image.setRect(QRectF(0, self.eye.v_min, NUM_UIS, self.eye.v_max - self.eye.v_min))
+        self.plot.setRange(xRange=(0, NUM_UIS), yRange=(self.eye.v_min, self.eye.v_max), padding=0)
+        if measurement is None:
+            self.stats_label.setText(f"{num_frames} frames")
+        else:
+            self.stats_label.setText(
+                f"{num_frames} frames ({self.eye.num_skipped_frames} skipped)   "
+                f"UI = {si(measurement.bit_period_s, 's')}   "
+                f"height = {si(measurement.eye_height_V, 'V')}   width = {si(measurement.eye_width_s, 's')}"
+            )
+
+    def moveEvent(self, event, /):
+        super().moveEvent(event)
+        self.app.app_persistence.state.save_geometry(self.objectName(), self.saveGeometry())
+
+    def resizeEvent(self, arg__1, /):
+        super().resizeEvent(arg__1)
+        self.app.app_persistence.state.save_geometry(self.objectName(), self.saveGeometry())
+
+    def closeEvent(self, arg__1, /):
+        super().closeEvent(arg__1)
+        self.refresh_timer.stop()
+        if self.on_frame in self.app.frame_listeners:
+            self.app.frame_listeners.remove(self.on_frame)
+        self.accumulator.stop()
+        self.on_close()
@@ -0,0 +1,190 @@
+"""
+Per-channel digital filters applied by the GUI to every acquired frame before it is plotted, measured or exported.
+Headless acquisition records frames as they are.
+
+A filter is turned into a convolution kernel once per sample rate (designs are cached) and then applied to each frame
+with a single vectorized convolution, which for long kernels is done through FFT. Moving average and FIR kernels are
+centered on the sample, so that filtered trace stays aligned with the trigger, while single-pole low-pass and
+high-pass filters are causal, same as their analog counterparts. Frame edges are padded with the first and last
+sample, so that filters start and end in steady state instead of ringing.
+"""
+import copy
+from dataclasses import dataclass
+from enum import Enum
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from hspro_api import Waveform
+
+# single-pole filters are truncated where their impulse response drops below this fraction of its peak
+IIR_TRUNCATION = 1e-4
+MAX_KERNEL_LENGTH = 1 << 16
+
+# kernels longer than this are applied through FFT
+DIRECT_CONVOLUTION_MAX_LENGTH = 64
+
+
+class FilterKind(Enum):
+    NONE = "None"
+    MOVING_AVERAGE = "Moving average"
+    LOW_PASS = "Low-pass"
+    HIGH_PASS = "High-pass"
+    FIR = "FIR"
+
+    @staticmethod
+    def value_of(value: str) -> "FilterKind":
+        for kind in FilterKind:
+            if kind.value == value:
+                return kind
+        raise ValueError(f"Unknown filter {value}")
+
+
+@dataclass(frozen=True)
+class ChannelFilter:
+    kind: FilterKind = FilterKind.NONE
+    # number of averaged samples for moving average
+    length: int = 8
+    # -3 dB frequency of single-pole filters
+    cutoff_hz: float = 1e6
+    # FIR coefficients, as loaded from file, and name of that file
+    fir_coefficients: tuple[float, ...] = ()
+    fir_file: str = ""
+
+    @classmethod
+    def value_of(cls, json_data) -> "ChannelFilter":
+        return ChannelFilter(
+            kind=FilterKind.value_of(json_data["kind"]),
+            length=json_data["length"],
+            cutoff_hz=json_data["cutoff_hz"],
+            fir_coefficients=tuple(json_data["fir_coefficients"]),
+            fir_file=json_data["fir_file"],
+        )
+
+    def to_json(self) -> dict:
+        return {
+            "kind": self.kind.value,
+            "length": self.length,
+            "cutoff_hz": self.cutoff_hz,
+            "fir_coefficients": list(self.fir_coefficients),
+            "fir_file": self.fir_file,
+        }
+
+
+def load_fir_coefficients(path: Path) -> tuple[float, ...]:
+    """
+    Reads coefficients separated by whitespace or commas; lines starting with `#` are comments. Raises ValueError if
+    file has no coefficients or cannot be parsed.
+    """
+    lines = [line.split("#", 1)[0] for line in path.read_text().splitlines()]
+    try:
+        coefficients = tuple(float(c) for c in " ".join(lines).replace(",", " ").split())
+    except ValueError as ex:
+        raise ValueError(f"Invalid FIR coefficient in {path.name}: {ex}")
+    if coefficients == ():
+        raise ValueError(f"No FIR coefficients found in {path.name}")
+    if len(coefficients) > MAX_KERNEL_LENGTH:
+        raise ValueError(f"FIR filter may have at most {MAX_KERNEL_LENGTH} coefficients")
+    return coefficients
+
+
+class FilterDesign:
+    """ Convolution kernel and its delay in samples; output sample `i` is centered on input sample `i - delay`. """
+
+    def __init__(self, kernel: np.ndarray, delay: int):
+        self.kernel = kernel
+        self.delay = delay
+        self.__kernel_spectrum: tuple[int, Optional[np.ndarray]] = (0, None)
+
+    def kernel_spectrum(self, n_fft: int) -> np.ndarray:
+        # frames have the same length as long as acquisition settings do not change
+        if self.__kernel_spectrum[0] != n_fft:
+            self.__kernel_spectrum = (n_fft, np.fft.rfft(self.kernel, n_fft))
+        return self.__kernel_spectrum[1]
+
+    def apply(self, vs) -> np.ndarray:
+        x = np.asarray(vs, dtype=np.float64)
+        n = x.size
+        length = self.kernel.size
+        if n == 0 or length == 1 and self.kernel[0] == 1:
+            return x
+        pad_before = length - 1 - self.delay
+        padded = np.concatenate((np.full(pad_before, x[0]), x, np.full(self.delay, x[-1])))
+        if length <= DIRECT_CONVOLUTION_MAX_LENGTH:
+            return np.convolve(padded, self.kernel, mode="valid")
+        n_fft = 1 << (padded.size + length - 2).bit_length()
+        y = np.fft.irfft(np.fft.rfft(padded, n_fft) * self.kernel_spectrum(n_fft), n_fft)
+        return y[length - 1:length - 1 + n]
+
+
+@lru_cache(maxsize=32)
+def design_filter(channel_filter: ChannelFilter, dt_s: float) -> FilterDesign:
+    match channel_filter.kind:
+        case FilterKind.MOVING_AVERAGE:
+            length = max(channel_filter.length, 1)
+            return FilterDesign(np.full(length, 1 / length), (length - 1) // 2)
+
+        case FilterKind.LOW_PASS | FilterKind.HIGH_PASS:
+            # y[i] = y[i - 1] + alpha * (x[i] - y[i - 1]) has impulse response alpha * (1 - alpha) ** k
+            alpha = -np.expm1(-2 * np.pi * channel_filter.cutoff_hz * dt_s)
+            if alpha >= 1:
+                length = 1
+            else:
+                length = min(int(np.ceil(np.log(IIR_TRUNCATION) / np.log1p(-alpha))) + 1, MAX_KERNEL_LENGTH)
+            kernel = alpha * (1 - alpha) ** np.arange(length)
+            kernel /= kernel.sum()
+            if channel_filter.kind == FilterKind.HIGH_PASS:
+                # complement of the low-pass, which is the single-pole high-pass with the same cutoff
+                kernel = -kernel
+                kernel[0] += 1
+            return FilterDesign(kernel, 0)
+
+        case FilterKind.FIR if channel_filter.fir_coefficients != ():
+            # linear phase FIR filters delay signal by half of their length
+            kernel = np.array(channel_filter.fir_coefficients, dtype=np.float64)
+            return FilterDesign(kernel, (kernel.size - 1) // 2)
+
+        case _:
+            return FilterDesign(np.ones(1), 0)
+
+
+class FilterStage:
+    """
+    Filters of all channels. Filter of a channel can be replaced from any thread at any time; replacing it only
+    swaps an element of a list, which is picked up with the next frame. Acquired waveforms are never modified:
+    filtered frame consists of copies of them with new arrays of samples.
+    """
+
+    def __init__(self, filters: list[ChannelFilter]):
+        self.filters = filters
+        # last frame as acquired and as filtered
+        self.raw_waveforms: tuple[Optional[Waveform], ...] = ()
+        self.filtered_waveforms: tuple[Optional[Waveform], ...] = ()
+
+    def set_filter(self, channel: int, channel_filter: ChannelFilter) -> None:
+        self.filters[channel] = channel_filter
+
+    def apply(self, waveforms: tuple[Optional[Waveform], ...]) -> tuple[Optional[Waveform], ...]:
+        """ Returns filtered frame, keeping the acquired one for `reapply()`. """
+        self.raw_waveforms = waveforms
+        self.filtered_waveforms = tuple(self.__filter(channel, wf) for channel, wf in enumerate(waveforms))
+        return self.filtered_waveforms
+
+    def reapply(self, waveforms: tuple[Optional[Waveform], ...]) -> Optional[tuple[Optional[Waveform], ...]]:
+        """
+        Filters the last acquired frame again, e.g. after filter was changed, if `waveforms` are the frame returned
+        by the last `apply()`. Returns None for any other frame, e.g. one shown from a scene checkpoint.
+        """
+        if waveforms is not self.filtered_waveforms:
+            return None
+        return self.apply(self.raw_waveforms)
+
+    def __filter(self, channel: int, wf: Optional[Waveform]) -> Optional[Waveform]:
+        if wf is None:
+            return None
+        filtered = copy.copy(wf)
+        channel_filter = self.filters[channel]
+        if channel_filter.kind != FilterKind.NONE:
+            filtered.vs = design_filter(channel_filter, wf.dt_s).apply(wf.vs)
+        return filtered
@@ -0,0 +1,105 @@
+from dataclasses import replace
+from pathlib import Path
+
+from PySide6.QtWidgets import QDoubleSpinBox, QFileDialog, QLabel, QMessageBox, QSpinBox
+from pytide6 import Dialog, VBoxLayout, PushButton, HBoxPanel, W, ComboBox
+
+from hspro.gui.app import App
+from hspro.gui.filters import ChannelFilter, FilterKind, load_fir_coefficients
+
+
+class ChannelFilterPanel(HBoxPanel):
+    def __init__(self, app: App, channel: int):
+        super().__init__(margins=0)
+        self.app = app
+        self.channel_filter: ChannelFilter = app.get_channel_filter(channel)
+
+        self.kind_cbox = ComboBox(
+            items=[kind.value for kind in FilterKind],
+            current_selection=self.channel_filter.kind.value,
+            min_width=120
+        )
+
+        self.length_sb = QSpinBox()
+        self.length_sb.setMinimum(1)
+        self.length_sb.setMaximum(4096)
+        self.length_sb.setValue(self.channel_filter.length)
+        self.length_sb.setSuffix(" samples")
+
+        self.cutoff_sb = QDoubleSpinBox()
+        self.cutoff_sb.setDecimals(3)
+        self.cutoff_sb.setMinimum(0.001)
+        self.cutoff_sb.setMaximum(2e6)
+        self.cutoff_sb.setValue(self.channel_filter.cutoff_hz / 1e3)
+        self.cutoff_sb.setSuffix(" kHz")
+
+        self.fir_label = QLabel(
+            "no FIR file" if self.channel_filter.fir_coefficients == ()
+            else f"{self.channel_filter.fir_file} ({len(self.channel_filter.fir_coefficients)} taps)"
+        )
+        self.fir_button = PushButton("Load FIR", on_clicked=self.load_fir)
+
+        self.kind_cbox.currentTextChanged.connect(self.update_enabled)
+        self.update_enabled()
+
+        label = QLabel(f"CH{channel + 1}")
+        label.setStyleSheet(f"color: {app.model.channel[channel].color}")
+        for widget in [label, self.kind_cbox, self.length_sb, self.cutoff_sb, self.fir_button, self.fir_label]:
+            self.layout().addWidget(widget)
+
+    def update_enabled(self):
+        kind = FilterKind.value_of(self.kind_cbox.currentText())
+        self.length_sb.setEnabled(kind == FilterKind.MOVING_AVERAGE)
+        self.cutoff_sb.setEnabled(kind in [FilterKind.LOW_PASS, FilterKind.HIGH_PASS])
+        self.fir_button.setEnabled(kind == FilterKind.FIR)
+
+    def load_fir(self):
+        last_used_dir = self.app.app_persistence.state.get_value("last_dir_fir", f"{Path.home().absolute()}")
+        file, _ = QFileDialog.getOpenFileName(self, "Load FIR coefficients", dir=last_used_dir, filter="*.txt *.csv;;*")
+        if file == "":
+            return
+        path = Path(file)
+        self.app.app_persistence.state.set_value("last_dir_fir", f"{path.parent.absolute()}")
+        try:
+            coefficients = load_fir_coefficients(path)
+        except (OSError, ValueError) as ex:
+            QMessageBox.critical(self, "Error", f"{ex}")
+            return
+        self.channel_filter = replace(self.channel_filter, fir_coefficients=coefficients, fir_file=path.name)
+        self.fir_label.setText(f"{path.name} ({len(coefficients)} taps)")
+
+    def get_filter(self) -> ChannelFilter:
+        return replace(
+            self.channel_filter,
+            kind=FilterKind.value_of(self.kind_cbox.currentText()),
+            length=self.length_sb.value(),
+            cutoff_hz=self.cutoff_sb.value() * 1e3
+        )
+
+
+class FiltersDialog(Dialog):
+    def __init__(self, parent, app: App):
+        super().__init__(parent, windowTitle="Channel filters", modal=True)
+
+        panels = [ChannelFilterPanel(app, channel) for channel in app.channels]
+
+        def on_ok():
+            for channel, panel in enumerate(panels):
+                channel_filter = panel.get_filter()
+                if channel_filter.kind == FilterKind.FIR and channel_filter.fir_coefficients == ():
+                    QMessageBox.critical(self, "Error", f"Load FIR coefficients for CH{channel + 1}")
+                    return
+            for channel, panel in enumerate(panels):
+                channel_filter = panel.get_filter()
+                if channel_filter != app.get_channel_filter(channel):
+                    app.do_set_channel_filter(channel, channel_filter)
+            self.close()
+
+        self.setLayout(VBoxLayout([
+            *panels,
+            HBoxPanel([
+                W(HBoxPanel(), stretch=1),
+                PushButton("Ok", on_clicked=on_ok),
+                PushButton("Cancel", on_clicked=self.close)
+            ])
+        ]))
@@ -0,0 +1,16 @@
+from pathlib import Path
+
+ICONS_DIR = Path(__file__).parent.parent / "icons"
+
+
+class SvgIcon:
+    """ Class attribute holding content of svg icon file, which is read on first access and then kept. """
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self.__content: bytes | None = None
+
+    def __get__(self, instance, owner) -> bytes:
+        if self.__content is None:
+            self.__content = (ICONS_DIR / self.file_name).read_bytes()
+        return self.__content
@@ -2,17 +2,23 @@ import sys
 from pathlib import Path
 from queue import ShutDown
 
-from PySide6.QtCore import QSize
-from PySide6.QtGui import QIcon
-from PySide6.QtWidgets import QApplication, QMessageBox
-from sprats.config import AppPersistence
-
-from hspro.gui.app import App, WorkerMessage
-from hspro.gui.main_window import HSProMainWindow
-from hspro.gui.model import ChannelCouplingModel, ChannelImpedanceModel
+from hspro.gui.startup_profiler import mk_startup_profiler
 
 
 def main():
+    profiler = mk_startup_profiler()
+
+    # imported here rather than at the top of the module, so that startup profiler can account for them
+    from PySide6.QtCore import QSize
+    from PySide6.QtGui import QIcon
+    from PySide6.QtWidgets import QApplication, QMessageBox
+
+    from hspro.gui.app import App, WorkerMessage
+    from hspro.gui.default_config import mk_app_persistence
+    from hspro.gui.main_window import HSProMainWindow
+    from hspro.gui.metrics import MetricsServer, metrics_port_from_env
+
+    profiler.mark("modules imported")
     app = QApplication(sys.argv)
     tt_png = Path(__file__).parent / "tt.png"
     app.setWindowIcon(QIcon(f"{tt_png.absolute()}"))
@@ -21,65 +27,21 @@ def main():
     screen_dim: QSize = app.primaryScreen().size()
     screen_width, screen_height = screen_dim.width(), screen_dim.height()
 
-    persistence = AppPersistence(
-        app_name="hspro",
-        override_config_if_different_version=True,
-        init_config_data={
-            "config_version": 14,
-            "plot_color_scheme": "dark",
-            "show_trigger_level_line": False,
-            "show_trigger_position_line": False,
-            "show_grid": True,
-            "show_y_axis_labels": True,
-            "show_zero_line": True,
-            "general": {
-                "highres": True,
-                "mem_depth": 100,
-                "delay": 0,
-                "f_delay": 0,
-                "visual_time_scale": "1 us"
-            },
-            "trigger": {
-                "on_channel": 0,
-                "trigger_type": "Rising Edge",
-                "tot": 2,
-                "delta": 2,
-                "level": 0.0,
-                "position": 0.5,
-                "auto_frequency": "5 Hz"
-            },
-            "channels": {
-                "0": {
-                    "active": True,
-                    "color": "#ffee2e",
-                    "offset_V": 0.0,
-                    "dV": 0.2,
-                    "coupling": ChannelCouplingModel.DC.value,
-                    "impedance": ChannelImpedanceModel.FIFTY_OHM.value,
-                    "ten_x_probe": False,
-                    "five_x_attenuation": False
-                },
-                "1": {
-                    "active": False,
-                    "color": "#40cc1a",
-                    "offset_V": 0.0,
-                    "dV": 0.2,
-                    "coupling": ChannelCouplingModel.DC.value,
-                    "impedance": ChannelImpedanceModel.FIFTY_OHM.value,
-                    "ten_x_probe": False,
-                    "five_x_attenuation": False
-                }
-            }
-        }
-    )
+    persistence = mk_app_persistence()
 
     application = App((screen_width, screen_height))
+    if (metrics_port := metrics_port_from_env()) is not None:
+        MetricsServer(metrics_port)
     try:
         win = HSProMainWindow(screen_dim=(screen_width, screen_height), app_persistence=persistence, app=application)
+        profiler.mark("main window constructed")
+        profiler.mark_first_paint(win)
         win.show()
         win.activateWindow()
         win.raise_()
-        sys.exit(app.exec())
+        exit_code = app.exec()
+        persistence.close()
+        sys.exit(exit_code)
     except Exception as ex:
         if not isinstance(ex, ShutDown):
             QMessageBox.critical(None, "Error", f"Error: {ex}")
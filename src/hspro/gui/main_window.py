@@ -1,13 +1,15 @@
+from queue import ShutDown
+
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QPalette
-from PySide6.QtWidgets import QScrollArea, QMessageBox, QProgressDialog, QProgressBar
-from hspro_api.board import mk_board
+from PySide6.QtWidgets import QScrollArea, QMessageBox
+from hspro_api.board import Board
 from hspro_api.conn.connection import Connection
 from pytide6 import MainWindow, set_geometry, VBoxPanel, W, HBoxPanel, Label
 from pytide6.palette import Palette
-from sprats.config import AppPersistence
 
 from hspro.gui.app import App, WorkerMessage
+from hspro.gui.board_connector import BoardConnector
 from hspro.gui.menus.menu_bar import MainMenuBar
 from hspro.gui.model import BoardModel, TriggerTypeModel
 from hspro.gui.panels.channels_panel import ChannelsPanel
@@ -15,13 +17,15 @@ from hspro.gui.panels.general_opts_panel import GeneralOptionsPanel
 from hspro.gui.panels.info_panel import InfoPanel
 from hspro.gui.panels.plots_panel import PlotsPanel
 from hspro.gui.panels.trigger_panel import TriggerPanel
+from hspro.gui.persistence import WriteBehindPersistence
 from hspro.gui.toolbar import MainToolBar
+from hspro.gui.auto_reconnect import load_fingerprint
 
 
 class HSProMainWindow(MainWindow):
     request_exit = Signal()
 
-    def __init__(self, screen_dim: tuple[int, int], app_persistence: AppPersistence, app: App):
+    def __init__(self, screen_dim: tuple[int, int], app_persistence: WriteBehindPersistence, app: App):
         super().__init__(objectName="MainWindow", windowTitle="Haasoscope Pro GUI")
 
         self.request_exit.connect(self.close)
@@ -35,6 +39,13 @@ class HSProMainWindow(MainWindow):
         self.app.main_window = lambda: self
         self.app.exit_application = lambda: self.app.worker.messages.put(WorkerMessage.Quit())
 
+        # Reconnecting to the board initialized last time: start its initialization right away, so that
+        # it overlaps with construction of the window. Otherwise board is looked for once window is ready.
+        self.board_connector: BoardConnector | None = None
+        self.last_board = load_fingerprint(app_persistence.state)
+        if self.last_board is not None:
+            self.connect_to_board(preferred_board_id=self.last_board.board_id)
+
         set_geometry(app_state=app_persistence.state, widget=self, screen_dim=screen_dim, win_size_fraction=0.7)
 
         self.menu_bar = self.setMenuBar(MainMenuBar(self.app))
@@ -74,8 +85,6 @@ class HSProMainWindow(MainWindow):
         )
 
         self.app.init()
-        self.connect_to_board()
-        self.app.model.init_board_from_model()
         self.app.worker.messages.put(
             WorkerMessage.ArmAuto(self.app.model.trigger.trigger_type.to_trigger_type(), drain_queue=False)
         )
@@ -96,6 +105,12 @@ class HSProMainWindow(MainWindow):
         else:
             self.app.update_trigger_on_channel_label(self.app.model.trigger.on_channel)
 
+        # window stays usable in demo mode until the board is initialized in the background
+        if self.last_board is None:
+            self.connect_to_board()
+        else:
+            self.app.set_connection_status_label(f"Connecting to #{self.last_board.board_id}")
+
     def color_scheme(self, color_scheme: str):
         self.glw.set_plot_color_scheme(color_scheme)
         match color_scheme:
@@ -124,65 +139,60 @@ class HSProMainWindow(MainWindow):
     def closeEvent(self, event):
         if self.app.zoom_dialog is not None:
             self.app.zoom_dialog.close()
+        if self.app.eye_diagram_dialog is not None:
+            self.app.eye_diagram_dialog.close()
+        if self.app.waterfall_dialog is not None:
+            self.app.waterfall_dialog.close()
         if self.close_event_msg_out:
             self.app.worker.messages.put(WorkerMessage.Quit())
             event.ignore()
         else:
             event.accept()
+            if self.app.remote_control_server is not None:
+                self.app.remote_control_server.stop()
+            self.app.app_persistence.close()
             exit(1)
 
-    def connect_to_board(self):
+    def connect_to_board(self, connection: Connection | None = None, preferred_board_id: int | None = None):
+        self.board_connector = BoardConnector(connection, preferred_board_id)
+        self.board_connector.signals.progress.connect(self.show_board_init_progress)
+        self.board_connector.signals.no_boards_found.connect(self.no_boards_found)
+        self.board_connector.signals.multiple_boards_found.connect(self.select_board_to_connect_to)
+        self.board_connector.signals.board_ready.connect(self.link_board)
+        self.board_connector.signals.failed.connect(self.board_connection_failed)
+        self.app.set_connection_status_label("Connecting")
+        self.app.board_thread_pool.start(self.board_connector)
+
+    def show_board_init_progress(self, step: int):
+        self.app.set_board_init_progress(step)
+
+    def no_boards_found(self):
+        self.app.set_connection_status_label("Demo mode")
+        res = QMessageBox.question(None, "Start in demo mode?", "No HaasoscopePro found. Start in \"demo\" mode?")
+        if res != QMessageBox.StandardButton.Yes:
+            self.app.worker.messages.put(WorkerMessage.Quit())
+
+    def select_board_to_connect_to(self, connections: list[Connection]):
         from hspro.gui.board_selector_dialog import BoardSelectorDialog
-        from hspro_api.conn.connection_op import connect as raw_connect
-
-        connections = raw_connect(debug=False)
-        num_connections = len(connections)
-        if num_connections == 0:
-            res = QMessageBox.question(None, "Start in demo mode?", "No HaasoscopePro found. Start in \"demo\" mode?")
-            if res != QMessageBox.StandardButton.Yes:
-                self.app.worker.messages.put(WorkerMessage.Quit())
-
-        elif num_connections == 1:
-            self.connect_to_selected_board(connections[0])
-
-        elif num_connections > 1:
-            # ask user to select one
-            board_selector_dialog = BoardSelectorDialog(self, connections)
-            board_selector_dialog.exec_()
-            if board_selector_dialog.selected_connection is None:
-                self.app.worker.messages.put(WorkerMessage.Quit())
-            else:
-                self.connect_to_selected_board(board_selector_dialog.selected_connection)
-
-    def connect_to_selected_board(self, connection: Connection):
-        progress = QProgressDialog("Initializing oscilloscope", "Abort", 0, 0, None)
-        progress.setWindowTitle("Initializing oscilloscope")
-        progress_bar_max_value = 34
-        bar = QProgressBar(progress)
-        bar.setTextVisible(False)
-        bar.setMaximum(0)
-        bar.setMaximum(progress_bar_max_value)
-        progress.setBar(bar)
-        progress.setMinimumDuration(0)
-        progress.setWindowModality(Qt.WindowModality.WindowModal)
-        progress.setValue(0)
-
-        def close_app():
-            if progress.wasCanceled():
-                self.app.worker.messages.put(WorkerMessage.Quit())
-
-        progress.canceled.connect(close_app)
-
-        self.app.model.link_to_live_board(
-            mk_board(
-                connection, debug=False, debug_spi=False, show_board_call_trace=False,
-                progress_callback=lambda i: progress.setValue(i),
-                wrap_progress_counter_at=progress_bar_max_value
-            )
-        )
-        self.app.set_connection_status_label("Connected")
-        progress.wasCanceled = lambda: False
-        progress.close()
+
+        board_selector_dialog = BoardSelectorDialog(self, connections)
+        board_selector_dialog.exec_()
+        if board_selector_dialog.selected_connection is None:
+            self.app.worker.messages.put(WorkerMessage.Quit())
+        else:
+            self.connect_to_board(board_selector_dialog.selected_connection)
+
+    def link_board(self, board: Board, board_id: int):
+        try:
+            self.app.worker.messages.put(WorkerMessage.LinkBoard(board, board_id))
+        except ShutDown:
+            # application is already shutting down
+            board.cleanup()
+
+    def board_connection_failed(self, error: str):
+        self.app.set_board_init_progress(None)
+        self.app.set_connection_status_label("Not connected")
+        QMessageBox.critical(self, "Error", f"Failed to initialize oscilloscope: {error}")
 
     def close(self, /):
         self.close_event_msg_out = False
@@ -0,0 +1,132 @@
+"""
+Mask (pass/fail) testing.
+
+Mask is a set of polygons in screen coordinates: horizontal divisions from the left edge of the plot (0 to 10) and
+vertical divisions (-5 to 5). It is rasterized once into a boolean lookup table with one cell per screen column and
+row. Frame fails if any sample falls into a masked cell. Index of the lookup table cell of every sample time is
+computed once for given frame length, sample period and screen time window and reused while these stay the same,
+so that checking a frame costs one vectorized arithmetic operation on samples and one fancy-indexing lookup.
+"""
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+NUM_COLUMNS = 1000
+NUM_ROWS = 400
+
+Polygon = list[tuple[float, float]]
+
+
+def rasterize(polygons: list[Polygon], num_columns: int = NUM_COLUMNS, num_rows: int = NUM_ROWS) -> np.ndarray:
+    """ Cells with centers inside of any polygon (even-odd rule); indexed as `[column, row]`, row 0 at -5 div. """
+    x = (np.arange(num_columns) + 0.5) * (10 / num_columns)
+    y = (np.arange(num_rows) + 0.5) * (10 / num_rows) - 5
+    xs, ys = np.meshgrid(x, y, indexing="ij")
+    lut = np.zeros((num_columns, num_rows), dtype=bool)
+    for polygon in polygons:
+        if len(polygon) < 3:
+            continue
+        inside = np.zeros_like(lut)
+        vertices = np.asarray(polygon, dtype=np.float64)
+        for (x0, y0), (x1, y1) in zip(vertices, np.roll(vertices, -1, axis=0)):
+            if y0 == y1:
+                continue
+            crosses = (y0 > ys) != (y1 > ys)
+            x_cross = x0 + (ys - y0) * (x1 - x0) / (y1 - y0)
+            inside ^= crosses & (xs < x_cross)
+        lut |= inside
+    return lut
+
+
+def load_mask(path: Path) -> list[Polygon]:
+    """ JSON file with `polygons`, a list of polygons, each being a list of `[x, y]` vertices in divisions. """
+    json_data = json.loads(path.read_text())
+    polygons = [[(float(x), float(y)) for x, y in polygon] for polygon in json_data["polygons"]]
+    if any(len(polygon) < 3 for polygon in polygons):
+        raise ValueError("Each mask polygon needs at least three vertices")
+    return polygons
+
+
+def save_mask(path: Path, polygons: list[Polygon]) -> None:
+    path.write_text(json.dumps({"polygons": [[list(vertex) for vertex in polygon] for polygon in polygons]}, indent=2))
+
+
+@dataclass(frozen=True)
+class MaskCounts:
+    passed: int
+    failed: int
+
+
+class MaskTester:
+    """
+    Checks frames against the mask. `check()` is called by the acquisition worker for every frame, while mask and
+    screen window are changed from GUI thread, hence the lock around swapping them.
+    """
+
+    def __init__(self, polygons: list[Polygon]):
+        self.lock = threading.Lock()
+        self.polygons: list[Polygon] = []
+        self.lut = np.zeros(NUM_COLUMNS * NUM_ROWS, dtype=bool)
+        self.t_window_s = (0.0, 1.0)
+        self.passed = 0
+        self.failed = 0
+        # (n, dt_s, t_s_0, t_window_s) -> offsets of LUT cells of samples in lowest row and mask of samples on screen
+        self.column_cache: tuple[tuple, np.ndarray, np.ndarray] | None = None
+        self.set_polygons(polygons)
+
+    def set_polygons(self, polygons: list[Polygon]) -> None:
+        lut = rasterize(polygons).reshape(-1)
+        with self.lock:
+            self.polygons = polygons
+            self.lut = lut
+
+    def set_time_window(self, t_min_s: float, t_max_s: float) -> None:
+        with self.lock:
+            self.t_window_s = (t_min_s, t_max_s)
+
+    def reset_counts(self) -> None:
+        with self.lock:
+            self.passed = 0
+            self.failed = 0
+
+    def counts(self) -> MaskCounts:
+        with self.lock:
+            return MaskCounts(self.passed, self.failed)
+
+    def columns(
+            self, n: int, dt_s: float, t_s_0: float, t_window_s: tuple[float, float]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        key = (n, dt_s, t_s_0, t_window_s)
+        if self.column_cache is None or self.column_cache[0] != key:
+            t_min_s, t_max_s = t_window_s
+            t_s = np.arange(n) * dt_s + t_s_0
+            columns = np.floor((t_s - t_min_s) * (NUM_COLUMNS / (t_max_s - t_min_s))).astype(np.int64)
+            on_screen = (columns >= 0) & (columns < NUM_COLUMNS)
+            self.column_cache = (key, columns[on_screen] * NUM_ROWS, on_screen)
+        return self.column_cache[1], self.column_cache[2]
+
+    def check_samples(self, vs, dt_s: float, t_s_0: float) -> bool:
+        """ Returns True if samples given in vertical divisions do not touch the mask. """
+        with self.lock:
+            lut = self.lut
+            t_window_s = self.t_window_s
+        v = np.asarray(vs)
+        column_offsets, on_screen = self.columns(v.size, dt_s, t_s_0, t_window_s)
+        rows = ((v[on_screen] + 5) * (NUM_ROWS / 10)).astype(np.int64)
+        np.clip(rows, 0, NUM_ROWS - 1, out=rows)
+        return not lut[column_offsets + rows].any()
+
+    def check(self, waveforms: tuple) -> bool:
+        """ Checks all channels of a frame and counts it; returns True if frame passed. """
+        passed = all(
+            self.check_samples(wf.vs, wf.dt_s, -wf.dt_s * wf.trigger_pos) for wf in waveforms if wf is not None
+        )
+        with self.lock:
+            if passed:
+                self.passed += 1
+            else:
+                self.failed += 1
+        return passed
@@ -0,0 +1,260 @@
+"""
+Virtual channels computed from the physical ones.
+
+Expression is parsed once into a tree of NumPy operations. Every operation writes into its own buffer that is
+allocated on the first frame and reused for all later frames of the same length, so that evaluating an expression
+costs a few vectorized calls per frame and no per-sample Python code. Channels are referred to as `A` (or `CH1`) and
+`B` (or `CH2`) and are in volts. Supported are `+ - * / **`, numeric constants and functions `abs`, `sqrt`, `exp`,
+`log`, `sin`, `cos`, `diff` (derivative over time) and `integ` (running integral over time).
+"""
+import ast
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, fields
+from typing import Optional
+
+import numpy as np
+
+MATH_CHANNEL_NAMES = ["M1", "M2"]
+MATH_CHANNEL_COLORS = ["#ff00ff", "#00c0c0"]
+
+INPUT_NAMES = {"A": 0, "CH1": 0, "B": 1, "CH2": 1}
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+@dataclass
+class MathChannelDefinition:
+    name: str
+    expression: str
+    # volts per vertical division used to display the channel
+    dV: float
+    enabled: bool
+    color: str
+
+    @classmethod
+    def value_of(cls, json_data) -> "MathChannelDefinition":
+        return MathChannelDefinition(
+            name=json_data["name"],
+            expression=json_data["expression"],
+            dV=json_data["dV"],
+            enabled=json_data["enabled"],
+            color=json_data["color"],
+        )
+
+    def to_json(self) -> dict:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+def default_math_channels() -> list[MathChannelDefinition]:
+    return [
+        MathChannelDefinition(name, expression, 1.0, False, color)
+        for name, expression, color in zip(MATH_CHANNEL_NAMES, ["A - B", "A * B"], MATH_CHANNEL_COLORS)
+    ]
+
+
+class _Node(ABC):
+    """ Evaluates to an array (or a float for constant sub-expressions) of `n` samples. """
+
+    def __init__(self):
+        self.buffer = np.empty(0, dtype=np.float64)
+
+    def out(self, n: int) -> np.ndarray:
+        if self.buffer.size != n:
+            self.buffer = np.empty(n, dtype=np.float64)
+        return self.buffer
+
+    @abstractmethod
+    def eval(self, inputs: list[np.ndarray], n: int, dt_s: float) -> np.ndarray | float:
+        pass
+
+
+class _Constant(_Node):
+    def __init__(self, value: float):
+        super().__init__()
+        self.value = value
+
+    def eval(self, inputs, n, dt_s):
+        return self.value
+
+
+class _Input(_Node):
+    def __init__(self, channel: int):
+        super().__init__()
+        self.channel = channel
+
+    def eval(self, inputs, n, dt_s):
+        return inputs[self.channel][:n]
+
+
+class _Ufunc(_Node):
+    def __init__(self, ufunc: np.ufunc, args: list[_Node]):
+        super().__init__()
+        self.ufunc = ufunc
+        self.args = args
+
+    def eval(self, inputs, n, dt_s):
+        values = [arg.eval(inputs, n, dt_s) for arg in self.args]
+        if all(isinstance(value, float) for value in values):
+            return float(self.ufunc(*values))
+        return self.ufunc(*values, out=self.out(n))
+
+
+class _Derivative(_Node):
+    def __init__(self, arg: _Node):
+        super().__init__()
+        self.arg = arg
+
+    def eval(self, inputs, n, dt_s):
+        x = self.arg.eval(inputs, n, dt_s)
+        if isinstance(x, float):
+            return 0.0
+        out = self.out(n)
+        if n > 1:
+            np.subtract(x[1:], x[:-1], out=out[1:])
+            out[0] = out[1]
+            out /= dt_s
+        else:
+            out[:] = 0
+        return out
+
+
+class _Integral(_Node):
+    def __init__(self, arg: _Node):
+        super().__init__()
+        self.arg = arg
+        # 1, 2, ..., n for integral of a constant, kept as long as frame length does not change
+        self.ramp = np.empty(0, dtype=np.float64)
+
+    def eval(self, inputs, n, dt_s):
+        x = self.arg.eval(inputs, n, dt_s)
+        out = self.out(n)
+        if isinstance(x, float):
+            if self.ramp.size != n:
+                self.ramp = np.arange(1, n + 1, dtype=np.float64)
+            np.multiply(self.ramp, x * dt_s, out=out)
+        else:
+            np.cumsum(x, out=out)
+            out *= dt_s
+        return out
+
+
+_BINARY_OPS = {
+    ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide, ast.Pow: np.power
+}
+
+_FUNCTIONS = {
+    "abs": np.absolute, "sqrt": np.sqrt, "exp": np.exp, "log": np.log, "sin": np.sin, "cos": np.cos
+}
+
+
+def _compile_node(node: ast.AST) -> _Node:
+    match node:
+        case ast.Constant(value) if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return _Constant(float(value))
+        case ast.Name(name) if name.upper() in INPUT_NAMES:
+            return _Input(INPUT_NAMES[name.upper()])
+        case ast.Name(name):
+            raise ExpressionError(f"Unknown channel {name}; use A or B")
+        case ast.BinOp(left, op, right) if type(op) in _BINARY_OPS:
+            return _Ufunc(_BINARY_OPS[type(op)], [_compile_node(left), _compile_node(right)])
+        case ast.UnaryOp(ast.USub(), operand):
+            return _Ufunc(np.negative, [_compile_node(operand)])
+        case ast.UnaryOp(ast.UAdd(), operand):
+            return _compile_node(operand)
+        case ast.Call(ast.Name(name), [arg], []) if name in _FUNCTIONS:
+            return _Ufunc(_FUNCTIONS[name], [_compile_node(arg)])
+        case ast.Call(ast.Name("diff"), [arg], []):
+            return _Derivative(_compile_node(arg))
+        case ast.Call(ast.Name("integ"), [arg], []):
+            return _Integral(_compile_node(arg))
+        case ast.Call():
+            raise ExpressionError("Unsupported function call")
+        case _:
+            raise ExpressionError(f"Unsupported syntax {ast.unparse(node)}")
+
+
+class CompiledExpression:
+    def __init__(self, expression: str):
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+        except SyntaxError as ex:
+            raise ExpressionError(f"Invalid expression: {ex.msg}")
+        self.root = _compile_node(tree.body)
+        self.uses = sorted({node.channel for node in _walk(self.root) if isinstance(node, _Input)})
+
+    def evaluate(self, inputs: list[Optional[np.ndarray]], dt_s: float) -> Optional[np.ndarray]:
+        """
+        Returns result in a buffer owned by the expression that is overwritten by the next call or None if
+        a channel used by expression is not available.
+        """
+        if any(inputs[channel] is None for channel in self.uses):
+            return None
+        available = [i for i in inputs if i is not None]
+        if available == []:
+            return None
+        n = min(inputs[channel].size for channel in self.uses) if self.uses != [] else available[0].size
+        # e.g. log of negative samples or division by zero give nan or inf samples rather than warnings every frame
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            result = self.root.eval(inputs, n, dt_s)
+        if isinstance(result, float):
+            out = self.root.out(n)
+            out[:] = result
+            return out
+        return result
+
+
+def _walk(node: _Node):
+    yield node
+    for child in getattr(node, "args", []) + ([node.arg] if hasattr(node, "arg") else []):
+        yield from _walk(child)
+
+
+class MathChannels:
+    """ Evaluates enabled math channels for each frame. Inputs are converted into volts in reused buffers. """
+
+    def __init__(self, definitions: list[MathChannelDefinition]):
+        self.definitions: list[MathChannelDefinition] = []
+        self.compiled: list[Optional[CompiledExpression]] = []
+        self.volts = [np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64)]
+        self.display = [np.empty(0, dtype=np.float64) for _ in MATH_CHANNEL_NAMES]
+        self.set_definitions(definitions)
+
+    def set_definitions(self, definitions: list[MathChannelDefinition]) -> None:
+        """ Raises ExpressionError if expression of an enabled channel is invalid. """
+        self.compiled = [CompiledExpression(d.expression) if d.enabled else None for d in definitions]
+        self.definitions = definitions
+
+    def evaluate(
+            self,
+            samples: list[Optional[np.ndarray]],
+            dVs: list[float],
+            offsets_V: list[float],
+            dt_s: float
+    ) -> list[Optional[np.ndarray]]:
+        """
+        Takes samples of physical channels in vertical divisions and returns samples of each math channel in its
+        own vertical divisions or None if the channel is disabled or cannot be computed for this frame.
+        """
+        inputs: list[Optional[np.ndarray]] = []
+        for channel, vs in enumerate(samples):
+            if vs is None:
+                inputs.append(None)
+            else:
+                if self.volts[channel].size != len(vs):
+                    self.volts[channel] = np.empty(len(vs), dtype=np.float64)
+                np.multiply(vs, dVs[channel], out=self.volts[channel])
+                self.volts[channel] -= offsets_V[channel]
+                inputs.append(self.volts[channel])
+
+        results = []
+        for i, (definition, compiled) in enumerate(zip(self.definitions, self.compiled)):
+            result = None if compiled is None else compiled.evaluate(inputs, dt_s)
+            if result is None:
+                results.append(None)
+            else:
+                if self.display[i].size != result.size:
+                    self.display[i] = np.empty(result.size, dtype=np.float64)
+                results.append(np.divide(result, definition.dV, out=self.display[i]))
+        return results
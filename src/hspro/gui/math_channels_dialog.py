@@ -0,0 +1,61 @@
+from PySide6.QtWidgets import QDoubleSpinBox, QLabel, QLineEdit, QMessageBox
+from pytide6 import Dialog, VBoxLayout, CheckBox, PushButton, HBoxPanel, W
+
+from hspro.gui.app import App
+from hspro.gui.math_channels import MathChannelDefinition, CompiledExpression, ExpressionError
+
+
+class MathChannelsDialog(Dialog):
+    def __init__(self, parent, app: App):
+        super().__init__(parent, windowTitle="Math channels", modal=True)
+
+        definitions = app.get_math_channel_definitions()
+        rows = []
+        for definition in definitions:
+            enabled_cb = CheckBox(definition.name, self, checked=definition.enabled)
+            enabled_cb.setStyleSheet(f"color: {definition.color}")
+
+            expression_le = QLineEdit(definition.expression, self)
+            expression_le.setMinimumWidth(250)
+
+            dV_sb = QDoubleSpinBox(self)
+            dV_sb.setDecimals(4)
+            dV_sb.setMinimum(0.0001)
+            dV_sb.setMaximum(1e6)
+            dV_sb.setValue(definition.dV)
+
+            rows.append((definition, enabled_cb, expression_le, dV_sb))
+
+        def on_ok():
+            new_definitions = []
+            for definition, enabled_cb, expression_le, dV_sb in rows:
+                try:
+                    CompiledExpression(expression_le.text())
+                except ExpressionError as ex:
+                    if enabled_cb.isChecked():
+                        QMessageBox.critical(self, "Error", f"{definition.name}: {ex}")
+                        return
+                new_definitions.append(MathChannelDefinition(
+                    name=definition.name,
+                    expression=expression_le.text().strip(),
+                    dV=dV_sb.value(),
+                    enabled=enabled_cb.isChecked(),
+                    color=definition.color
+                ))
+
+            if app.do_set_math_channels(new_definitions):
+                self.close()
+
+        self.setLayout(VBoxLayout([
+            QLabel("Channels are A (CH1) and B (CH2) in volts. Operators: + - * / **\n"
+                   "Functions: abs, sqrt, exp, log, sin, cos, diff (derivative), integ (integral)"),
+            *[
+                HBoxPanel([enabled_cb, expression_le, dV_sb, QLabel("V/div")], margins=0)
+                for _, enabled_cb, expression_le, dV_sb in rows
+            ],
+            HBoxPanel([
+                W(HBoxPanel(), stretch=1),
+                PushButton("Ok", on_clicked=on_ok),
+                PushButton("Cancel", on_clicked=self.close)
+            ])
+        ]))
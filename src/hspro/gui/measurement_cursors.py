@@ -0,0 +1,80 @@
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QFontDatabase
+from pyqtgraph import InfiniteLine, PlotDataItem, TextItem, mkPen
+from pyqtgraph.graphicsItems.PlotItem import PlotItem
+
+from hspro.gui.control_lattice import seconds
+from hspro.gui.measurements import CursorPairMeasurements
+
+
+class MeasurementCursors:
+    """
+    Pair of vertical and pair of horizontal movable lines on a plot and a label with measurements of the selected
+    trace between them. Label is refreshed when cursors move and when new frame is plotted.
+    """
+
+    def __init__(self, plot: PlotItem, traces: list[PlotDataItem], app, label_pos: tuple[float, float]):
+        from hspro.gui.app import App
+        self.app: App = app
+        self.plot = plot
+        self.traces = traces
+        self.measurements = CursorPairMeasurements()
+
+        pen = mkPen((255, 140, 0), width=1, style=Qt.PenStyle.DashLine)
+        hover_pen = mkPen((255, 140, 0), width=2)
+        self.t_lines = [InfiniteLine(angle=90, movable=True, pen=pen, hoverPen=hover_pen) for _ in range(2)]
+        self.v_lines = [InfiniteLine(angle=0, movable=True, pen=pen, hoverPen=hover_pen) for _ in range(2)]
+        for line in self.t_lines + self.v_lines:
+            line.setZValue(8)
+            line.setVisible(False)
+            line.sigPositionChanged.connect(self.update)
+            plot.addItem(line)
+
+        self.label = TextItem("", color=(0, 0, 0), border=(255, 140, 0), fill=(255, 255, 255, 220))
+        self.label.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.label.setPos(*label_pos)
+        self.label.setZValue(5)
+        self.label.setVisible(False)
+        plot.scene().addItem(self.label)
+
+        self.visible = False
+        # incremented by the plot whenever traces get new data
+        self.frame_generation = 0
+
+    def set_visible(self, visible: bool) -> None:
+        if visible and not self.visible:
+            # place cursors at one and two thirds of the current view
+            (t_min, t_max), (v_min, v_max) = self.plot.getViewBox().viewRange()
+            for i, line in enumerate(self.t_lines):
+                line.setValue(t_min + (i + 1) * (t_max - t_min) / 3)
+            for i, line in enumerate(self.v_lines):
+                line.setValue(v_min + (i + 1) * (v_max - v_min) / 3)
+        self.visible = visible
+        for item in self.t_lines + self.v_lines + [self.label]:
+            item.setVisible(visible)
+        self.update()
+
+    def new_frame(self, frame_generation: int) -> None:
+        self.frame_generation = frame_generation
+        self.update()
+
+    def update(self) -> None:
+        if not self.visible:
+            return
+
+        channel = self.app.selected_channel
+        t, v = (None, None) if channel is None else self.traces[channel].getData()
+        if t is None or v is None or not self.traces[channel].isVisible():
+            self.label.setText("No trace selected")
+            return
+
+        visual_time_scale = self.app.model.visual_time_scale
+        measurement = self.measurements.evaluate(
+            (self.frame_generation, channel), t, v,
+            t_cursors=(self.t_lines[0].value(), self.t_lines[1].value()),
+            v_cursors=(self.v_lines[0].value(), self.v_lines[1].value()),
+            dV=self.app.model.channel[channel].dV,
+            offset_V=self.app.model.channel[channel].offset_V,
+            t_unit_s=seconds(visual_time_scale) / visual_time_scale.value
+        )
+        self.label.setText(measurement.to_str())
@@ -0,0 +1,94 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+SI_PREFIXES = [(1e9, "G"), (1e6, "M"), (1e3, "k"), (1, ""), (1e-3, "m"), (1e-6, "u"), (1e-9, "n"), (1e-12, "p")]
+
+
+def si(value: float, unit: str) -> str:
+    """ Formats value with SI prefix, e.g. 0.00123 s -> "1.23 ms". """
+    if not math.isfinite(value):
+        return f"-- {unit}"
+    for scale, prefix in SI_PREFIXES:
+        if abs(value) >= scale:
+            return f"{value / scale:.4g} {prefix}{unit}"
+    return f"{value:.4g} {unit}"
+
+
+@dataclass(frozen=True)
+class CursorMeasurement:
+    dt_s: float
+    # signal value difference between horizontal cursors
+    dV: float
+    # mean and time integral of the signal between vertical cursors; nan if there are no samples between them
+    mean_V: float
+    integral_Vs: float
+
+    @property
+    def frequency_hz(self) -> float:
+        return 1 / self.dt_s if self.dt_s != 0 else math.inf
+
+    def to_str(self) -> str:
+        return (
+            f"Δt = {si(self.dt_s, 's')}   1/Δt = {si(self.frequency_hz, 'Hz')}   ΔV = {si(self.dV, 'V')}\n"
+            f"mean = {si(self.mean_V, 'V')}   ∫ = {si(self.integral_Vs, 'Vs')}"
+        )
+
+
+class CursorPairMeasurements:
+    """
+    Measurements between a pair of vertical (time) and pair of horizontal (signal level) cursors over one trace.
+    Result is cached and recomputed only when frame, cursor positions or channel scale change, so that calling it
+    on every repaint costs nothing while neither changes.
+    """
+
+    def __init__(self):
+        self.__key = None
+        self.__result: CursorMeasurement | None = None
+
+    def evaluate(
+            self,
+            trace_key: tuple[int, int],
+            t: np.ndarray,
+            v: np.ndarray,
+            t_cursors: tuple[float, float],
+            v_cursors: tuple[float, float],
+            dV: float,
+            offset_V: float,
+            t_unit_s: float
+    ) -> CursorMeasurement:
+        """
+        `t` is time axis in units of `t_unit_s` seconds and `v` are samples in vertical divisions; cursor positions
+        are in the same units. `trace_key` identifies the samples, e.g. as frame generation and channel, and must
+        change whenever `t` or `v` do, since buffers may be reused and filled in place.
+        """
+        key = (trace_key, t_cursors, v_cursors, dV, offset_V, t_unit_s)
+        if key == self.__key and self.__result is not None:
+            return self.__result
+
+        t_start, t_end = sorted(t_cursors)
+        i_start, i_end = np.searchsorted(t, [t_start, t_end])
+        segment = v[i_start:i_end]
+        n = segment.size
+        if n == 0:
+            mean_V = integral_Vs = math.nan
+        else:
+            # computed in divisions and converted once, so that no temporary array of volts is allocated
+            sum_div = float(np.sum(segment, dtype=np.float64))
+            mean_V = dV * sum_div / n - offset_V
+            if n > 1:
+                dt_sample_s = (float(t[i_end - 1]) - float(t[i_start])) / (n - 1) * t_unit_s
+                trapezoid_div = sum_div - 0.5 * (float(segment[0]) + float(segment[-1]))
+                integral_Vs = (dV * trapezoid_div - offset_V * (n - 1)) * dt_sample_s
+            else:
+                integral_Vs = 0.0
+
+        self.__result = CursorMeasurement(
+            dt_s=(t_end - t_start) * t_unit_s,
+            dV=abs(v_cursors[1] - v_cursors[0]) * dV,
+            mean_V=mean_V,
+            integral_Vs=integral_Vs
+        )
+        self.__key = key
+        return self.__result
@@ -1,18 +1,56 @@
-from PySide6.QtWidgets import QMenu, QMenuBar
+from PySide6.QtCore import Signal
+from PySide6.QtWidgets import QMenu, QMenuBar, QMessageBox
 
 from hspro.gui.app import App
-from hspro.gui.settings_dialog import SettingsDialog
 
 
 class FileMenu(QMenu):
+    # messages from remote control server threads shown in status bar of the main window
+    remote_control_log = Signal(str)
+
     def __init__(self, parent: QMenuBar, app: App):
         super().__init__("&File", parent)
         self.app = app
 
         self.addAction("&Take screenshot", app.take_screenshot)
+        self.addAction("Export &plot image", app.export_plot)
+        export_menu = self.addMenu("&Export")
+        export_menu.addAction("&Current frame", app.export_current_frame)
+        export_menu.addAction("&Held traces", app.export_held_traces)
+        export_menu.addAction("&Scene history", app.export_scene)
+        self.addSeparator()
+        self.remote_control_action = self.addAction("&Remote control server")
+        self.remote_control_action.setCheckable(True)
+        self.remote_control_action.toggled.connect(self.enable_remote_control)
+        self.remote_control_log.connect(lambda msg: self.app.main_window().statusBar().showMessage(msg, 5000))
         self.addSeparator()
         self.addAction("&Settings", self.show_settings_dialog)
         self.addAction("&Quit", lambda: app.exit_application())
 
+        if app.app_persistence.state.get_value("remote_control_server", "off") == "on":
+            self.remote_control_action.setChecked(True)
+
     def show_settings_dialog(self):
+        from hspro.gui.settings_dialog import SettingsDialog
+
         SettingsDialog(self.app.main_window(), self.app).exec_()
+
+    def enable_remote_control(self, enable: bool):
+        from hspro.gui.remote_control import DEFAULT_COMMAND_PORT, RemoteControlServer
+
+        if enable and self.app.remote_control_server is None:
+            port = int(self.app.app_persistence.state.get_value("remote_control_port", str(DEFAULT_COMMAND_PORT)))
+            server = RemoteControlServer(self.app, port, self.remote_control_log.emit)
+            try:
+                server.start()
+            except OSError as ex:
+                QMessageBox.critical(self.app.main_window(), "Error", f"Unable to start remote control server: {ex}")
+                self.remote_control_action.setChecked(False)
+                return
+            self.app.remote_control_server = server
+            self.remote_control_action.setToolTip(f"Listening on ports {port} (commands) and {port + 1} (data)")
+        elif not enable and self.app.remote_control_server is not None:
+            self.app.remote_control_server.stop()
+            self.app.remote_control_server = None
+            self.remote_control_log.emit("Remote control stopped")
+        self.app.app_persistence.state.set_value("remote_control_server", "on" if enable else "off")
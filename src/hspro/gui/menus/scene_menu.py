@@ -1,40 +1,12 @@
-from typing import Callable
+from typing import TYPE_CHECKING
 
-from PySide6.QtCore import QStringListModel
-from PySide6.QtWidgets import QMenu, QMenuBar, QWidget, QListView, QAbstractItemView
-from pytide6 import Dialog, VBoxLayout
+from PySide6.QtWidgets import QMenu, QMenuBar
 
-from hspro.gui.app import App, WorkerMessage
+from hspro.gui.app import App
 from hspro.gui.scene import Scene
 
-
-class SceneHistory(Dialog):
-    def __init__(self, parent: QWidget, app: App, on_close: Callable[[], None]):
-        super().__init__(parent, windowTitle="Scene history")
-        self.on_close = on_close
-        self.hist_model = QStringListModel()
-
-        num_checkpoints = len(app.scene.data)
-        items = [f"Checkpoint #{num_checkpoints - i}" for i in range(len(app.scene.data))]
-        self.hist_model.setStringList(items)
-
-        self.lst_view = QListView()
-        self.lst_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-        self.lst_view.setModel(self.hist_model)
-        self.lst_view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
-
-        def on_click():
-            selected_indexes = self.lst_view.selectedIndexes()
-            if selected_indexes != []:
-                selected_row = selected_indexes[0].row()
-                app.worker.messages.put(WorkerMessage.ActivateCheckpoint(len(app.get_scene().data) - selected_row))
-
-        self.lst_view.clicked.connect(on_click)
-        self.setLayout(VBoxLayout([self.lst_view]))
-
-    def closeEvent(self, arg__1, /):
-        super().closeEvent(arg__1)
-        self.on_close()
+if TYPE_CHECKING:
+    from hspro.gui.scene_history_dialog import SceneHistory
 
 
 class SceneMenu(QMenu):
@@ -46,7 +18,7 @@ class SceneMenu(QMenu):
         self.addAction("&Open scene", app.open_scene)
         self.addAction("&Show scene history", self.show_history)
         self.addAction("&Take scene snapshot", app.record_state_in_scene)
-        self.scene_history_windows: list[SceneHistory] = []
+        self.scene_history_windows: list["SceneHistory"] = []
 
         self.app.update_scene_history_dialog = self.update_scene_history_dialog
 
@@ -58,6 +30,8 @@ class SceneMenu(QMenu):
 
     def show_history(self):
         if self.scene_history_windows == []:
+            from hspro.gui.scene_history_dialog import SceneHistory
+
             hist = SceneHistory(self.app.main_window(), self.app, on_close=self.scene_history_windows.clear)
             self.scene_history_windows.append(hist)
             hist.show()
@@ -68,6 +42,4 @@ class SceneMenu(QMenu):
 
     def update_scene_history_dialog(self, scene: Scene):
         if self.scene_history_windows != []:
-            num_checkpoints = len(scene.data)
-            items = [f"Checkpoint #{num_checkpoints - i}" for i in range(len(scene.data))]
-            self.scene_history_windows[0].hist_model.setStringList(items)
+            self.scene_history_windows[0].hist_model.set_scene(scene)
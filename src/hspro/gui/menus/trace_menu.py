@@ -1,10 +1,13 @@
+from typing import TYPE_CHECKING
+
 from PySide6.QtGui import QAction, Qt
 from PySide6.QtWidgets import QMenu, QMenuBar, QWidgetAction, QSlider, QLabel
 from pytide6 import HBoxPanel
 
-from hspro.gui.app import App, WorkerMessage
-from hspro.gui.read_out_options_dialog import ReadOutOptionsDialog
-from hspro.gui.scene import SceneCheckpoint
+from hspro.gui.app import App
+
+if TYPE_CHECKING:
+    from hspro.gui.scene import SceneCheckpoint
 
 
 class TraceMenu(QMenu):
@@ -16,12 +19,74 @@ class TraceMenu(QMenu):
         self.read_out_options.triggered.connect(self.show_readout_options_dialog)
         self.addAction(self.read_out_options)
 
+        self.math_channels = QAction("&Math channels", self)
+        self.math_channels.triggered.connect(self.show_math_channels_dialog)
+        self.addAction(self.math_channels)
+
+        self.filters = QAction("&Filters", self)
+        self.filters.triggered.connect(self.show_filters_dialog)
+        self.addAction(self.filters)
+
+        self.protocol_decoder = QAction("&Protocol decoder", self)
+        self.protocol_decoder.triggered.connect(self.show_decoder_dialog)
+        self.addAction(self.protocol_decoder)
+
+        self.software_trigger = QAction("&Software trigger", self)
+        self.software_trigger.triggered.connect(self.show_qualifier_dialog)
+        self.addAction(self.software_trigger)
+
+        mask_test_menu = self.addMenu("Mask &test")
+
+        self.enable_mask_test = QAction("&Enable mask test", self)
+        self.enable_mask_test.setCheckable(True)
+        self.enable_mask_test.setChecked(app.is_mask_test_enabled())
+        self.enable_mask_test.toggled.connect(self.set_mask_test_enabled)
+        mask_test_menu.addAction(self.enable_mask_test)
+
+        self.mask_stop_on_fail = QAction("&Stop on fail", self)
+        self.mask_stop_on_fail.setCheckable(True)
+        self.mask_stop_on_fail.setChecked(app.is_mask_stop_on_fail())
+        self.mask_stop_on_fail.toggled.connect(self.set_mask_stop_on_fail)
+        mask_test_menu.addAction(self.mask_stop_on_fail)
+
+        self.reset_mask_counts = QAction("&Reset counts", self)
+        self.reset_mask_counts.triggered.connect(self.app.do_reset_mask_counts)
+        mask_test_menu.addAction(self.reset_mask_counts)
+
+        mask_test_menu.addSeparator()
+
+        self.draw_mask = QAction("&Draw mask", self)
+        self.draw_mask.setCheckable(True)
+        self.draw_mask.setChecked(False)
+        self.draw_mask.toggled.connect(self.set_drawing_mask)
+        mask_test_menu.addAction(self.draw_mask)
+
+        self.clear_mask = QAction("&Clear mask", self)
+        self.clear_mask.triggered.connect(lambda: self.app.do_set_mask_polygons([]))
+        mask_test_menu.addAction(self.clear_mask)
+
+        self.load_mask = QAction("&Load mask...", self)
+        self.load_mask.triggered.connect(self.app.load_mask)
+        mask_test_menu.addAction(self.load_mask)
+
+        self.save_mask = QAction("S&ave mask...", self)
+        self.save_mask.triggered.connect(self.app.save_mask)
+        mask_test_menu.addAction(self.save_mask)
+
         self.advanced_settings = QAction("&Advanced settings", self)
         self.advanced_settings.setEnabled(False)
         self.addAction(self.advanced_settings)
 
         self.addSeparator()
 
+        self.show_eye_diagram = QAction("Show &Eye Diagram", self)
+        self.show_eye_diagram.triggered.connect(self.app.open_eye_diagram_dialog)
+        self.addAction(self.show_eye_diagram)
+
+        self.show_waterfall = QAction("Show &Waterfall", self)
+        self.show_waterfall.triggered.connect(self.app.open_waterfall_dialog)
+        self.addAction(self.show_waterfall)
+
         self.show_fft = QAction("Show &FFT", self)
         self.show_fft.setEnabled(False)
         self.addAction(self.show_fft)
@@ -74,6 +139,24 @@ class TraceMenu(QMenu):
         self.show_zero_line.toggled.connect(self.set_show_zero_line_state)
         self.addAction(self.show_zero_line)
 
+        self.snap_cursor = QAction("Snap &Cursor to Samples", self)
+        self.snap_cursor.setCheckable(True)
+        self.snap_cursor.setChecked(app.app_persistence.state.get_value("snap_cursor", "false") == "true")
+        self.snap_cursor.toggled.connect(self.set_snap_cursor)
+        self.addAction(self.snap_cursor)
+
+        self.roll_mode = QAction("&Roll Mode at Slow Time Scales", self)
+        self.roll_mode.setCheckable(True)
+        self.roll_mode.setChecked(app.is_roll_mode_enabled())
+        self.roll_mode.toggled.connect(self.app.do_enable_roll_mode)
+        self.addAction(self.roll_mode)
+
+        self.show_measurement_cursors = QAction("Show &Measurement Cursors", self)
+        self.show_measurement_cursors.setCheckable(True)
+        self.show_measurement_cursors.setChecked(app.is_showing_measurement_cursors())
+        self.show_measurement_cursors.toggled.connect(self.app.do_show_measurement_cursors)
+        self.addAction(self.show_measurement_cursors)
+
         plot_color_scheme_menu = self.addMenu("Color &Scheme")
 
         self.plot_color_scheme_light = QAction("&Light", self)
@@ -90,7 +173,7 @@ class TraceMenu(QMenu):
         self.plot_color_scheme_light.setChecked(plot_color_scheme == "light")
         self.plot_color_scheme_dark.setChecked(plot_color_scheme == "dark")
 
-        def apply_checkpoint(cpt: SceneCheckpoint):
+        def apply_checkpoint(cpt: "SceneCheckpoint"):
             match cpt.plot_color_scheme:
                 case "light":
                     self.set_plot_color_scheme_light()
@@ -103,13 +186,6 @@ class TraceMenu(QMenu):
             self.show_y_axis_labels.setChecked(cpt.show_y_axis_labels)
             self.show_zero_line.setChecked(cpt.show_zero_line)
 
-            app.worker.messages.put(WorkerMessage.SetHighres(cpt.highres))
-            app.worker.messages.put(WorkerMessage.SetMemoryDepth(cpt.mem_depth))
-            app.worker.messages.put(WorkerMessage.SetDelay(cpt.delay))
-            app.worker.messages.put(WorkerMessage.SetFDelay(cpt.f_delay))
-
-            # TODO: add visual_time_scale
-
         self.app.apply_checkpoint_to_trace_menu = apply_checkpoint
 
     def set_plot_color_scheme_light(self):
@@ -136,8 +212,42 @@ class TraceMenu(QMenu):
     def set_show_zero_line_state(self, show_zero_line: bool):
         self.app.set_show_zero_line(show_zero_line)
 
+    def set_snap_cursor(self, snap: bool):
+        self.app.set_snap_cursor(snap)
+
     def set_show_trig_pos_line(self, show_trig_pos_line: bool):
         self.app.set_show_trig_pos_line(show_trig_pos_line)
 
+    def set_mask_test_enabled(self, enabled: bool):
+        self.app.do_enable_mask_test(enabled)
+
+    def set_mask_stop_on_fail(self, stop_on_fail: bool):
+        self.app.do_set_mask_stop_on_fail(stop_on_fail)
+
+    def set_drawing_mask(self, drawing: bool):
+        self.app.set_drawing_mask(drawing)
+
     def show_readout_options_dialog(self):
+        from hspro.gui.read_out_options_dialog import ReadOutOptionsDialog
+
         ReadOutOptionsDialog(self.parent(), self.app).exec_()
+
+    def show_math_channels_dialog(self):
+        from hspro.gui.math_channels_dialog import MathChannelsDialog
+
+        MathChannelsDialog(self.parent(), self.app).exec_()
+
+    def show_filters_dialog(self):
+        from hspro.gui.filters_dialog import FiltersDialog
+
+        FiltersDialog(self.parent(), self.app).exec_()
+
+    def show_decoder_dialog(self):
+        from hspro.gui.decoder_dialog import DecoderDialog
+
+        DecoderDialog(self.parent(), self.app).exec_()
+
+    def show_qualifier_dialog(self):
+        from hspro.gui.qualifier_dialog import QualifierDialog
+
+        QualifierDialog(self.parent(), self.app).exec_()
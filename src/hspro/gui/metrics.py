@@ -0,0 +1,225 @@
+"""
+Acquisition health metrics served in Prometheus text format on localhost.
+
+Metrics are always collected, which is cheap, but served only when port is given, e.g. with HSPRO_METRICS_PORT
+environment variable. This module has no Qt dependencies so that it is shared by GUI and headless capture.
+"""
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+import numpy as np
+
+# set this environment variable to port number to serve metrics at http://127.0.0.1:<port>/metrics
+METRICS_PORT_ENV_VAR = "HSPRO_METRICS_PORT"
+
+# number of most recent observations from which summary quantiles are computed
+SUMMARY_WINDOW = 1024
+
+# period over which trigger rate is computed
+RATE_WINDOW_S = 10.0
+
+
+def _format(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.__value = 0.0
+        self.__lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self.__lock:
+            self.__value += amount
+
+    @property
+    def value(self) -> float:
+        return self.__value
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} counter",
+            f"{self.name} {_format(self.__value)}"
+        ]
+
+
+class Gauge:
+    """ Gauge whose value is either set or read from `value_fn` on each scrape. """
+
+    def __init__(self, name: str, help_text: str, value_fn: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.help_text = help_text
+        self.value_fn = value_fn
+        self.__value = 0.0
+
+    def set(self, value: float) -> None:
+        self.__value = value
+
+    @property
+    def value(self) -> float:
+        return self.__value if self.value_fn is None else self.value_fn()
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {_format(self.value)}"
+        ]
+
+
+class Summary:
+    """ Count and sum of all observations plus quantiles over the most recent `window` of them. """
+
+    QUANTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self, name: str, help_text: str, window: int = SUMMARY_WINDOW):
+        self.name = name
+        self.help_text = help_text
+        self.__recent = deque(maxlen=window)
+        self.__count = 0
+        self.__sum = 0.0
+        self.__lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self.__lock:
+            self.__recent.append(value)
+            self.__count += 1
+            self.__sum += value
+
+    def time(self) -> "_Timer":
+        """ Context manager observing time spent in its body in seconds. """
+        return _Timer(self)
+
+    def render(self) -> list[str]:
+        with self.__lock:
+            recent = np.fromiter(self.__recent, dtype=np.float64, count=len(self.__recent))
+            count, total = self.__count, self.__sum
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} summary"]
+        if recent.size > 0:
+            for q, v in zip(self.QUANTILES, np.quantile(recent, self.QUANTILES)):
+                lines.append(f'{self.name}{{quantile="{q:g}"}} {_format(v)}')
+        lines.append(f"{self.name}_sum {_format(total)}")
+        lines.append(f"{self.name}_count {count}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, summary: Summary):
+        self.summary = summary
+
+    def __enter__(self):
+        self.started_at_s = time.perf_counter()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.summary.observe(time.perf_counter() - self.started_at_s)
+
+
+class EventRate:
+    """ Gauge of events per second over the last `window_s` seconds. """
+
+    def __init__(self, name: str, help_text: str, window_s: float = RATE_WINDOW_S):
+        self.name = name
+        self.help_text = help_text
+        self.window_s = window_s
+        self.__events = deque()
+        self.__lock = threading.Lock()
+
+    def mark(self) -> None:
+        now = time.monotonic()
+        with self.__lock:
+            self.__events.append(now)
+            self.__expire(now)
+
+    @property
+    def value(self) -> float:
+        with self.__lock:
+            self.__expire(time.monotonic())
+            return len(self.__events) / self.window_s
+
+    def __expire(self, now: float) -> None:
+        while self.__events and self.__events[0] < now - self.window_s:
+            self.__events.popleft()
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {_format(self.value)}"
+        ]
+
+
+class AcquisitionMetrics:
+    def __init__(self):
+        self.frames_acquired = Counter("hspro_frames_acquired_total", "Frames read from the board.")
+        self.triggers = Counter("hspro_triggers_total", "Frames acquired on trigger rather than forced.")
+        self.trigger_rate = EventRate(
+            "hspro_trigger_rate_hz", f"Triggered frames per second over the last {RATE_WINDOW_S:g} seconds."
+        )
+        self.frames_dropped = Counter(
+            "hspro_frames_dropped_total", "Frames acquired but not delivered to a consumer that did not keep up."
+        )
+        self.worker_queue_depth = Gauge("hspro_worker_queue_depth", "Messages waiting for the board worker.")
+        self.usb_read_latency = Summary("hspro_usb_read_latency_seconds", "Time to read one frame from the board.")
+        self.recording_bytes_written = Counter(
+            "hspro_recording_bytes_written_total", "Bytes of captured frames written to output."
+        )
+        self.gui_frame_time = Summary("hspro_gui_frame_time_seconds", "Time to draw one frame in GUI.")
+
+    def acquired(self, triggered: bool) -> None:
+        self.frames_acquired.inc()
+        if triggered:
+            self.triggers.inc()
+            self.trigger_rate.mark()
+
+    def render(self) -> str:
+        lines = []
+        for metric in [
+            self.frames_acquired, self.triggers, self.trigger_rate, self.frames_dropped, self.worker_queue_depth,
+            self.usb_read_latency, self.recording_bytes_written, self.gui_frame_time
+        ]:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+METRICS = AcquisitionMetrics()
+
+
+class MetricsServer:
+    def __init__(self, port: int, metrics: AcquisitionMetrics = METRICS):
+        metrics_to_serve = metrics
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ["/", "/metrics"]:
+                    self.send_error(404)
+                    return
+                body = metrics_to_serve.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.http_server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+        self.http_server.daemon_threads = True
+        threading.Thread(target=self.http_server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.http_server.shutdown()
+        self.http_server.server_close()
+
+
+def metrics_port_from_env() -> Optional[int]:
+    port = os.environ.get(METRICS_PORT_ENV_VAR, "")
+    return int(port) if port != "" else None
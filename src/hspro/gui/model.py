@@ -2,50 +2,21 @@ import math
 import time
 from dataclasses import dataclass
 from enum import Enum
-from functools import cache
 from random import random
-from typing import Type, Callable, Optional
+from typing import Type, Callable, Optional, TYPE_CHECKING
 
 from hspro_api import TriggerType, Waveform
 from hspro_api.board import Board, ChannelCoupling, InputImpedance, WaveformAvailability, WaveformAvailable, \
     WaveformUnavailable
-from hspro_api.time_constants import TimeConstants
-from sprats.config import AppPersistence
-from unlib import Duration, MetricValue, TimeUnit
-
-from hspro.gui.scene import SceneCheckpoint
-
-VISUAL_TIME_PER_DIVISION = [
-    Duration(1, TimeUnit.NS),
-    Duration(2, TimeUnit.NS),
-    Duration(5, TimeUnit.NS),
-    Duration(10, TimeUnit.NS),
-    Duration(20, TimeUnit.NS),
-    Duration(50, TimeUnit.NS),
-    Duration(100, TimeUnit.NS),
-    Duration(200, TimeUnit.NS),
-    Duration(500, TimeUnit.NS),
-    Duration(1, TimeUnit.US),
-    Duration(2, TimeUnit.US),
-    Duration(5, TimeUnit.US),
-    Duration(10, TimeUnit.US),
-    Duration(20, TimeUnit.US),
-    Duration(50, TimeUnit.US),
-    Duration(100, TimeUnit.US),
-    Duration(200, TimeUnit.US),
-    Duration(500, TimeUnit.US),
-    Duration(1, TimeUnit.MS),
-    Duration(2, TimeUnit.MS),
-    Duration(5, TimeUnit.MS),
-    Duration(10, TimeUnit.MS),
-    Duration(20, TimeUnit.MS),
-    Duration(50, TimeUnit.MS),
-    Duration(100, TimeUnit.MS),
-    Duration(200, TimeUnit.MS),
-    Duration(500, TimeUnit.MS),
-    Duration(1, TimeUnit.S),
-    Duration(2, TimeUnit.S)
-]
+from unlib import Duration, MetricValue
+
+from hspro.gui.board_shadow import BoardShadow
+from hspro.gui.control_lattice import VISUAL_TIME_SCALE_LATTICE, offset_lattice, seconds, time_scale_lattice, \
+    voltage_scale_lattice, volts
+from hspro.gui.persistence import WriteBehindPersistence
+
+if TYPE_CHECKING:
+    from hspro.gui.scene import SceneCheckpoint
 
 
 @dataclass
@@ -126,6 +97,63 @@ class ChannelImpedanceModel(Enum):
         return value.value
 
 
+@dataclass(frozen=True)
+class ChannelSettings:
+    active: bool
+    offset_V: float
+    dV: float
+    coupling: ChannelCouplingModel
+    impedance: ChannelImpedanceModel
+    ten_x_probe: bool
+
+
+@dataclass(frozen=True)
+class BoardSettings:
+    """ Complete set of acquisition settings, which can be applied to the board in one go. """
+
+    highres: bool
+    mem_depth: int
+    delay: int
+    f_delay: int
+    visual_time_scale: Duration
+    trigger_on_channel: int
+    trigger_type: TriggerTypeModel
+    trigger_tot: int
+    trigger_delta: int
+    trigger_level: float
+    trigger_position: float
+    trigger_auto_frequency: str
+    channels: tuple[ChannelSettings, ...]
+
+    @staticmethod
+    def from_checkpoint(cpt: "SceneCheckpoint") -> "BoardSettings":
+        return BoardSettings(
+            highres=cpt.highres,
+            mem_depth=cpt.mem_depth,
+            delay=cpt.delay,
+            f_delay=cpt.f_delay,
+            visual_time_scale=Duration.value_of(cpt.visual_time_scale),
+            trigger_on_channel=cpt.trigger_on_channel,
+            trigger_type=TriggerTypeModel.value_of(cpt.trigger_type),
+            trigger_tot=cpt.trigger_tot,
+            trigger_delta=cpt.trigger_delta,
+            trigger_level=cpt.trigger_level,
+            trigger_position=cpt.trigger_position,
+            trigger_auto_frequency=cpt.trigger_auto_frequency,
+            channels=tuple(
+                ChannelSettings(
+                    active=cd.active,
+                    offset_V=cd.offset_V,
+                    dV=cd.dV,
+                    coupling=ChannelCouplingModel.value_of(cd.coupling),
+                    impedance=ChannelImpedanceModel.value_of(cd.impedance),
+                    ten_x_probe=cd.ten_x_probe
+                )
+                for cd in cpt.channels
+            )
+        )
+
+
 @dataclass
 class SettableValue[V]:
     value: V
@@ -133,7 +161,7 @@ class SettableValue[V]:
 
 
 class ModelBase:
-    def __init__(self, persistence: AppPersistence):
+    def __init__(self, persistence: WriteBehindPersistence):
         self.persistence = persistence
 
     def get[T, V](
@@ -156,7 +184,7 @@ class ModelBase:
 
 
 class ChannelModel(ModelBase):
-    def __init__(self, parent, channel_num: int, persistence: AppPersistence):
+    def __init__(self, parent, channel_num: int, persistence: WriteBehindPersistence):
         super().__init__(persistence)
         self.board_model: BoardModel = parent
         self.channel_num: int = channel_num
@@ -184,7 +212,11 @@ class ChannelModel(ModelBase):
             self.__active.value = self.__active.setter(value)
             self.board_model.on_channel_active_change()
         if self.channel_num == 1 and self.board_model.board is not None:
-            self.board_model.board.enable_two_channels(value)
+            # board needs offset and voltage scale of each channel to be rewritten after change of channel mode
+            self.board_model.shadow.write(
+                "two_channels", value, self.board_model.board.enable_two_channels,
+                invalidates=("time_scale", ("offset_V", 0), ("offset_V", 1), ("dV", 0), ("dV", 1))
+            )
 
     @property
     def color(self) -> str:
@@ -202,7 +234,10 @@ class ChannelModel(ModelBase):
     def offset_V(self, value: float):
         self.__offset_V.value = self.__offset_V.setter(value)
         if self.board_model.board is not None:
-            self.__offset_V.value = self.board_model.board.set_channel_offset_V(self.channel_num, self.__offset_V.value)
+            self.__offset_V.value = self.board_model.shadow.write(
+                ("offset_V", self.channel_num), self.__offset_V.value,
+                lambda v: self.board_model.board.set_channel_offset_V(self.channel_num, v)
+            )
 
     @property
     def dV(self) -> float:
@@ -212,7 +247,10 @@ class ChannelModel(ModelBase):
     def dV(self, value: float):
         self.__dV.value = self.__dV.setter(value)
         if self.board_model.board is not None:
-            self.__dV.value = self.board_model.board.set_channel_voltage_div(self.channel_num, self.__dV.value)
+            self.__dV.value = self.board_model.shadow.write(
+                ("dV", self.channel_num), self.__dV.value,
+                lambda v: self.board_model.board.set_channel_voltage_div(self.channel_num, v)
+            )
 
     @property
     def coupling(self) -> ChannelCouplingModel:
@@ -224,11 +262,15 @@ class ChannelModel(ModelBase):
         if self.board_model.board is not None:
             match value:
                 case ChannelCouplingModel.AC:
-                    self.board_model.board.set_channel_coupling(self.channel_num, ChannelCoupling.AC)
+                    coupling = ChannelCoupling.AC
                 case ChannelCouplingModel.DC:
-                    self.board_model.board.set_channel_coupling(self.channel_num, ChannelCoupling.DC)
+                    coupling = ChannelCoupling.DC
                 case _:
                     raise RuntimeError(f"Invalid channel coupling {value}")
+            self.board_model.shadow.write(
+                ("coupling", self.channel_num), coupling,
+                lambda c: self.board_model.board.set_channel_coupling(self.channel_num, c)
+            )
 
     @property
     def impedance(self) -> ChannelImpedanceModel:
@@ -240,15 +282,15 @@ class ChannelModel(ModelBase):
         if self.board_model.board is not None:
             match value:
                 case ChannelImpedanceModel.FIFTY_OHM:
-                    self.board_model.board.set_channel_input_impedance(
-                        channel=self.channel_num, impedance=InputImpedance.FIFTY_OHM
-                    )
+                    impedance = InputImpedance.FIFTY_OHM
                 case ChannelImpedanceModel.ONE_MEGA_OHM:
-                    self.board_model.board.set_channel_input_impedance(
-                        channel=self.channel_num, impedance=InputImpedance.ONE_MEGA_OHM
-                    )
+                    impedance = InputImpedance.ONE_MEGA_OHM
                 case _:
                     raise RuntimeError(f"Invalid channel impedance value {value}")
+            self.board_model.shadow.write(
+                ("impedance", self.channel_num), impedance,
+                lambda i: self.board_model.board.set_channel_input_impedance(channel=self.channel_num, impedance=i)
+            )
 
     @property
     def ten_x_probe(self) -> bool:
@@ -265,7 +307,11 @@ class ChannelModel(ModelBase):
                 else:
                     self.__dV.value = self.__dV.value / 10
         else:
-            self.board_model.board.set_channel_10x_probe(self.channel_num, value)
+            self.board_model.shadow.write(
+                ("ten_x_probe", self.channel_num), value,
+                lambda v: self.board_model.board.set_channel_10x_probe(self.channel_num, v),
+                invalidates=(("dV", self.channel_num), ("offset_V", self.channel_num))
+            )
 
     @property
     def five_x_attenuation(self) -> bool:
@@ -289,7 +335,7 @@ class ChannelModel(ModelBase):
 
 
 class TriggerModel(ModelBase):
-    def __init__(self, parent, persistence: AppPersistence):
+    def __init__(self, parent, persistence: WriteBehindPersistence):
         super().__init__(persistence)
         self.board_model: BoardModel = parent
 
@@ -309,15 +355,27 @@ class TriggerModel(ModelBase):
 
     def update_live_trigger_properties(self):
         if self.board_model.board is not None:
-            self.__level.value = self.board_model.board.set_trigger_props(
-                trigger_level=self.level,
-                trigger_delta=self.delta,
-                trigger_pos=self.position,
-                tot=self.tot,
-                trigger_on_channel=self.__on_channel.value
+            self.__level.value = self.board_model.shadow.write(
+                "trigger", (self.level, self.delta, self.position, self.tot, self.__on_channel.value),
+                lambda props: self.board_model.board.set_trigger_props(
+                    trigger_level=props[0],
+                    trigger_delta=props[1],
+                    trigger_pos=props[2],
+                    tot=props[3],
+                    trigger_on_channel=props[4]
+                )
             )
             self.__position.value = self.board_model.board.state.trigger_pos
 
+    def set_live_trigger_properties(self, on_channel: int, tot: int, delta: int, level: float, position: float):
+        """ Sets all trigger properties that are sent to the board together and then writes them in one operation. """
+        self.__on_channel.value = self.__on_channel.setter(on_channel)
+        self.__tot.value = self.__tot.setter(tot)
+        self.__delta.value = self.__delta.setter(delta)
+        self.__level.value = self.__level.setter(level)
+        self.__position.value = self.__position.setter(position)
+        self.update_live_trigger_properties()
+
     def __auto_freq_to_dt(self, freq_str: str) -> float:
         match freq_str:
             case "2 Hz":
@@ -417,7 +475,7 @@ class BoardModel(ModelBase):
     VALID_DOWNSAMPLEMERGIN_VALUES_TWO_CHANNELS = [1, 2, 4, 10, 20]
     NATIVE_SAMPLE_PERIOD_S = 3.125e-10
 
-    def __init__(self, persistence: AppPersistence):
+    def __init__(self, persistence: WriteBehindPersistence):
         super().__init__(persistence)
         self.channel = [ChannelModel(self, 0, persistence), ChannelModel(self, 1, persistence)]
         self.trigger = TriggerModel(self, persistence)
@@ -430,6 +488,8 @@ class BoardModel(ModelBase):
         self.on_memdepth_change: Callable[[], None] = lambda: None
         self.on_channel_active_change: Callable[[], None] = lambda: None
         self.board: Board | None = None
+        self.board_id: int | None = None
+        self.shadow = BoardShadow()
 
         self.__visual_time_scale = Duration.value_of(
             self.persistence.config.get_by_xpath("/general/visual_time_scale", str)
@@ -443,8 +503,11 @@ class BoardModel(ModelBase):
         if self.board is not None:
             self.board.cleanup()
 
-    def link_to_live_board(self, board: Board):
+    def link_to_live_board(self, board: Board, board_id: int):
+        # registers of a newly initialized board cannot be read back, so nothing is assumed to be written yet
+        self.shadow.reset()
         self.board = board
+        self.board_id = board_id
 
     @property
     def time_scale(self) -> Duration:
@@ -453,7 +516,10 @@ class BoardModel(ModelBase):
     @time_scale.setter
     def time_scale(self, value: Duration):
         if self.board is not None:
-            value = (self.board.set_time_scale(value) * self.board.num_samples_per_division()).optimize()
+            value = self.shadow.write(
+                "time_scale", value,
+                lambda v: (self.board.set_time_scale(v) * self.board.num_samples_per_division()).optimize()
+            )
 
         self.__time_scale = value
 
@@ -474,7 +540,7 @@ class BoardModel(ModelBase):
     def highres(self, value: bool):
         self.__highres.value = self.__highres.setter(value)
         if self.board is not None:
-            self.board.set_highres_capture_mode(value)
+            self.shadow.write("highres", value, self.board.set_highres_capture_mode)
 
     @property
     def mem_depth(self) -> int:
@@ -486,7 +552,9 @@ class BoardModel(ModelBase):
             self.__mem_depth.value = self.__mem_depth.setter(value)
             self.on_memdepth_change()
             if self.board is not None:
-                self.board.set_memory_depth(value)
+                self.shadow.write(
+                    "mem_depth", value, self.board.set_memory_depth, invalidates=("time_scale", "trigger")
+                )
 
     @property
     def delay(self) -> int:
@@ -515,7 +583,6 @@ class BoardModel(ModelBase):
             index_offset=0
         )
 
-    @cache
     def get_next_valid_time_scale(
             self,
             two_channel_operation: int,
@@ -523,33 +590,15 @@ class BoardModel(ModelBase):
             current_value: Duration,
             index_offset: int
     ) -> Duration:
-        valid_values: list[Duration] = self.get_valid_time_scales(two_channel_operation, mem_depth)
-
-        def current_index():
-            for i, d in enumerate(valid_values):
-                if d >= current_value:
-                    return i
-            return 0
+        return time_scale_lattice(bool(two_channel_operation), mem_depth).step(seconds(current_value), index_offset)
 
-        current_index = current_index()
-        next_index = min(max(current_index + index_offset, 0), len(valid_values) - 1)
-        return valid_values[next_index]
-
-    @cache
     def get_valid_time_scales(self, two_channel_operation: int, mem_depth: int) -> list[Duration]:
         """
         Returns list of valid durations for horizontal division. This is intended to be used
         in GUI to construct valid time base element.
         """
-        samples_per_row_per_waveform = 20 if two_channel_operation else 40
-        num_samples_per_division = samples_per_row_per_waveform * mem_depth / 10
-
-        if two_channel_operation:
-            return [(a[2] * num_samples_per_division).optimize() for a in TimeConstants.dt_two_ch]
-        else:
-            return [(a[2] * num_samples_per_division).optimize() for a in TimeConstants.dt_one_ch]
+        return time_scale_lattice(bool(two_channel_operation), mem_depth).display_values()
 
-    @cache
     def get_time_scale_from_board_parameters(
             self,
             two_channel_operation: int,
@@ -562,12 +611,6 @@ class BoardModel(ModelBase):
         dt_s = BoardModel.NATIVE_SAMPLE_PERIOD_S * downsamplemerging * pow(2, downsample)
         return Duration.value_of(f"{dt_s * num_samples_per_division} s").optimize()
 
-    @cache
-    def get_valid_offset_values(self, dV: float, do_oversample: bool) -> list[MetricValue]:
-        scaling = 1.5 * dV / 160 * (2 if do_oversample else 1)  # compare to 0 dB gain
-        return [MetricValue.value_of(f"{scaling * n} V").optimize() for n in range(-990, 990, 10)]
-
-    @cache
     def get_next_valid_offset_value(
             self,
             dV: float,
@@ -575,32 +618,8 @@ class BoardModel(ModelBase):
             current_offset: MetricValue,
             index_offset: int
     ) -> MetricValue:
-        valid_values: list[MetricValue] = self.get_valid_offset_values(dV, do_oversample)
-
-        def current_index():
-            for i, d in enumerate(valid_values):
-                if d >= current_offset:
-                    return i
-            return 0
-
-        current_index = current_index()
-        next_index = min(max(current_index + index_offset, 0), len(valid_values) - 1)
-        return valid_values[next_index]
-
-    @cache
-    def get_valid_dv_values(self, do_oversample: bool, ten_x_probe: bool) -> list[MetricValue]:
-        if ten_x_probe:
-            return [
-                MetricValue.value_of("4 V"), MetricValue.value_of("2 V"), MetricValue.value_of("1 V"),
-                MetricValue.value_of("500 mV"), MetricValue.value_of("250 mV"), MetricValue.value_of("100 mV")
-            ]
-        else:
-            return [
-                MetricValue.value_of("400 mV"), MetricValue.value_of("200 mV"), MetricValue.value_of("100 mV"),
-                MetricValue.value_of("50 mV"), MetricValue.value_of("25 mV"), MetricValue.value_of("10 mV")
-            ]
+        return offset_lattice(dV, do_oversample).step(volts(current_offset), index_offset)
 
-    @cache
     def get_next_valid_voltage_scale(
             self,
             current_voltage_scale: MetricValue,
@@ -608,17 +627,7 @@ class BoardModel(ModelBase):
             ten_x_probe: bool,
             index_offset: int
     ) -> MetricValue:
-        valid_values: list[MetricValue] = self.get_valid_dv_values(do_oversample, ten_x_probe)
-
-        def current_index():
-            for i, d in enumerate(valid_values):
-                if d <= current_voltage_scale:
-                    return i
-            return 0
-
-        current_index = current_index()
-        next_index = min(max(current_index + index_offset, 0), len(valid_values) - 1)
-        return valid_values[next_index]
+        return voltage_scale_lattice(ten_x_probe).step(volts(current_voltage_scale), index_offset)
 
     def init_board_from_model(self) -> None:
         if self.board is not None:
@@ -655,6 +664,99 @@ class BoardModel(ModelBase):
                 ch.impedance = ch.impedance
                 ch.ten_x_probe = ch.ten_x_probe
 
+    def settings(self) -> BoardSettings:
+        return BoardSettings(
+            highres=self.highres,
+            mem_depth=self.mem_depth,
+            delay=self.delay,
+            f_delay=self.f_delay,
+            visual_time_scale=self.visual_time_scale,
+            trigger_on_channel=self.trigger.on_channel,
+            trigger_type=self.trigger.trigger_type,
+            trigger_tot=self.trigger.tot,
+            trigger_delta=self.trigger.delta,
+            trigger_level=self.trigger.level,
+            trigger_position=self.trigger.position,
+            trigger_auto_frequency=self.trigger.auto_frequency,
+            channels=tuple(
+                ChannelSettings(
+                    active=ch.active,
+                    offset_V=ch.offset_V,
+                    dV=ch.dV,
+                    coupling=ch.coupling,
+                    impedance=ch.impedance,
+                    ten_x_probe=ch.ten_x_probe
+                )
+                for ch in self.channel
+            )
+        )
+
+    def apply_settings(self, target: BoardSettings) -> None:
+        """
+        Brings model and the board to the target settings writing only properties that differ from the current
+        ones. Caller is responsible for disarming trigger for the duration of this call.
+        """
+        current = self.settings()
+
+        # switching between one and two channel operation requires offset and voltage scale to be rewritten
+        channel_mode_changed = False
+        for ch, (cur, tgt) in enumerate(zip(current.channels, target.channels)):
+            if cur.active != tgt.active:
+                self.channel[ch].active = tgt.active
+                channel_mode_changed = True
+
+        for ch, tgt in zip(self.channel, target.channels):
+            if ch.ten_x_probe != tgt.ten_x_probe:
+                ch.ten_x_probe = tgt.ten_x_probe
+
+            # changing 10x probe setting may have rescaled dV, hence compare with the live value
+            if channel_mode_changed or ch.dV != tgt.dV:
+                ch.dV = tgt.dV
+            if channel_mode_changed or ch.offset_V != tgt.offset_V:
+                ch.offset_V = tgt.offset_V
+            if ch.coupling != tgt.coupling:
+                ch.coupling = tgt.coupling
+            if ch.impedance != tgt.impedance:
+                ch.impedance = tgt.impedance
+
+        if current.highres != target.highres:
+            self.highres = target.highres
+        if current.mem_depth != target.mem_depth:
+            self.mem_depth = target.mem_depth
+        if current.delay != target.delay:
+            self.delay = target.delay
+        if current.f_delay != target.f_delay:
+            self.f_delay = target.f_delay
+
+        if (channel_mode_changed or
+                current.mem_depth != target.mem_depth or
+                current.visual_time_scale != target.visual_time_scale):
+            self.time_scale = self.get_next_valid_time_scale(
+                two_channel_operation=self.channel[1].active,
+                mem_depth=self.mem_depth,
+                current_value=target.visual_time_scale,
+                index_offset=0
+            )
+            self.visual_time_scale = target.visual_time_scale
+
+        if (current.mem_depth != target.mem_depth or
+                (current.trigger_on_channel, current.trigger_tot, current.trigger_delta,
+                 current.trigger_level, current.trigger_position) !=
+                (target.trigger_on_channel, target.trigger_tot, target.trigger_delta,
+                 target.trigger_level, target.trigger_position)):
+            self.trigger.set_live_trigger_properties(
+                on_channel=target.trigger_on_channel,
+                tot=target.trigger_tot,
+                delta=target.trigger_delta,
+                level=target.trigger_level,
+                position=target.trigger_position
+            )
+
+        if current.trigger_type != target.trigger_type:
+            self.trigger.trigger_type = target.trigger_type
+        if current.trigger_auto_frequency != target.trigger_auto_frequency:
+            self.trigger.auto_frequency = target.trigger_auto_frequency
+
     def is_capture_available(self) -> WaveformAvailability:
         if self.board is None:
             match self.trigger._model_trigger_type:
@@ -714,14 +816,5 @@ class BoardModel(ModelBase):
                     retval.append(None)
             return tuple(retval)
 
-    @cache
     def get_next_valid_visual_time_scale(self, current_value: Duration, index_offset: int) -> Duration:
-        def current_index():
-            for i, d in enumerate(VISUAL_TIME_PER_DIVISION):
-                if d >= current_value:
-                    return i
-            return 0
-
-        current_index = current_index()
-        next_index = min(max(current_index + index_offset, 0), len(VISUAL_TIME_PER_DIVISION) - 1)
-        return VISUAL_TIME_PER_DIVISION[next_index]
+        return VISUAL_TIME_SCALE_LATTICE.step(seconds(current_value), index_offset)
@@ -45,6 +45,11 @@ class VperDivSpinner(HSProSpinBox):
         self.setValue(self.voltage_per_division.value)
         self.setSuffix(f" {self.voltage_per_division.scale.to_str()}V/div")
 
+    def correctVoltagePerDivValue(self):
+        self.voltage_per_division = MetricValue(self.app.model.channel[self.channel].dV, Scale.UNIT, "V").optimize()
+        self.setValue(self.voltage_per_division.value)
+        self.setSuffix(f" {self.voltage_per_division.scale.to_str()}V/div")
+
     def update_due_to_10x_change(self):
         self.voltage_per_division = MetricValue(self.app.model.channel[self.channel].dV, Scale.UNIT, "V").optimize()
         self.setValue(self.voltage_per_division.value)
@@ -114,6 +119,7 @@ class ChannelsPanel(VBoxPanel):
         self.channel_coupling_cbs = []
         self.channel_impedance_cbs = []
         self.channel_10x_cbs = []
+        self.channel_config_panels = []
         self.spws = []
         self.trigger_on_labels = []
         vdiv_spinners = []
@@ -209,6 +215,7 @@ class ChannelsPanel(VBoxPanel):
                     margins=(0, 5, 0, 0)
                 ),
             ])
+            self.channel_config_panels.append(channel_config_panel)
 
             trigger_on_label = Label("")
             self.trigger_on_labels.append(trigger_on_label)
@@ -254,35 +261,45 @@ class ChannelsPanel(VBoxPanel):
         self.app.correct_dV = lambda channel: vdiv_spinners[channel].update_due_to_10x_change()
 
         def apply_checkpoint(cpt: SceneCheckpoint):
+            # Settings were already written to the board by the worker; here we only bring controls in sync
+            # without triggering their callbacks, which would otherwise issue board writes again.
             for channel, cdata in enumerate(cpt.channels):
                 # active
+                self.channel_active_cbs[channel].blockSignals(True)
                 self.channel_active_cbs[channel].setChecked(cdata.active)
+                self.channel_active_cbs[channel].blockSignals(False)
+                self.channel_config_panels[channel].setVisible(cdata.active)
+                self.app.set_channel_active_state(channel, cdata.active)
 
                 # color
                 app.model.channel[channel].color = cdata.color
                 self.channel_color_selectors[channel].setStyleSheet(
                     f"background-color:{cdata.color}; border: 1px solid black;"
                 )
-                app.model.channel[channel].color = cdata.color
                 app.set_channel_color(channel, cdata.color, False)
                 app.set_channel_color_in_zoom_window(channel, cdata.color, False)
 
-                self.app.worker.messages.put(
-                    WorkerMessage.SetChannel10x(channel, cdata.ten_x_probe, update_visual_controls=True)
-                )
-                self.app.worker.messages.put(WorkerMessage.SetVoltagePerDiv(channel, cdata.dV, True))
-                self.app.worker.messages.put(WorkerMessage.SetChannelOffset(channel, cdata.offset_V))
-                self.app.worker.messages.put(WorkerMessage.SetChannelCoupling(
-                    channel, ChannelCouplingModel.value_of(cdata.coupling), update_visual_controls=True
-                ))
-                self.app.worker.messages.put(WorkerMessage.SetChannelImpedance(
-                    channel, ChannelImpedanceModel.value_of(cdata.impedance), update_visual_controls=True
-                ))
+                self.channel_10x_cbs[channel].blockSignals(True)
+                self.channel_10x_cbs[channel].setChecked(cdata.ten_x_probe)
+                self.channel_10x_cbs[channel].blockSignals(False)
+
+                self.channel_coupling_cbs[channel].blockSignals(True)
+                self.channel_coupling_cbs[channel].setCurrentText(cdata.coupling)
+                self.channel_coupling_cbs[channel].blockSignals(False)
+
+                self.channel_impedance_cbs[channel].blockSignals(True)
+                self.channel_impedance_cbs[channel].setCurrentText(cdata.impedance)
+                self.channel_impedance_cbs[channel].blockSignals(False)
+
+                vdiv_spinners[channel].correctVoltagePerDivValue()
+                offset_spinners[channel].correctOffsetValue()
 
             app.update_trigger_lines_color(app.model.trigger.on_channel)
 
             if cpt.selected_channel > -1:
                 self.app.worker.messages.put(WorkerMessage.SelectChannel(cpt.selected_channel))
+            elif True not in [cdata.active for cdata in cpt.channels]:
+                self.app.do_remove_all_y_axis_ticks_labels()
 
         self.app.apply_checkpoint_to_channels_panel = apply_checkpoint
         self.app.update_channel_coupling = \
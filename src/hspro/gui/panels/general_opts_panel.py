@@ -4,6 +4,7 @@ from pytide6 import VBoxPanel, HBoxPanel, W
 
 from hspro.gui.app import App, WorkerMessage
 from hspro.gui.gui_ext.spin_boxes import HSProSpinBox
+from hspro.gui.scene import SceneCheckpoint
 
 
 class TimeScaleSpinner(HSProSpinBox):
@@ -23,6 +24,11 @@ class TimeScaleSpinner(HSProSpinBox):
         self.setValue(self.dT.value)
         self.setSuffix(f" {self.dT.time_unit.to_str()}/div")
 
+    def correctTimeScaleValue(self):
+        self.dT = self.app.model.visual_time_scale
+        self.setValue(self.dT.value)
+        self.setSuffix(f" {self.dT.time_unit.to_str()}/div")
+
     def dependencies_changed(self):
         self.dT = self.app.model.get_next_valid_visual_time_scale(current_value=self.dT, index_offset=0)
         self.setValue(self.dT.value)
@@ -39,6 +45,11 @@ class GeneralOptionsPanel(VBoxPanel):
         self.app.model.on_memdepth_change = time_scale_input.dependencies_changed
         self.app.model.on_channel_active_change = time_scale_input.dependencies_changed
 
+        def apply_checkpoint(cpt: SceneCheckpoint):
+            time_scale_input.correctTimeScaleValue()
+
+        self.app.apply_checkpoint_to_general_options_panel = apply_checkpoint
+
         self.layout().addWidget(QLabel("Time scale"), alignment=Qt.AlignmentFlag.AlignCenter)
         self.layout().addWidget(HBoxPanel([W(time_scale_input, alignment=Qt.AlignmentFlag.AlignCenter)], margins=0))
 
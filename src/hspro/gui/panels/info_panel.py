@@ -1,21 +1,29 @@
 import time
 
 from PySide6.QtGui import QPalette
-from PySide6.QtWidgets import QHBoxLayout, QLabel
+from PySide6.QtWidgets import QHBoxLayout, QLabel, QProgressBar
 from pytide6 import Panel, RichTextLabel
 from pytide6.palette import Palette
 
 from hspro.gui.app import App
+from hspro.gui.board_connector import BOARD_INIT_PROGRESS_STEPS
 
 
 class InfoPanel(Panel[QHBoxLayout]):
     def __init__(self, app: App):
         super().__init__(QHBoxLayout())
+        self.app = app
         self.connection_status_label = RichTextLabel("Not connected")
+        self.board_init_progress = QProgressBar()
+        self.board_init_progress.setMaximum(BOARD_INIT_PROGRESS_STEPS)
+        self.board_init_progress.setTextVisible(False)
+        self.board_init_progress.setMaximumWidth(120)
+        self.board_init_progress.setVisible(False)
         self.scene_label = RichTextLabel(f"Scene \"{app.scene.name}\" #{len(app.scene.data)}")
         self.live_info_label = QLabel()
 
         self.layout().addWidget(self.connection_status_label)
+        self.layout().addWidget(self.board_init_progress)
         self.layout().addWidget(QLabel("  |  "))
         self.layout().addWidget(self.scene_label)
         self.layout().addStretch(stretch=1)
@@ -24,6 +32,7 @@ class InfoPanel(Panel[QHBoxLayout]):
         # connect dispatching methods in App to relevant functions
         app.set_connection_status_label = self.connection_status_label.setText
         app.set_live_info_label = self.set_live_info_label
+        app.set_board_init_progress = self.set_board_init_progress
         self.last_info_label_update_time = time.time() - 1
         app.update_scene_data = lambda scene: self.scene_label.setText(f"Scene \"{scene.name}\" #{len(scene.data)}")
 
@@ -34,4 +43,12 @@ class InfoPanel(Panel[QHBoxLayout]):
         ctime = time.time()
         if ctime - self.last_info_label_update_time > 0.15:
             self.live_info_label.setText(txt)
+            self.live_info_label.setToolTip(self.app.model.shadow.summary())
             self.last_info_label_update_time = ctime
+
+    def set_board_init_progress(self, step: int | None):
+        if step is None:
+            self.board_init_progress.setVisible(False)
+        else:
+            self.board_init_progress.setValue(step)
+            self.board_init_progress.setVisible(True)
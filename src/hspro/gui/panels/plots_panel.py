@@ -1,18 +1,28 @@
 import time
 from typing import Optional
 
-from PySide6.QtCore import QPointF, Signal, QRectF
-from PySide6.QtGui import QPen, Qt, QFontDatabase, QColor, QBrush
+import numpy as np
+
+from PySide6.QtCore import QPointF, Signal, QRectF, QTimer
+from PySide6.QtGui import QPen, Qt, QFontDatabase, QColor, QBrush, QPolygonF
 from PySide6.QtWidgets import QGraphicsSceneMouseEvent
 from hspro_api import Waveform
-from pyqtgraph import AxisItem, GraphicsLayoutWidget, InfiniteLine, PlotDataItem, TextItem, mkPen, mkBrush
+from pyqtgraph import AxisItem, GraphicsLayoutWidget, InfiniteLine, PlotDataItem, ScatterPlotItem, TextItem, mkPen, \
+    mkBrush
 from pyqtgraph.Qt import QtWidgets
 from pyqtgraph.graphicsItems.PlotItem import PlotItem
 from pyqtgraph.graphicsItems.ViewBox import ViewBox
 
 from hspro.gui.app import App, WorkerMessage
+from hspro.gui.cursor import read_out
+from hspro.gui.mask import Polygon
+from hspro.gui.math_channels import MathChannels, ExpressionError
+from hspro.gui.measurement_cursors import MeasurementCursors
 from hspro.gui.gui_ext import fn
 from hspro.gui.gui_ext.arrows import XArrowDown, XArrowLeft, XArrowRight
+from hspro.gui.plot_export import PlotSnapshot, TraceSnapshot
+from hspro.gui.protocol_overlay import ProtocolDecoderOverlay
+from hspro.gui.roll import RollBuffer, RollSegment
 from hspro.gui.waveform_ext import WaveformExt
 
 
@@ -180,6 +190,8 @@ class PlotsPanel(GraphicsLayoutWidget):
                 self.zoom_crds[0][1] = pos.y()
                 self.zoomBox.setRect(self.zoom_crds[0][0], self.zoom_crds[0][1], 1, 1)
                 self.zoomBox.show()
+            elif self.drawing_mask:
+                self.add_mask_vertex(e)
             else:
                 original_mousePressEvent(e)
 
@@ -242,6 +254,8 @@ class PlotsPanel(GraphicsLayoutWidget):
                     [[(i * v_scale, f"{int(i * v_scale)}") for i in range(-10, 11)], []]
                 )
                 self.x_axis.setLabel(f"{self.app.model.visual_time_scale.time_unit.to_str()}")
+            # time unit may change while the range stays the same
+            self.update_mask_window()
 
         self.app.correct_trigger_position = correct_trigger_position
         self.trigger_pos_line.sigPositionChangeFinished.connect(self.set_trigger_pos_from_plot_line)
@@ -302,6 +316,33 @@ class PlotsPanel(GraphicsLayoutWidget):
             held_trace.setVisible(False)
             self.plot.addItem(held_trace)
 
+        # in roll mode these replace the traces, one curve per chunk of the roll buffer; each chunk is plotted
+        # against local time starting at 0 and is positioned by its age; gaps before the first frames are NaN,
+        # hence finite connection
+        self.rolling = False
+        self.roll_buffer = RollBuffer(len(self.traces))
+        self.roll_step: float | None = None
+        self.roll_x = np.arange(self.roll_buffer.chunk_size + 1, dtype=np.float64)
+        self.roll_traces = [
+            [PlotDataItem(connect="finite") for _ in range(self.roll_buffer.num_chunks)] for _ in self.traces
+        ]
+        for i, roll_chunks in enumerate(self.roll_traces):
+            for roll_trace in roll_chunks:
+                roll_trace.setPen(self.pens[i])
+                roll_trace.setVisible(False)
+                self.plot.addItem(roll_trace)
+
+        try:
+            self.math_channels = MathChannels(self.app.get_math_channel_definitions())
+        except ExpressionError:
+            self.math_channels = MathChannels([])
+        self.math_traces = [PlotDataItem() for _ in self.math_channels.definitions]
+        for math_trace in self.math_traces:
+            math_trace.setVisible(False)
+            self.plot.addItem(math_trace)
+        self.set_math_channels(self.math_channels)
+        self.app.set_math_channels = self.set_math_channels
+
         # for i, zm in enumerate(self.zero_markers):
         #     zm.setPen(self.pens[i])
         #     zm.setBrush(self.brushes[i])
@@ -362,6 +403,20 @@ class PlotsPanel(GraphicsLayoutWidget):
         self.value_label.setVisible(False)
         self.scene().addItem(self.value_label)
 
+        self.snap_cursor = self.app.app_persistence.state.get_value("snap_cursor", "false") == "true"
+        self.cursor_marker = ScatterPlotItem(size=9, symbol="o", pen=mkPen("red", width=2), brush=None)
+        self.cursor_marker.setZValue(6)
+        self.cursor_marker.setVisible(False)
+        self.plot.addItem(self.cursor_marker)
+        self.app.set_snap_cursor = self.set_snap_cursor
+
+        # mouse moves are only recorded; label is updated at most once per display refresh
+        self.cursor_scene_pos: QPointF | None = None
+        self.cursor_timer = QTimer(self)
+        self.cursor_timer.setSingleShot(True)
+        self.cursor_timer.setInterval(max(int(1000 / self.screen().refreshRate()), 1))
+        self.cursor_timer.timeout.connect(self.update_value_label)
+
         self.setMouseTracking(True)
         self.plot.scene().sigMouseMoved.connect(self.on_mouse_moved)
         self.plot.setCursor(Qt.CursorShape.CrossCursor)
@@ -371,13 +426,90 @@ class PlotsPanel(GraphicsLayoutWidget):
         self.update_trigger_lines_color(app.model.trigger.on_channel)
 
         self.app.plot_waveforms = self.plot_waveforms
+        self.app.plot_roll_segment = self.plot_roll_segment
         self.last_plotted_at = time.time()
+        # counts data updates of the traces, so that results computed from them can be cached per frame
+        self.frame_generation = 0
         self.held_waveforms = []
 
         self.app.select_channel_in_plot = self.select_channel
         self.app.replot_waveforms = self.replot_last_plotted_waveforms
         self.app.plot_held_waveforms = self.plot_held_waveforms
         self.app.show_held_waveforms = self.show_held_waveforms
+        self.app.snapshot_plot = self.snapshot_plot
+
+        self.measurement_cursors = MeasurementCursors(self.plot, self.traces, self.app, label_pos=(15, 30))
+        self.measurement_cursors.set_visible(self.app.is_showing_measurement_cursors())
+        self.app.show_measurement_cursors_in_plot = self.measurement_cursors.set_visible
+
+        self.protocol_decoder = ProtocolDecoderOverlay(self.plot, self.app)
+        self.app.set_decoder_settings = self.protocol_decoder.set_settings
+
+        # mask polygons are kept in divisions and mapped onto the visible time window
+        self.mask_pen = QPen(QColor(220, 0, 0, 160))
+        self.mask_pen.setCosmetic(True)
+        self.mask_brush = QBrush(QColor(255, 0, 0, 50))
+        self.mask_polygons: list[Polygon] = []
+        self.mask_items: list[QtWidgets.QGraphicsPolygonItem] = []
+        self.drawing_mask = False
+        self.new_mask_polygon: Polygon = []
+        self.new_mask_polygon_trace = PlotDataItem(pen=mkPen((220, 0, 0), width=1, style=Qt.PenStyle.DashLine))
+        self.plot.addItem(self.new_mask_polygon_trace)
+        self.mask_failure_traces = [PlotDataItem(), PlotDataItem()]
+        for mask_failure_trace in self.mask_failure_traces:
+            mask_failure_trace.setPen(mkPen("red", style=Qt.PenStyle.DotLine))
+            mask_failure_trace.setVisible(False)
+            self.plot.addItem(mask_failure_trace)
+        self.mask_counts_label = TextItem("", color=(0, 0, 0), border=(0, 0, 0), fill=(255, 255, 255))
+        self.mask_counts_label.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.mask_counts_label.setPos(15, 55)
+        self.mask_counts_label.setZValue(5)
+        self.mask_counts_label.setVisible(False)
+        self.scene().addItem(self.mask_counts_label)
+        self.vbox.sigXRangeChanged.connect(lambda *_: self.update_mask_window())
+        self.app.show_mask = self.show_mask
+        self.app.set_drawing_mask = self.set_drawing_mask
+        self.app.show_mask_failure = self.show_mask_failure
+        self.app.show_mask_counts = self.show_mask_counts
+        self.app.do_set_mask_polygons(self.app.get_mask_polygons())
+        self.app.do_enable_mask_test(self.app.is_mask_test_enabled())
+
+    def snapshot_plot(self) -> PlotSnapshot:
+        traces = []
+        roll_traces = [roll_trace for roll_chunks in self.roll_traces for roll_trace in roll_chunks]
+        for trace in self.held_traces + self.traces + roll_traces + self.math_traces:
+            t, v = trace.getData()
+            if trace.isVisible() and t is not None:
+                # copied, since worker reuses buffers of the traces for the next frame while export renders; roll
+                # chunks are plotted in local time and shifted by their position
+                traces.append(TraceSnapshot(
+                    trace.opts["pen"].color().name(), np.add(t, trace.pos().x()), np.array(v, copy=True)
+                ))
+
+        t_min, t_max = self.vbox.viewRange()[0]
+        channel = self.app.model.channel[self.selected_channel[0]]
+        y_ticks = [
+            (i, f"{channel.dV * i - channel.offset_V:.2f} V" if self.show_y_axis_labels_p[0] else "")
+            for i in range(-5, 6)
+        ]
+        return PlotSnapshot(
+            width_in=self.plot.width() / self.logicalDpiX(),
+            height_in=self.plot.height() / self.logicalDpiY(),
+            background="black" if self.app.app_persistence.config.get_value("plot_color_scheme") == "dark"
+            else "white",
+            grid_visible=self.grid_visible,
+            grid_opacity=self.grid_opacity,
+            t_min=t_min,
+            t_max=t_max,
+            t_per_division=self.app.model.visual_time_scale.value,
+            time_unit=self.app.model.visual_time_scale.time_unit.to_str(),
+            traces=traces,
+            y_ticks=y_ticks,
+            y_ticks_color=self.pens[self.selected_channel[0]].color().name(),
+            trigger_level=self.trigger_level_line.y() if self.trigger_level_line.isVisible() else None,
+            trigger_position=self.trigger_pos_line.x() if self.trigger_pos_line.isVisible() else None,
+            zero_line=self.zero_line.y() if self.zero_line.isVisible() else None
+        )
 
     def update_zoom_box(self):
         if self.app.current_active_tool == "Zoom":
@@ -390,21 +522,48 @@ class PlotsPanel(GraphicsLayoutWidget):
         self.update_zoom_rect.emit(rect)
 
     def on_mouse_moved(self, evt: QPointF):
-        pos = evt
-        if self.plot.sceneBoundingRect().contains(pos) and self.app.selected_channel is not None:
+        self.cursor_scene_pos = evt
+        if not self.cursor_timer.isActive():
+            self.cursor_timer.start()
+
+    def update_value_label(self):
+        pos = self.cursor_scene_pos
+        if pos is not None and self.plot.sceneBoundingRect().contains(pos) and self.app.selected_channel is not None:
             if not self.value_label.isVisible():
                 self.value_label.setVisible(True)
             mousePoint = self.plot.vb.mapSceneToView(pos)
             channel = self.app.model.channel[self.app.selected_channel]
-            v = channel.dV * mousePoint.y() + channel.offset_V
-            label = f"{v:.3f} [V] @ {mousePoint.x():.2f} [{self.app.model.visual_time_scale.time_unit.to_str()}]"
+            time_unit = self.app.model.visual_time_scale.time_unit.to_str()
+            t, v = self.traces[self.app.selected_channel].getData()
+            readout = read_out(t, v, mousePoint.x()) if self.snap_cursor else None
+            if readout is None:
+                self.cursor_marker.setVisible(False)
+                v = channel.dV * mousePoint.y() - channel.offset_V
+                label = f"{v:.3f} [V] @ {mousePoint.x():.2f} [{time_unit}]"
+            else:
+                self.cursor_marker.setData([readout.sample_t], [readout.sample_v])
+                self.cursor_marker.setVisible(True)
+                v = channel.dV * readout.interpolated_v - channel.offset_V
+                sample_v = channel.dV * readout.sample_v - channel.offset_V
+                label = (
+                    f"{v:.3f} [V] @ {mousePoint.x():.3f} [{time_unit}]  "
+                    f"sample #{readout.sample_index}: {sample_v:.3f} [V] @ {readout.sample_t:.3f} [{time_unit}]"
+                )
             self.value_label.setText(f"{label:<28}")
         elif self.value_label.isVisible():
             self.value_label.setVisible(False)
+            self.cursor_marker.setVisible(False)
+
+    def set_snap_cursor(self, snap: bool):
+        self.snap_cursor = snap
+        self.app.app_persistence.state.set_value("snap_cursor", "true" if snap else "false")
+        self.cursor_marker.setVisible(False)
 
     def leaveEvent(self, ev):
         super().leaveEvent(ev)
+        self.cursor_scene_pos = None
         self.value_label.setVisible(False)
+        self.cursor_marker.setVisible(False)
 
     def select_channel(self, channel: int):
         self.zero_line.setPen(self.pens[channel])
@@ -438,12 +597,16 @@ class PlotsPanel(GraphicsLayoutWidget):
         self.trigger_pos_line.setX(0)
 
     def channel_active_state_changed(self, channel: int, active: bool):
-        self.traces[channel].setVisible(active)
+        self.traces[channel].setVisible(active and not self.rolling)
+        for roll_trace in self.roll_traces[channel]:
+            roll_trace.setVisible(active and self.rolling)
 
     def channel_color_changed(self, channel: int, color: str, select_channel: bool):
         self.pens[channel].setColor(color)
         self.brushes[channel].setColor(color)
         self.traces[channel].setPen(self.pens[channel])
+        for roll_trace in self.roll_traces[channel]:
+            roll_trace.setPen(self.pens[channel])
         if select_channel:
             self.app.worker.messages.put(WorkerMessage.SelectChannel(channel))
         self.y_axis.setTextPen(self.pens[channel])
@@ -510,6 +673,10 @@ class PlotsPanel(GraphicsLayoutWidget):
             for i, w in enumerate(self.app.last_plotted_waveforms):
                 if w is not None:
                     self.traces[i].setData(w.get_t_vec(self.app.model.visual_time_scale.time_unit), w.vs)
+            self.frame_generation += 1
+            self.plot_math_channels(self.app.last_plotted_waveforms)
+            self.protocol_decoder.submit(tuple(self.app.last_plotted_waveforms))
+            self.measurement_cursors.new_frame(self.frame_generation)
         if self.held_waveforms != []:
             for i, w in enumerate(self.held_waveforms):
                 if w is not None:
@@ -518,10 +685,17 @@ class PlotsPanel(GraphicsLayoutWidget):
                     )
 
     def plot_waveforms(self, ws: tuple[Optional[Waveform], Optional[Waveform]], save_waveforms: bool = True):
+        if self.rolling:
+            self.set_rolling(False)
         for i, w in enumerate(ws):
             if w is not None:
                 w.apply_trigger_correction(self.corrected_trigger_position[0])
                 self.traces[i].setData(w.get_t_vec(self.app.model.visual_time_scale.time_unit), w.vs)
+        self.frame_generation += 1
+        self.plot_math_channels(ws)
+        self.protocol_decoder.submit(ws)
+        self.measurement_cursors.new_frame(self.frame_generation)
+        self.update_mask_counts()
 
         plotted_at = time.time()
         f = int(1 / (plotted_at - self.last_plotted_at))
@@ -531,6 +705,73 @@ class PlotsPanel(GraphicsLayoutWidget):
         if save_waveforms:
             self.app.record_last_plotted_waveforms(list(ws))
 
+    def set_rolling(self, rolling: bool):
+        self.rolling = rolling
+        for channel, (trace, roll_chunks) in enumerate(zip(self.traces, self.roll_traces)):
+            active = self.app.model.channel[channel].active
+            trace.setVisible(active and not rolling)
+            for roll_trace in roll_chunks:
+                roll_trace.setVisible(active and rolling)
+
+    def plot_roll_segment(self, segment: RollSegment):
+        """
+        Appends new points to the roll buffer. Only curves of the chunks the points were written into get new data,
+        all others are just moved to the left. Curves are given views of the buffer, so nothing is copied.
+        """
+        if not self.rolling:
+            self.set_rolling(True)
+        if segment.reset:
+            self.roll_buffer.clear()
+        changed_chunks = self.roll_buffer.append(segment.samples)
+
+        t_min, t_max = self.vbox.viewRange()[0]
+        step = (t_max - t_min) / (self.roll_buffer.size - 1)
+        if segment.reset or step != self.roll_step:
+            self.roll_step = step
+            self.roll_x = np.arange(self.roll_buffer.chunk_size + 1, dtype=np.float64) * step
+            changed_chunks = range(self.roll_buffer.num_chunks)
+
+        for chunk in changed_chunks:
+            samples = self.roll_buffer.chunk(chunk)
+            for channel, roll_chunks in enumerate(self.roll_traces):
+                roll_chunks[chunk].setData(self.roll_x, samples[channel])
+        # samples older than the screen end up beyond its edges and are clipped by the view
+        for chunk in range(self.roll_buffer.num_chunks):
+            x = t_max - self.roll_buffer.age(chunk) * step
+            for roll_chunks in self.roll_traces:
+                roll_chunks[chunk].setPos(x, 0)
+
+    def set_math_channels(self, math_channels: MathChannels):
+        self.math_channels = math_channels
+        for math_trace, definition in zip(self.math_traces, math_channels.definitions):
+            pen = fn.mkPen(definition.color)
+            pen.setStyle(Qt.PenStyle.DashLine)
+            math_trace.setPen(pen)
+            if not definition.enabled:
+                math_trace.setData()
+                math_trace.setVisible(False)
+
+    def plot_math_channels(self, ws):
+        """ Evaluated here rather than in worker, since waveform buffers are reused by the worker for next frame. """
+        if not any(definition.enabled for definition in self.math_channels.definitions):
+            return
+        w0 = next((w for w in ws if w is not None), None)
+        if w0 is None:
+            return
+        results = self.math_channels.evaluate(
+            samples=[None if w is None else w.vs for w in ws],
+            dVs=[0.0 if w is None else w.dV for w in ws],
+            offsets_V=[self.app.model.channel[i].offset_V for i in range(len(ws))],
+            dt_s=w0.dt_s
+        )
+        t = w0.get_t_vec(self.app.model.visual_time_scale.time_unit)
+        for math_trace, result in zip(self.math_traces, results):
+            if result is None:
+                math_trace.setVisible(False)
+            else:
+                math_trace.setData(t[:result.size], result)
+                math_trace.setVisible(True)
+
     def plot_held_waveforms(self, ws: list[Optional[WaveformExt]]):
         self.held_waveforms = ws
         for i, w in enumerate(ws):
@@ -549,6 +790,72 @@ class PlotsPanel(GraphicsLayoutWidget):
             if held_trace._dataset is not None:
                 held_trace.setVisible(show)
 
+    def update_mask_window(self):
+        t_min, t_max = self.vbox.viewRange()[0]
+        self.app.do_set_mask_time_window(t_min, t_max)
+        self.show_mask(self.mask_polygons)
+
+    def to_view(self, polygon: Polygon) -> list[tuple[float, float]]:
+        t_min, t_max = self.vbox.viewRange()[0]
+        return [(t_min + x * (t_max - t_min) / 10, y) for x, y in polygon]
+
+    def show_mask(self, polygons: list[Polygon]):
+        self.mask_polygons = polygons
+        while len(self.mask_items) < len(polygons):
+            mask_item = QtWidgets.QGraphicsPolygonItem()
+            mask_item.setPen(self.mask_pen)
+            mask_item.setBrush(self.mask_brush)
+            mask_item.setZValue(2)
+            self.plot.addItem(mask_item)
+            self.mask_items.append(mask_item)
+        for mask_item, polygon in zip(self.mask_items, polygons):
+            mask_item.setPolygon(QPolygonF([QPointF(x, y) for x, y in self.to_view(polygon)]))
+            mask_item.setVisible(True)
+        for mask_item in self.mask_items[len(polygons):]:
+            mask_item.setVisible(False)
+
+    def set_drawing_mask(self, drawing: bool):
+        self.drawing_mask = drawing
+        self.new_mask_polygon = []
+        self.new_mask_polygon_trace.setData()
+
+    def add_mask_vertex(self, e: QGraphicsSceneMouseEvent):
+        """ Left click adds vertex to the polygon being drawn; right click closes it and adds it to the mask. """
+        e.accept()
+        if e.button() == Qt.MouseButton.RightButton:
+            if len(self.new_mask_polygon) >= 3:
+                self.app.do_set_mask_polygons(self.mask_polygons + [self.new_mask_polygon])
+            self.set_drawing_mask(True)
+        elif e.button() == Qt.MouseButton.LeftButton:
+            pos = self.vbox.mapSceneToView(e.scenePos())
+            t_min, t_max = self.vbox.viewRange()[0]
+            self.new_mask_polygon.append((
+                round(10 * (pos.x() - t_min) / (t_max - t_min), 3), round(min(max(pos.y(), -5), 5), 3)
+            ))
+            vertices = self.to_view(self.new_mask_polygon)
+            self.new_mask_polygon_trace.setData([x for x, _ in vertices], [y for _, y in vertices])
+
+    def show_mask_failure(self, ws: list[Optional[WaveformExt]]):
+        for mask_failure_trace, w in zip(self.mask_failure_traces, ws + [None] * len(self.mask_failure_traces)):
+            if w is None:
+                mask_failure_trace.setData()
+                mask_failure_trace.setVisible(False)
+            else:
+                mask_failure_trace.setData(
+                    w.waveform.get_t_vec(self.app.model.visual_time_scale.time_unit), w.waveform.vs
+                )
+                mask_failure_trace.setVisible(True)
+        self.update_mask_counts()
+
+    def show_mask_counts(self, show: bool):
+        self.mask_counts_label.setVisible(show)
+        self.update_mask_counts()
+
+    def update_mask_counts(self):
+        if self.mask_counts_label.isVisible():
+            counts = self.app.mask_tester.counts()
+            self.mask_counts_label.setText(f"Mask: {counts.passed} passed, {counts.failed} failed")
+
     def resizeEvent(self, ev):
         super().resizeEvent(ev)
         if hasattr(self, "trigger_pos_marker"):
@@ -177,13 +177,26 @@ class TriggerPanel(VBoxPanel):
         self.app.set_channel_color = mk_set_ch_color()
 
         def apply_checkpoint(cpt: SceneCheckpoint):
+            # Settings were already written to the board by the worker; here we only bring controls in sync
+            # without triggering their callbacks, which would otherwise issue board writes again.
+            self.channel_selector.blockSignals(True)
             self.channel_selector.setCurrentIndex(cpt.trigger_on_channel)
+            self.channel_selector.blockSignals(False)
+
+            self.trigger_type.blockSignals(True)
             self.trigger_type.setCurrentText(cpt.trigger_type)
-            app.worker.messages.put(WorkerMessage.SetTriggerToT(cpt.trigger_tot))
-            app.worker.messages.put(WorkerMessage.SetTriggerDelta(cpt.trigger_delta))
+            self.trigger_type.blockSignals(False)
+
+            self.trigger_level.blockSignals(True)
             self.trigger_level.setValue(int(255 * (cpt.trigger_level + 1) / 2))
+            self.trigger_level.blockSignals(False)
+
+            self.trigger_position_slider.blockSignals(True)
             self.trigger_position_slider.setValue(int(cpt.trigger_position * 3999))
-            app.model.trigger.auto_frequency = cpt.trigger_auto_frequency
+            self.trigger_position_slider.blockSignals(False)
+
+            self.app.update_trigger_lines_color(cpt.trigger_on_channel)
+            self.update_trigger_type_controls(TriggerTypeModel.value_of(cpt.trigger_type))
 
         self.app.apply_checkpoint_to_trigger_panel = apply_checkpoint
 
@@ -235,7 +248,10 @@ class TriggerPanel(VBoxPanel):
         self.app.worker.messages.put(WorkerMessage.SetTriggerType(
             self.app.model.trigger.trigger_type.to_trigger_type()
         ))
-        if self.app.model.trigger.trigger_type == TriggerTypeModel.EXTERNAL_SIGNAL:
+        self.update_trigger_type_controls(self.app.model.trigger.trigger_type)
+
+    def update_trigger_type_controls(self, trigger_type: TriggerTypeModel):
+        if trigger_type == TriggerTypeModel.EXTERNAL_SIGNAL:
             self.trigger_level.setEnabled(False)
             self.channel_selector.setEnabled(False)
             self.set_trigger_level_line_visible(False)
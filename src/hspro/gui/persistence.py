@@ -0,0 +1,142 @@
+import threading
+import time
+from typing import Any, Callable
+
+from sprats.config import AppPersistence
+
+
+class WriteBehindStore:
+    """
+    In-memory layer over one of the stores of AppPersistence. Updates are recorded in memory and returned by
+    subsequent reads right away, while writing them to the underlying store is left to the background flusher.
+    Flushing only swaps pending updates out under the lock and writes them after releasing it; until written they
+    stay readable as in-flight updates, so that setters and getters never wait on disk.
+    """
+
+    def __init__(self, store, lock: threading.RLock, on_update: Callable[[], None]):
+        self.__store = store
+        self.__lock = lock
+        # serializes writes into the underlying store, which happen without holding the lock
+        self.__write_lock = threading.Lock()
+        self.__on_update = on_update
+        # both keyed by xpath, so that value set by a plain top level key is visible under its xpath and vice versa
+        self.__pending: dict[str, tuple[Callable[[str, Any], None], str, Any]] = {}
+        self.__in_flight: dict[str, tuple[Callable[[str, Any], None], str, Any]] = {}
+
+    @staticmethod
+    def __xpath(key: str) -> str:
+        return key if key.startswith("/") else f"/{key}"
+
+    def __unwritten_value(self, key: str) -> tuple[bool, Any]:
+        xpath = self.__xpath(key)
+        with self.__lock:
+            update = self.__pending.get(xpath) or self.__in_flight.get(xpath)
+            return (False, None) if update is None else (True, update[2])
+
+    def __put(self, key: str, write: Callable[[str, Any], None], value: Any) -> None:
+        with self.__lock:
+            self.__pending[self.__xpath(key)] = (write, key, value)
+        self.__on_update()
+
+    def get_by_xpath(self, xpath: str, clazz: type | None = None) -> Any:
+        found, value = self.__unwritten_value(xpath)
+        if found:
+            return value
+        with self.__lock:
+            return self.__store.get_by_xpath(xpath) if clazz is None else self.__store.get_by_xpath(xpath, clazz)
+
+    def set_by_xpath(self, xpath: str, value: Any) -> None:
+        self.__put(xpath, self.__store.set_by_xpath, value)
+
+    def get_value(self, key: str, default_or_clazz: Any = None) -> Any:
+        found, value = self.__unwritten_value(key)
+        if found:
+            return value
+        with self.__lock:
+            if default_or_clazz is None:
+                return self.__store.get_value(key)
+            return self.__store.get_value(key, default_or_clazz)
+
+    def set_value(self, key: str, value: Any) -> None:
+        self.__put(key, self.__store.set_value, value)
+
+    def flush(self) -> None:
+        with self.__write_lock:
+            with self.__lock:
+                self.__in_flight, self.__pending = self.__pending, {}
+            try:
+                for write, key, value in self.__in_flight.values():
+                    write(key, value)
+            finally:
+                with self.__lock:
+                    self.__in_flight = {}
+
+    def __getattr__(self, name: str) -> Any:
+        # everything else (e.g. save_geometry) goes to the underlying store directly
+        attr = getattr(self.__store, name)
+        if not callable(attr):
+            return attr
+
+        def locked_call(*args, **kwargs):
+            with self.__write_lock, self.__lock:
+                return attr(*args, **kwargs)
+
+        return locked_call
+
+
+class WriteBehindPersistence:
+    """
+    Wraps AppPersistence so that config and state updates never wait on disk. Updates are collected in memory and
+    written out by a background thread once no further updates arrived for `delay_s` seconds, which turns a burst
+    of slider or spinner updates into a single write. `close()` must be called on exit to write out the remainder.
+    """
+
+    def __init__(self, persistence: AppPersistence, delay_s: float = 0.5):
+        self.persistence = persistence
+        self.delay_s = delay_s
+        self.__lock = threading.RLock()
+        self.__wake_up = threading.Condition()
+        self.__last_update_time: float | None = None
+        self.__closed = False
+
+        self.config = WriteBehindStore(persistence.config, self.__lock, self.__updated)
+        self.state = WriteBehindStore(persistence.state, self.__lock, self.__updated)
+
+        self.__flusher = threading.Thread(target=self.__run_flusher, name="hspro-persistence-flusher", daemon=True)
+        self.__flusher.start()
+
+    def __updated(self) -> None:
+        with self.__wake_up:
+            self.__last_update_time = time.monotonic()
+            self.__wake_up.notify()
+
+    def __run_flusher(self) -> None:
+        while True:
+            with self.__wake_up:
+                while self.__last_update_time is None and not self.__closed:
+                    self.__wake_up.wait()
+                if self.__closed:
+                    return
+
+                # wait until updates settle down
+                quiet_time = time.monotonic() - self.__last_update_time
+                if quiet_time < self.delay_s:
+                    self.__wake_up.wait(self.delay_s - quiet_time)
+                    continue
+                self.__last_update_time = None
+
+            self.flush()
+
+    def flush(self) -> None:
+        self.config.flush()
+        self.state.flush()
+
+    def close(self) -> None:
+        with self.__wake_up:
+            self.__closed = True
+            self.__wake_up.notify()
+        self.__flusher.join()
+        self.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.persistence, name)
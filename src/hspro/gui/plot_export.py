@@ -0,0 +1,214 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from PySide6.QtCore import QMarginsF, QObject, QPointF, QRectF, QRunnable, QSize, QSizeF, Qt, Signal
+from PySide6.QtGui import QColor, QFont, QImage, QPageSize, QPainter, QPdfWriter, QPen
+from pyqtgraph import arrayToQPath
+
+from hspro.gui.decimate import min_max_decimate
+
+# resolution at which vector output is laid out; line widths and fonts are given relative to it
+SCREEN_DPI = 96
+
+
+@dataclass
+class TraceSnapshot:
+    color: str
+    # time in visual time units and samples in vertical divisions
+    t: np.ndarray
+    v: np.ndarray
+
+
+@dataclass
+class PlotSnapshot:
+    """ Everything needed to draw the main plot, captured on GUI thread so that rendering can run on any thread. """
+    width_in: float
+    height_in: float
+    background: str
+    grid_visible: bool
+    grid_opacity: float
+    t_min: float
+    t_max: float
+    t_per_division: float
+    time_unit: str
+    traces: list[TraceSnapshot]
+    y_ticks: list[tuple[float, str]]
+    y_ticks_color: str
+    trigger_level: float | None
+    trigger_position: float | None
+    zero_line: float | None
+
+
+class PlotRenderer:
+    """
+    Draws plot snapshot with QPainter onto any paint device. Raster output draws min/max envelope of each trace
+    decimated to one bucket per pixel column, which looks the same as full data at a fraction of the cost,
+    while vector output draws every sample, so that it can be zoomed into.
+    """
+
+    def __init__(self, snapshot: PlotSnapshot, dpi: float, decimate: bool):
+        self.snapshot = snapshot
+        self.dpi = dpi
+        self.decimate = decimate
+        self.width = round(snapshot.width_in * dpi)
+        self.height = round(snapshot.height_in * dpi)
+        self.foreground = QColor("white" if snapshot.background == "black" else "black")
+
+    def px(self, screen_px: float) -> float:
+        return screen_px * self.dpi / SCREEN_DPI
+
+    def render(self, painter: QPainter) -> None:
+        s = self.snapshot
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing, True)
+        painter.fillRect(QRectF(0, 0, self.width, self.height), QColor(s.background))
+
+        font = QFont()
+        font.setPixelSize(round(self.px(11)))
+        painter.setFont(font)
+        left = self.px(70) if any(label != "" for _, label in s.y_ticks) else self.px(20)
+        plot = QRectF(left, self.px(10), self.width - left - self.px(15), self.height - self.px(50))
+
+        def x_of(t):
+            return plot.left() + (t - s.t_min) / (s.t_max - s.t_min) * plot.width()
+
+        def y_of(v):
+            return plot.top() + (5 - v) / 10 * plot.height()
+
+        painter.save()
+        painter.setClipRect(plot)
+        for trace in s.traces:
+            self.draw_trace(painter, trace, plot, x_of, y_of)
+        for y, color in [(s.zero_line, s.y_ticks_color), (s.trigger_level, "blue")]:
+            if y is not None:
+                self.draw_line(painter, QPointF(plot.left(), y_of(y)), QPointF(plot.right(), y_of(y)), color, True)
+        if s.trigger_position is not None:
+            x = x_of(s.trigger_position)
+            self.draw_line(painter, QPointF(x, plot.top()), QPointF(x, plot.bottom()), "blue", True)
+        painter.restore()
+
+        grid_color = QColor(self.foreground)
+        grid_color.setAlphaF(s.grid_opacity if s.grid_visible else 0)
+        pen = QPen(grid_color, self.px(1))
+        painter.setPen(pen)
+        for i in range(1, 10):
+            x = plot.left() + i * plot.width() / 10
+            y = plot.top() + i * plot.height() / 10
+            painter.drawLine(QPointF(x, plot.top()), QPointF(x, plot.bottom()))
+            painter.drawLine(QPointF(plot.left(), y), QPointF(plot.right(), y))
+
+        painter.setPen(QPen(self.foreground, self.px(1)))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawRect(plot)
+
+        label_height = self.px(16)
+        for i in range(-10, 11):
+            t = i * s.t_per_division
+            if s.t_min - 1e-9 * s.t_per_division <= t <= s.t_max + 1e-9 * s.t_per_division:
+                painter.drawText(
+                    QRectF(x_of(t) - self.px(30), plot.bottom() + self.px(4), self.px(60), label_height),
+                    Qt.AlignmentFlag.AlignCenter, f"{int(t)}"
+                )
+        painter.drawText(
+            QRectF(plot.left(), plot.bottom() + self.px(4) + label_height, plot.width(), label_height),
+            Qt.AlignmentFlag.AlignCenter, s.time_unit
+        )
+
+        painter.setPen(QPen(QColor(s.y_ticks_color), self.px(1)))
+        for y, label in s.y_ticks:
+            painter.drawText(
+                QRectF(0, y_of(y) - label_height / 2, left - self.px(5), label_height),
+                Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, label
+            )
+
+    def draw_trace(self, painter: QPainter, trace: TraceSnapshot, plot: QRectF, x_of, y_of) -> None:
+        painter.setPen(QPen(QColor(trace.color), self.px(1)))
+        if trace.v.size == 0:
+            return
+        if self.decimate and trace.v.size > 2 * plot.width():
+            num_buckets = max(int(plot.width()), 1)
+            v_min, v_max = min_max_decimate(trace.v, num_buckets)
+            bucket_starts = (np.arange(num_buckets) * trace.v.size) // num_buckets
+            t = trace.t[bucket_starts]
+            # zig-zag between minimum and maximum of consecutive buckets draws vertical span of each one
+            xs = np.repeat(x_of(t), 2)
+            ys = np.empty(2 * num_buckets)
+            ys[0::2] = y_of(v_min)
+            ys[1::2] = y_of(v_max)
+        else:
+            xs = x_of(trace.t)
+            ys = y_of(trace.v)
+        # path is filled from the arrays directly; gaps (NaN) of roll traces are left out as on screen
+        painter.drawPath(arrayToQPath(xs, ys, connect="finite"))
+
+    def draw_line(self, painter: QPainter, p1: QPointF, p2: QPointF, color: str, dashed: bool) -> None:
+        pen = QPen(QColor(color), self.px(1))
+        if dashed:
+            pen.setStyle(Qt.PenStyle.DashLine)
+        painter.setPen(pen)
+        painter.drawLine(p1, p2)
+
+
+def render_to_file(snapshot: PlotSnapshot, path: Path, dpi: int) -> None:
+    """ Renders into raster image at given resolution or into SVG/PDF depending on file suffix. """
+    suffix = path.suffix.lower()
+    if suffix == ".svg":
+        from PySide6.QtSvg import QSvgGenerator
+
+        renderer = PlotRenderer(snapshot, SCREEN_DPI, decimate=False)
+        generator = QSvgGenerator()
+        generator.setFileName(f"{path}")
+        generator.setResolution(SCREEN_DPI)
+        generator.setSize(QSize(renderer.width, renderer.height))
+        generator.setViewBox(QRectF(0, 0, renderer.width, renderer.height))
+        generator.setTitle("Haasoscope Pro plot")
+        paint(renderer, generator)
+
+    elif suffix == ".pdf":
+        renderer = PlotRenderer(snapshot, dpi, decimate=False)
+        writer = QPdfWriter(f"{path}")
+        writer.setResolution(dpi)
+        writer.setPageSize(QPageSize(QSizeF(snapshot.width_in, snapshot.height_in), QPageSize.Unit.Inch))
+        writer.setPageMargins(QMarginsF(0, 0, 0, 0))
+        paint(renderer, writer)
+
+    else:
+        renderer = PlotRenderer(snapshot, dpi, decimate=True)
+        image = QImage(renderer.width, renderer.height, QImage.Format.Format_ARGB32_Premultiplied)
+        image.setDotsPerMeterX(round(dpi / 0.0254))
+        image.setDotsPerMeterY(round(dpi / 0.0254))
+        paint(renderer, image)
+        if not image.save(f"{path}"):
+            raise RuntimeError("Unsupported image format or insufficient permissions")
+
+
+def paint(renderer: PlotRenderer, device) -> None:
+    painter = QPainter(device)
+    try:
+        renderer.render(painter)
+    finally:
+        painter.end()
+
+
+class PlotExportSignals(QObject):
+    finished = Signal(str)
+    failed = Signal(str)
+
+
+class PlotExportTask(QRunnable):
+    """ Renders plot snapshot into file off the GUI thread, so that live acquisition keeps being displayed. """
+
+    def __init__(self, snapshot: PlotSnapshot, path: Path, dpi: int):
+        super().__init__()
+        self.setAutoDelete(True)
+        self.snapshot = snapshot
+        self.path = path
+        self.dpi = dpi
+        self.signals = PlotExportSignals()
+
+    def run(self):
+        try:
+            render_to_file(self.snapshot, self.path, self.dpi)
+            self.signals.finished.emit(f"{self.path.absolute()}")
+        except Exception as ex:
+            self.signals.failed.emit(f"{ex}")
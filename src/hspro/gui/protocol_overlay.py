@@ -0,0 +1,145 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtGui import QFontDatabase
+from hspro_api import Waveform
+from pyqtgraph import TextItem
+from pyqtgraph.graphicsItems.PlotItem import PlotItem
+
+from hspro.gui.control_lattice import seconds
+from hspro.gui.decoders import Annotation, DecoderSettings, LogicTrace, Protocol, decode
+
+# annotations beyond this number in one frame are not drawn
+MAX_ANNOTATIONS = 256
+
+# vertical position of annotations in divisions
+ANNOTATIONS_Y = 4.9
+
+
+@dataclass
+class DecodeJob:
+    settings: DecoderSettings
+    logic: list[LogicTrace]
+    dt_s: float
+    # time of the first sample and time between samples in visual time units
+    t_0: float
+    t_step: float
+
+
+@dataclass
+class DecodeResult:
+    job: DecodeJob
+    annotations: list[Annotation]
+    # set if decoder failed, in which case there are no annotations
+    error: Optional[str] = None
+
+
+class DecodeTaskSignals(QObject):
+    decoded = Signal(object)
+
+
+class DecodeTask(QRunnable):
+    def __init__(self, job: DecodeJob):
+        super().__init__()
+        self.setAutoDelete(True)
+        self.job = job
+        self.signals = DecodeTaskSignals()
+
+    def run(self):
+        try:
+            result = DecodeResult(self.job, decode(self.job.settings, self.job.logic, self.job.dt_s))
+        except Exception as ex:
+            # reported on the plot; printing it would repeat for every frame
+            result = DecodeResult(self.job, [], f"{type(ex).__name__}: {ex}")
+        self.signals.decoded.emit(result)
+
+
+class ProtocolDecoderOverlay:
+    """
+    Decodes every plotted frame in a background thread and shows decoded bytes as labels at the top of the plot.
+    Only one frame is decoded at a time; if frames arrive faster than they are decoded, only the latest one waits
+    for its turn. Channels are converted into packed logic on GUI thread, which is cheap and leaves background thread
+    with data that are not shared with acquisition.
+    """
+
+    def __init__(self, plot: PlotItem, app):
+        from hspro.gui.app import App
+        self.app: App = app
+        self.plot = plot
+        self.settings: DecoderSettings = app.get_decoder_settings()
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(1)
+        self.busy = False
+        self.pending_job: Optional[DecodeJob] = None
+        self.labels: list[TextItem] = []
+        self.font = QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont)
+
+    def set_settings(self, settings: DecoderSettings) -> None:
+        self.settings = settings
+        self.pending_job = None
+        self.show_annotations([], 0, 0)
+
+    def submit(self, ws: tuple[Optional[Waveform], ...]) -> None:
+        if self.settings.protocol == Protocol.NONE:
+            return
+
+        waveforms = [ws[channel] if channel < len(ws) else None for channel in self.settings.channels]
+        if any(wf is None for wf in waveforms):
+            self.show_annotations([], 0, 0)
+            return
+
+        logic = []
+        for channel, wf in zip(self.settings.channels, waveforms):
+            # samples are in vertical divisions
+            threshold = (self.settings.threshold_V + self.app.model.channel[channel].offset_V) / wf.dV
+            logic.append(LogicTrace(wf.vs, threshold))
+
+        wf = waveforms[0]
+        visual_time_scale = self.app.model.visual_time_scale
+        t_unit_s = seconds(visual_time_scale) / visual_time_scale.value
+        job = DecodeJob(
+            settings=self.settings,
+            logic=logic,
+            dt_s=wf.dt_s,
+            t_0=-wf.dt_s * wf.trigger_pos / t_unit_s,
+            t_step=wf.dt_s / t_unit_s
+        )
+        if self.busy:
+            self.pending_job = job
+        else:
+            self.start(job)
+
+    def start(self, job: DecodeJob) -> None:
+        self.busy = True
+        task = DecodeTask(job)
+        task.signals.decoded.connect(self.on_decoded)
+        self.pool.start(task)
+
+    def on_decoded(self, result: DecodeResult) -> None:
+        self.busy = False
+        if result.job.settings == self.settings:
+            if result.error is None:
+                self.show_annotations(result.annotations, result.job.t_0, result.job.t_step)
+            else:
+                # shown in place of annotations, so that a failing decoder does not look like a quiet bus
+                self.show_annotations([Annotation(0, 0, f"Decoder error: {result.error}")], result.job.t_0, 0)
+        if self.pending_job is not None:
+            job, self.pending_job = self.pending_job, None
+            self.start(job)
+
+    def show_annotations(self, annotations: list[Annotation], t_0: float, t_step: float) -> None:
+        annotations = annotations[:MAX_ANNOTATIONS]
+        while len(self.labels) < len(annotations):
+            label = TextItem("", color=(0, 0, 0), border=(0, 160, 0), fill=(220, 255, 220, 220), anchor=(0, 0))
+            label.setFont(self.font)
+            label.setZValue(7)
+            self.plot.addItem(label)
+            self.labels.append(label)
+
+        for label, annotation in zip(self.labels, annotations):
+            label.setText(annotation.text)
+            label.setPos(t_0 + annotation.start * t_step, ANNOTATIONS_Y)
+            label.setVisible(True)
+        for label in self.labels[len(annotations):]:
+            label.setVisible(False)
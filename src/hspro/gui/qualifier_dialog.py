@@ -0,0 +1,102 @@
+from PySide6.QtWidgets import QDoubleSpinBox, QFileDialog, QLabel, QLineEdit
+from pytide6 import Dialog, VBoxLayout, PushButton, HBoxPanel, W, ComboBox
+
+from hspro.gui.app import App
+from hspro.gui.qualifiers import QualifierAction, QualifierKind, QualifierSettings
+
+
+def mk_spin_box(value: float, minimum: float, maximum: float, suffix: str) -> QDoubleSpinBox:
+    spin_box = QDoubleSpinBox()
+    spin_box.setDecimals(3)
+    spin_box.setMinimum(minimum)
+    spin_box.setMaximum(maximum)
+    spin_box.setValue(value)
+    spin_box.setSuffix(suffix)
+    return spin_box
+
+
+class QualifierDialog(Dialog):
+    def __init__(self, parent, app: App):
+        super().__init__(parent, windowTitle="Software trigger", modal=True)
+
+        settings = app.get_qualifier_settings()
+
+        kind_cbox = ComboBox(
+            items=[kind.value for kind in QualifierKind],
+            current_selection=settings.kind.value,
+            min_width=100
+        )
+        channel_cbox = ComboBox(
+            items=[f"CH{channel + 1}" for channel in app.channels],
+            current_selection=f"CH{settings.channel + 1}",
+            min_width=100
+        )
+        polarity_cbox = ComboBox(
+            items=["Positive", "Negative"],
+            current_selection="Positive" if settings.positive else "Negative",
+            min_width=100
+        )
+        threshold_sb = mk_spin_box(settings.threshold_V, -100, 100, " V")
+        low_threshold_sb = mk_spin_box(settings.low_threshold_V, -100, 100, " V")
+        min_width_sb = mk_spin_box(settings.min_width_s * 1e9, 0, 1e9, " ns")
+        max_width_sb = mk_spin_box(settings.max_width_s * 1e9, 0, 1e9, " ns")
+        action_cbox = ComboBox(
+            items=[action.value for action in QualifierAction],
+            current_selection=settings.action.value,
+            min_width=100
+        )
+        save_dir_edit = QLineEdit(settings.save_dir)
+        save_dir_edit.setPlaceholderText("Matching frames are not saved")
+        save_dir_edit.setMinimumWidth(250)
+
+        def choose_save_dir():
+            save_dir = QFileDialog.getExistingDirectory(self, "Save matching frames into", save_dir_edit.text())
+            if save_dir != "":
+                save_dir_edit.setText(save_dir)
+
+        def update_controls():
+            kind = QualifierKind.value_of(kind_cbox.currentText())
+            for control in [channel_cbox, polarity_cbox, threshold_sb, action_cbox, save_dir_edit]:
+                control.setEnabled(kind != QualifierKind.NONE)
+            low_threshold_sb.setEnabled(kind == QualifierKind.RUNT)
+            min_width_sb.setEnabled(kind in [QualifierKind.GLITCH, QualifierKind.PULSE_WIDTH])
+            max_width_sb.setEnabled(kind == QualifierKind.PULSE_WIDTH)
+
+        kind_cbox.currentTextChanged.connect(update_controls)
+        update_controls()
+
+        def on_ok():
+            new_settings = QualifierSettings(
+                kind=QualifierKind.value_of(kind_cbox.currentText()),
+                channel=channel_cbox.currentIndex(),
+                positive=polarity_cbox.currentText() == "Positive",
+                threshold_V=threshold_sb.value(),
+                low_threshold_V=low_threshold_sb.value(),
+                min_width_s=min_width_sb.value() * 1e-9,
+                max_width_s=max_width_sb.value() * 1e-9,
+                action=QualifierAction.value_of(action_cbox.currentText()),
+                save_dir=save_dir_edit.text().strip()
+            )
+            if new_settings != settings:
+                app.do_set_qualifier_settings(new_settings)
+            self.close()
+
+        self.setLayout(VBoxLayout([
+            HBoxPanel([kind_cbox, QLabel("Qualifier")], margins=0),
+            HBoxPanel([channel_cbox, QLabel("Source")], margins=0),
+            HBoxPanel([polarity_cbox, QLabel("Pulse polarity")], margins=0),
+            HBoxPanel([threshold_sb, QLabel("Threshold (upper one for runts, limit for amplitude)")], margins=0),
+            HBoxPanel([low_threshold_sb, QLabel("Lower threshold of runts")], margins=0),
+            HBoxPanel([min_width_sb, QLabel("Glitches and pulses narrower than this match")], margins=0),
+            HBoxPanel([max_width_sb, QLabel("Pulses wider than this match")], margins=0),
+            HBoxPanel([action_cbox, QLabel("On match")], margins=0),
+            HBoxPanel([
+                W(save_dir_edit, stretch=1), PushButton("Browse...", on_clicked=choose_save_dir)
+            ], margins=0),
+
+            HBoxPanel([
+                W(HBoxPanel(), stretch=1),
+                PushButton("Ok", on_clicked=on_ok),
+                PushButton("Cancel", on_clicked=self.close)
+            ])
+        ]))
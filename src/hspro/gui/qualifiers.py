@@ -0,0 +1,147 @@
+"""
+Software trigger qualification of acquired frames.
+
+Hardware trigger only fires on a level crossing. Qualifiers are evaluated on every acquired frame by the worker and
+catch rare events: pulses with width out of range, glitches, runts and amplitude over a limit. Thresholds are
+converted into vertical divisions once per frame, so that samples are compared as they are. Pulses are found from
+the indices of threshold transitions given by a single `np.flatnonzero`, and runts by the maximum of each excursion
+over the lower threshold with `np.maximum.reduceat`, so no Python loop runs over samples or pulses.
+"""
+from dataclasses import dataclass
+from enum import Enum
+
+import numpy as np
+
+
+class QualifierKind(Enum):
+    NONE = "None"
+    PULSE_WIDTH = "Pulse width"
+    GLITCH = "Glitch"
+    RUNT = "Runt"
+    AMPLITUDE = "Amplitude"
+
+    @staticmethod
+    def value_of(value: str) -> "QualifierKind":
+        for kind in QualifierKind:
+            if kind.value == value:
+                return kind
+        raise ValueError(f"Unknown qualifier {value}")
+
+
+class QualifierAction(Enum):
+    # show matching frame as held traces and keep acquiring
+    HOLD = "Hold"
+    # disarm trigger leaving matching frame on the screen
+    STOP = "Stop"
+
+    @staticmethod
+    def value_of(value: str) -> "QualifierAction":
+        for action in QualifierAction:
+            if action.value == value:
+                return action
+        raise ValueError(f"Unknown qualifier action {value}")
+
+
+@dataclass(frozen=True)
+class QualifierSettings:
+    kind: QualifierKind = QualifierKind.NONE
+    channel: int = 0
+    # pulses are excursions above the threshold when positive and below it otherwise
+    positive: bool = True
+    # pulse threshold, upper threshold of runts or amplitude limit
+    threshold_V: float = 1.65
+    # lower threshold of runts; negative runts fall below the threshold without reaching it
+    low_threshold_V: float = 0.5
+    # pulses narrower than min_width_s are glitches; pulse width qualifier also matches pulses wider than max_width_s
+    min_width_s: float = 10e-9
+    max_width_s: float = 1e-6
+    action: QualifierAction = QualifierAction.HOLD
+    # matching frames are saved into this directory unless empty
+    save_dir: str = ""
+
+    @classmethod
+    def value_of(cls, json_data) -> "QualifierSettings":
+        return QualifierSettings(
+            kind=QualifierKind.value_of(json_data["kind"]),
+            channel=json_data["channel"],
+            positive=json_data["positive"],
+            threshold_V=json_data["threshold_V"],
+            low_threshold_V=json_data["low_threshold_V"],
+            min_width_s=json_data["min_width_s"],
+            max_width_s=json_data["max_width_s"],
+            action=QualifierAction.value_of(json_data["action"]),
+            save_dir=json_data.get("save_dir", ""),
+        )
+
+    def to_json(self) -> dict:
+        return {
+            "kind": self.kind.value,
+            "channel": self.channel,
+            "positive": self.positive,
+            "threshold_V": self.threshold_V,
+            "low_threshold_V": self.low_threshold_V,
+            "min_width_s": self.min_width_s,
+            "max_width_s": self.max_width_s,
+            "action": self.action.value,
+            "save_dir": self.save_dir,
+        }
+
+
+def pulses(above: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Indices of first and one past last sample of complete pulses, i.e. runs of True samples with a transition at both
+    ends. Pulses cut by the start or the end of the frame are left out, since their width is not known.
+    """
+    edges = np.flatnonzero(above[1:] != above[:-1]) + 1
+    if edges.size > 0 and not above[edges[0]]:
+        edges = edges[1:]
+    num_pulses = edges.size // 2
+    return edges[0:2 * num_pulses:2], edges[1:2 * num_pulses:2]
+
+
+def pulse_widths(v: np.ndarray, threshold: float) -> np.ndarray:
+    """ Widths of complete pulses above threshold in samples. """
+    starts, ends = pulses(v > threshold)
+    return ends - starts
+
+
+def has_runt(v: np.ndarray, low_threshold: float, high_threshold: float) -> bool:
+    """ True if signal rises over the lower threshold and falls back below it without reaching the upper one. """
+    starts, ends = pulses(v > low_threshold)
+    if starts.size == 0:
+        return False
+    # maxima over [start, end) of each pulse are at even positions, the odd ones are maxima between pulses
+    bounds = np.empty(2 * starts.size, dtype=np.int64)
+    bounds[0::2] = starts
+    bounds[1::2] = ends
+    maxima = np.maximum.reduceat(v, bounds)[0::2]
+    return bool((maxima < high_threshold).any())
+
+
+def qualify(settings: QualifierSettings, vs, dV: float, offset_V: float, dt_s: float) -> bool:
+    """ Returns True if samples given in vertical divisions match the qualifier. """
+    if settings.kind == QualifierKind.NONE or dV == 0:
+        return False
+
+    v = np.asarray(vs)
+    if v.size == 0:
+        return False
+    threshold = (settings.threshold_V + offset_V) / dV
+    low_threshold = (settings.low_threshold_V + offset_V) / dV
+    if not settings.positive:
+        # negative pulses are positive pulses of the inverted signal
+        v = -v
+        threshold, low_threshold = -threshold, -low_threshold
+
+    match settings.kind:
+        case QualifierKind.AMPLITUDE:
+            return bool(v.max() > threshold)
+        case QualifierKind.GLITCH:
+            return bool((pulse_widths(v, threshold) * dt_s < settings.min_width_s).any())
+        case QualifierKind.PULSE_WIDTH:
+            widths_s = pulse_widths(v, threshold) * dt_s
+            return bool(((widths_s < settings.min_width_s) | (widths_s > settings.max_width_s)).any())
+        case QualifierKind.RUNT:
+            # negative runts start at the threshold and fail to reach the lower threshold
+            return has_runt(v, *sorted((low_threshold, threshold)))
+    return False
@@ -0,0 +1,478 @@
+"""
+Remote control of the running GUI over local TCP connections.
+
+Command port accepts SCPI-style text commands, one per line, e.g. `:TIM:SCAL 1 us` or `:CHAN1:SCAL?`. Mnemonics may be
+given in short (upper case part) or long form and are case-insensitive; channels are numbered from 1. Commands
+are executed by the GUI worker exactly as if controls were changed in GUI, and controls are then updated to show new
+settings. Queries are answered with one line; errors are queued and read with `:SYST:ERR?`.
+
+Data port (command port + 1) streams every acquired frame to each connected client. Each message is
+a little-endian uint32 length of the rest of the message followed by frame header and, for each captured channel,
+channel header and samples. Samples are float32 or int16 (see `:DATA:FORM`); multiplying them by the sample scale
+given in channel header yields vertical divisions and voltage is `divisions * dV - offset_V`. Frames are dropped
+for clients that do not keep up rather than slowing down acquisition.
+"""
+import re
+import socket
+import socketserver
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from queue import Queue, Full
+from typing import Callable, Optional
+
+import numpy as np
+from hspro_api import Waveform
+from unlib import Duration, MetricValue, Scale
+
+from hspro.gui.app import App, WorkerMessage
+from hspro.gui.control_lattice import seconds
+from hspro.gui.metrics import METRICS
+from hspro.gui.model import ChannelCouplingModel, ChannelImpedanceModel, TriggerTypeModel
+
+DEFAULT_COMMAND_PORT = 5025
+
+# seconds to wait for worker to process a command
+COMMAND_TIMEOUT_S = 10
+
+# frames queued for a data client that does not keep up before further frames are dropped
+MAX_QUEUED_FRAMES = 4
+
+# frame number, capture time in seconds since epoch, sample format, number of channel records
+FRAME_HEADER = struct.Struct("<QdBB")
+
+# channel number, dt_s, dV, offset_V, sample scale (divisions per sample unit), trigger position (sample index),
+# trigger level V, number of samples
+CHANNEL_HEADER = struct.Struct("<Bddddqdi")
+
+LENGTH_PREFIX = struct.Struct("<I")
+
+
+class SampleFormat:
+    FLOAT32 = 0
+    INT16 = 1
+
+    NAMES = {"FLOAT32": FLOAT32, "INT16": INT16}
+
+    # int16 samples cover +/- 10 vertical divisions, i.e. twice the visible screen height
+    INT16_SCALE = 10 / 32767
+
+
+class RemoteCommandError(Exception):
+    pass
+
+
+@dataclass
+class Command:
+    # e.g. "CHANnel#:SCALe" where upper case part is the short form and '#' stands for channel number
+    pattern: str
+    # called with channel number (if any) and argument string; returns answer for queries
+    handler: Callable[[Optional[int], str], Optional[str]]
+    query: bool
+
+    def match(self, header: str) -> Optional[tuple[bool, Optional[int]]]:
+        """ Returns (matched, channel) if header names this command. """
+        header_parts = header.lstrip(":").upper().split(":")
+        pattern_parts = self.pattern.split(":")
+        if len(header_parts) != len(pattern_parts):
+            return None
+        channel = None
+        for h, p in zip(header_parts, pattern_parts):
+            if p.endswith("#"):
+                m = re.fullmatch(r"([A-Z]+)(\d+)", h)
+                if m is None:
+                    return None
+                h, channel = m.group(1), int(m.group(2))
+                p = p[:-1]
+            short_form = "".join(c for c in p if c.isupper() or c == "*")
+            if h != short_form and h != p.upper():
+                return None
+        return True, channel
+
+
+class CommandInterpreter:
+    def __init__(self, app: App, server: "RemoteControlServer"):
+        self.app = app
+        self.server = server
+        self.commands: list[Command] = []
+
+        model = app.model
+
+        self.add_query("*IDN", lambda ch, arg: f"Haasoscope,HaasoscopePro,{model.board_id or 0},hspro")
+        self.add_query("*OPC", lambda ch, arg: "1")
+
+        self.add_command("RUN", lambda ch, arg: self.send(WorkerMessage.ArmNormal(self.trigger_type())))
+        self.add_command("SINGle", lambda ch, arg: self.send(WorkerMessage.ArmSingle(self.trigger_type())))
+        self.add_command("AUTO", lambda ch, arg: self.send(WorkerMessage.ArmAuto(self.trigger_type())))
+        self.add_command("FORCe", lambda ch, arg: self.send(WorkerMessage.ArmForceAcq()))
+        self.add_command("STOP", lambda ch, arg: self.send(WorkerMessage.Disarm()))
+
+        self.add_command("TIMebase:SCALe", self.set_time_scale)
+        self.add_query("TIMebase:SCALe", lambda ch, arg: f"{seconds(model.visual_time_scale):g}")
+
+        self.add_command(
+            "TRIGger:LEVel",
+            lambda ch, arg: self.send(WorkerMessage.SetTriggerLevel(in_range(to_float(arg), -1, 1)))
+        )
+        self.add_query("TRIGger:LEVel", lambda ch, arg: f"{model.trigger.level:g}")
+        self.add_command(
+            "TRIGger:POSition",
+            lambda ch, arg: self.send(WorkerMessage.SetTriggerPosition(in_range(to_float(arg), 0, 1)))
+        )
+        self.add_query("TRIGger:POSition", lambda ch, arg: f"{model.trigger.position:g}")
+        self.add_command(
+            "TRIGger:SOURce", lambda ch, arg: self.send(WorkerMessage.SetTriggerOnChannel(to_channel(arg)))
+        )
+        self.add_query("TRIGger:SOURce", lambda ch, arg: f"CHAN{model.trigger.on_channel + 1}")
+        self.add_command("TRIGger:TYPE", self.set_trigger_type)
+        self.add_query("TRIGger:TYPE", lambda ch, arg: model.trigger.trigger_type.name)
+        self.add_command("TRIGger:TOT", lambda ch, arg: self.send(WorkerMessage.SetTriggerToT(to_int(arg))))
+        self.add_query("TRIGger:TOT", lambda ch, arg: str(model.trigger.tot))
+        self.add_command("TRIGger:DELTa", lambda ch, arg: self.send(WorkerMessage.SetTriggerDelta(to_int(arg))))
+        self.add_query("TRIGger:DELTa", lambda ch, arg: str(model.trigger.delta))
+
+        self.add_command(
+            "CHANnel#:DISPlay", lambda ch, arg: self.send(WorkerMessage.SetChannelActive(ch, to_bool(arg)))
+        )
+        self.add_query("CHANnel#:DISPlay", lambda ch, arg: str(int(model.channel[ch].active)))
+        self.add_command("CHANnel#:SCALe", self.set_voltage_scale)
+        self.add_query("CHANnel#:SCALe", lambda ch, arg: f"{model.channel[ch].dV:g}")
+        self.add_command("CHANnel#:OFFSet", self.set_offset)
+        self.add_query("CHANnel#:OFFSet", lambda ch, arg: f"{model.channel[ch].offset_V:g}")
+        self.add_command(
+            "CHANnel#:COUPling",
+            lambda ch, arg: self.send(
+                WorkerMessage.SetChannelCoupling(ch, to_choice(ChannelCouplingModel, arg, ["AC", "DC"]), True)
+            )
+        )
+        self.add_query("CHANnel#:COUPling", lambda ch, arg: model.channel[ch].coupling.value)
+        self.add_command(
+            "CHANnel#:IMPedance",
+            lambda ch, arg: self.send(
+                WorkerMessage.SetChannelImpedance(ch, to_choice(ChannelImpedanceModel, arg, ["50", "1M"]), True)
+            )
+        )
+        self.add_query(
+            "CHANnel#:IMPedance",
+            lambda ch, arg: "50" if model.channel[ch].impedance == ChannelImpedanceModel.FIFTY_OHM else "1M"
+        )
+        self.add_command(
+            "CHANnel#:PROBe",
+            lambda ch, arg: self.send(WorkerMessage.SetChannel10x(ch, to_probe_ten_x(arg), True))
+        )
+        self.add_query("CHANnel#:PROBe", lambda ch, arg: "10" if model.channel[ch].ten_x_probe else "1")
+
+        self.add_command("ACQuire:MDEPth", lambda ch, arg: self.send(WorkerMessage.SetMemoryDepth(to_int(arg))))
+        self.add_query("ACQuire:MDEPth", lambda ch, arg: str(model.mem_depth))
+        self.add_command("ACQuire:HRESolution", lambda ch, arg: self.send(WorkerMessage.SetHighres(to_bool(arg))))
+        self.add_query("ACQuire:HRESolution", lambda ch, arg: str(int(model.highres)))
+
+        self.add_command("DATA:FORMat", self.set_data_format)
+        self.add_query(
+            "DATA:FORMat",
+            lambda ch, arg: next(k for k, v in SampleFormat.NAMES.items() if v == self.server.sample_format)
+        )
+        self.add_query("DATA:PORT", lambda ch, arg: str(self.server.data_port))
+
+    def add_command(self, pattern: str, handler: Callable[[Optional[int], str], None]) -> None:
+        self.commands.append(Command(pattern, handler, query=False))
+
+    def add_query(self, pattern: str, handler: Callable[[Optional[int], str], str]) -> None:
+        self.commands.append(Command(pattern, handler, query=True))
+
+    def execute(self, line: str) -> Optional[str]:
+        """ Executes one command line. Returns answer to query or None. Raises RemoteCommandError on failure. """
+        header, _, arg = line.strip().partition(" ")
+        query = header.endswith("?")
+        header = header.removesuffix("?")
+        for command in self.commands:
+            if command.query == query and (matched := command.match(header)) is not None:
+                _, channel = matched
+                if channel is not None:
+                    if channel not in (1, 2):
+                        raise RemoteCommandError(f"Invalid channel {channel}")
+                    channel -= 1
+                return command.handler(channel, arg.strip())
+        raise RemoteCommandError(f"Undefined header {header}{'?' if query else ''}")
+
+    def send(self, message) -> None:
+        """ Passes message to the worker and waits for it to be processed. """
+        remote_command = WorkerMessage.RemoteCommand(message)
+        self.app.worker.messages.put(remote_command)
+        if not remote_command.done.wait(COMMAND_TIMEOUT_S):
+            if remote_command.abandon():
+                raise RemoteCommandError("Command timed out")
+            # worker is already processing it, so it is reported once done
+            remote_command.done.wait()
+        self.server.log(f"Remote: {type(message).__name__}")
+
+    def trigger_type(self):
+        return self.app.model.trigger.trigger_type.to_trigger_type()
+
+    def set_trigger_type(self, channel: Optional[int], arg: str) -> None:
+        try:
+            trigger_type = TriggerTypeModel[arg.upper()]
+        except KeyError:
+            try:
+                trigger_type = TriggerTypeModel.value_of(arg)
+            except RuntimeError:
+                names = ", ".join(t.name for t in TriggerTypeModel)
+                raise RemoteCommandError(f"Invalid trigger type {arg}; expected one of {names}")
+        self.send(WorkerMessage.SetTriggerType(trigger_type.to_trigger_type(), trigger_type))
+
+    def set_time_scale(self, channel: Optional[int], arg: str) -> None:
+        try:
+            # SCPI is case-insensitive, so units such as US or MS are taken in lower case
+            unit_given = re.search(r"[a-z]", arg, re.IGNORECASE) is not None
+            time_scale = Duration.value_of(arg.lower() if unit_given else f"{float(arg)} s").optimize()
+        except Exception:
+            raise RemoteCommandError(f"Invalid time scale {arg}")
+        self.send(WorkerMessage.SetTimeScale(time_scale))
+
+    def set_voltage_scale(self, channel: int, arg: str) -> None:
+        dV = self.app.model.get_next_valid_voltage_scale(
+            current_voltage_scale=to_volts(arg),
+            do_oversample=False,
+            ten_x_probe=self.app.model.channel[channel].ten_x_probe,
+            index_offset=0
+        )
+        self.send(WorkerMessage.SetVoltagePerDiv(channel, dV.to_float(Scale.UNIT), True))
+
+    def set_offset(self, channel: int, arg: str) -> None:
+        offset = self.app.model.get_next_valid_offset_value(
+            dV=self.app.model.channel[channel].dV,
+            do_oversample=False,
+            current_offset=to_volts(arg),
+            index_offset=0
+        )
+        self.send(WorkerMessage.SetChannelOffset(channel, offset.to_float(Scale.UNIT)))
+
+    def set_data_format(self, channel: Optional[int], arg: str) -> None:
+        if arg.upper() not in SampleFormat.NAMES:
+            raise RemoteCommandError(f"Invalid data format {arg}; expected FLOAT32 or INT16")
+        self.server.sample_format = SampleFormat.NAMES[arg.upper()]
+
+
+def to_float(arg: str) -> float:
+    try:
+        return float(arg)
+    except ValueError:
+        raise RemoteCommandError(f"Invalid number {arg}")
+
+
+def to_int(arg: str) -> int:
+    try:
+        return int(arg)
+    except ValueError:
+        raise RemoteCommandError(f"Invalid integer {arg}")
+
+
+def in_range(value: float, min_value: float, max_value: float) -> float:
+    if not min_value <= value <= max_value:
+        raise RemoteCommandError(f"Value {value} out of range [{min_value}, {max_value}]")
+    return value
+
+
+def to_bool(arg: str) -> bool:
+    match arg.upper():
+        case "1" | "ON":
+            return True
+        case "0" | "OFF":
+            return False
+        case _:
+            raise RemoteCommandError(f"Invalid boolean {arg}; expected ON, OFF, 1 or 0")
+
+
+def to_channel(arg: str) -> int:
+    m = re.fullmatch(r"(?:CHAN(?:NEL)?)?([12])", arg.upper())
+    if m is None:
+        raise RemoteCommandError(f"Invalid channel {arg}")
+    return int(m.group(1)) - 1
+
+
+def to_volts(arg: str) -> MetricValue:
+    try:
+        return MetricValue.value_of(arg if arg.upper().endswith("V") else f"{float(arg)} V")
+    except Exception:
+        raise RemoteCommandError(f"Invalid voltage {arg}")
+
+
+def to_choice(enum_class, arg: str, choices: list[str]):
+    if arg.upper() not in choices:
+        raise RemoteCommandError(f"Invalid value {arg}; expected one of {', '.join(choices)}")
+    return list(enum_class)[choices.index(arg.upper())]
+
+
+def to_probe_ten_x(arg: str) -> bool:
+    match arg.upper().removesuffix("X"):
+        case "1":
+            return False
+        case "10":
+            return True
+        case _:
+            raise RemoteCommandError(f"Invalid probe attenuation {arg}; expected 1 or 10")
+
+
+def encode_frame(
+        frame_num: int,
+        captured_at_s: float,
+        sample_format: int,
+        waveforms: tuple[Optional[Waveform], ...],
+        offsets_V: list[float]
+) -> bytes:
+    records = [(channel, wf) for channel, wf in enumerate(waveforms) if wf is not None]
+    parts = [FRAME_HEADER.pack(frame_num, captured_at_s, sample_format, len(records))]
+    for channel, wf in records:
+        if sample_format == SampleFormat.INT16:
+            scale = SampleFormat.INT16_SCALE
+            samples = np.clip(np.rint(np.asarray(wf.vs) / scale), -32767, 32767).astype("<i2")
+        else:
+            scale = 1.0
+            samples = np.asarray(wf.vs, dtype="<f4")
+        parts.append(CHANNEL_HEADER.pack(
+            channel, wf.dt_s, wf.dV, offsets_V[channel], scale, wf.trigger_pos, wf.trigger_level_V, samples.size
+        ))
+        parts.append(samples.tobytes())
+    payload = b"".join(parts)
+    return LENGTH_PREFIX.pack(len(payload)) + payload
+
+
+class DataClient:
+    """ Sends queued frames to one data port client on its own thread. """
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.frames: Queue[Optional[bytes]] = Queue(maxsize=MAX_QUEUED_FRAMES)
+
+    def offer(self, frame: bytes) -> None:
+        try:
+            self.frames.put_nowait(frame)
+        except Full:
+            METRICS.frames_dropped.inc()
+
+    def close(self) -> None:
+        try:
+            self.frames.put_nowait(None)
+        except Full:
+            # sender is stuck on slow client; closing socket ends it
+            self.sock.close()
+
+    def run(self) -> None:
+        try:
+            while (frame := self.frames.get()) is not None:
+                self.sock.sendall(frame)
+        except OSError:
+            pass
+
+
+class RemoteControlServer:
+    def __init__(self, app: App, port: int = DEFAULT_COMMAND_PORT, log: Callable[[str], None] = lambda _: None):
+        self.app = app
+        self.command_port = port
+        self.data_port = port + 1
+        self.log = log
+        self.sample_format = SampleFormat.FLOAT32
+        self.interpreter = CommandInterpreter(app, self)
+        self.data_clients: list[DataClient] = []
+        self.data_clients_lock = threading.Lock()
+        self.command_clients: list[socket.socket] = []
+        self.command_clients_lock = threading.Lock()
+        self.frame_num = 0
+        self.command_server: Optional[socketserver.ThreadingTCPServer] = None
+        self.data_server: Optional[socketserver.ThreadingTCPServer] = None
+
+    def start(self) -> None:
+        server = self
+
+        class CommandHandler(socketserver.StreamRequestHandler):
+            def setup(self):
+                super().setup()
+                with server.command_clients_lock:
+                    server.command_clients.append(self.request)
+
+            def finish(self):
+                with server.command_clients_lock:
+                    server.command_clients.remove(self.request)
+                try:
+                    super().finish()
+                except OSError:
+                    # socket was already shut down by stop()
+                    pass
+
+            def handle(self):
+                errors: list[str] = []
+                server.log(f"Remote client connected from {self.client_address[0]}")
+                for raw_line in self.rfile:
+                    line = raw_line.decode("ascii", errors="replace").strip()
+                    if line == "":
+                        continue
+                    for command in line.split(";"):
+                        if re.fullmatch(r":?SYST(EM)?:ERR(OR)?\?", command.strip().upper()):
+                            answer = errors.pop(0) if errors != [] else '0,"No error"'
+                        else:
+                            try:
+                                answer = server.interpreter.execute(command)
+                            except RemoteCommandError as ex:
+                                errors.append(f'-100,"{ex}"')
+                                answer = None
+                            except Exception as ex:
+                                errors.append(f'-200,"{ex}"')
+                                answer = None
+                        if answer is not None:
+                            self.wfile.write(f"{answer}\n".encode("ascii"))
+
+        class DataHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                client = DataClient(self.request)
+                with server.data_clients_lock:
+                    server.data_clients.append(client)
+                try:
+                    client.run()
+                finally:
+                    with server.data_clients_lock:
+                        server.data_clients.remove(client)
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        command_server = socketserver.ThreadingTCPServer(("127.0.0.1", self.command_port), CommandHandler)
+        try:
+            data_server = socketserver.ThreadingTCPServer(("127.0.0.1", self.data_port), DataHandler)
+        except OSError:
+            command_server.server_close()
+            raise
+        self.command_server, self.data_server = command_server, data_server
+        for s in [self.command_server, self.data_server]:
+            s.daemon_threads = True
+            threading.Thread(target=s.serve_forever, daemon=True).start()
+        self.app.frame_listeners.append(self.on_frame)
+        self.log(f"Remote control on ports {self.command_port} (commands) and {self.data_port} (data)")
+
+    def stop(self) -> None:
+        if self.on_frame in self.app.frame_listeners:
+            self.app.frame_listeners.remove(self.on_frame)
+        for s in [self.command_server, self.data_server]:
+            if s is not None:
+                s.shutdown()
+                s.server_close()
+        self.command_server = None
+        self.data_server = None
+        with self.data_clients_lock:
+            for client in self.data_clients:
+                client.close()
+        with self.command_clients_lock:
+            for sock in self.command_clients:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def on_frame(self, waveforms: tuple[Optional[Waveform], ...]) -> None:
+        """ Called by the worker with each acquired frame. Frame is encoded once and queued for all clients. """
+        self.frame_num += 1
+        with self.data_clients_lock:
+            clients = list(self.data_clients)
+        if clients != []:
+            offsets_V = [self.app.model.channel[channel].offset_V for channel in range(len(waveforms))]
+            frame = encode_frame(self.frame_num, time.time(), self.sample_format, waveforms, offsets_V)
+            for client in clients:
+                client.offer(frame)
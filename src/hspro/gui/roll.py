@@ -0,0 +1,145 @@
+"""
+Roll mode for slow time bases.
+
+Instead of replotting every frame in place, frames are reduced to a few points and appended to a display that
+scrolls from right to left, newest data at the right edge. Each frame stands for the wall clock time elapsed since
+the previous one and is reduced to one minimum/maximum pair per point of that time, so that short pulses stay
+visible. Only this short segment is handed from acquisition worker to GUI, where it is written into a ring buffer.
+The ring is split into fixed chunks, each drawn by its own curve that stays put in the ring and is only shifted to
+the left as newer samples arrive, so that appending a segment updates data of just the chunks it was written into.
+"""
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+# roll mode is used at this and slower time scales
+ROLL_MODE_MIN_TIME_SCALE_S = 0.1
+
+# points across the screen, each drawn as minimum and maximum
+NUM_ROLL_POINTS = 1000
+
+# samples in one chunk of the ring, which is drawn as one curve
+ROLL_CHUNK_SIZE = 200
+
+
+@dataclass(frozen=True)
+class RollSegment:
+    # minimum and maximum of each new point interleaved, in vertical divisions; shape is (channels, 2 * points)
+    samples: np.ndarray
+    # display is cleared before this segment is appended
+    reset: bool
+
+
+class RollBuffer:
+    """
+    Ring of rolled samples split into chunks. Ring holds one chunk more than is shown across the screen, so that
+    samples of the chunk being written which are older than a full ring (and are drawn beyond the right edge) never
+    leave a gap at the left edge.
+    """
+
+    def __init__(self, num_channels: int, num_points: int = NUM_ROLL_POINTS, chunk_size: int = ROLL_CHUNK_SIZE):
+        # samples shown across the screen
+        self.size = 2 * num_points
+        self.chunk_size = chunk_size
+        self.num_chunks = math.ceil(self.size / chunk_size) + 1
+        self.capacity = self.num_chunks * chunk_size
+        # last column repeats the first one, so that each chunk also holds the first sample of the next one and
+        # curves of neighbouring chunks join
+        self.data = np.full((num_channels, self.capacity + 1), np.nan, dtype=np.float32)
+        # index of the next sample to be written
+        self.head = 0
+
+    def clear(self) -> None:
+        self.data[:] = np.nan
+        self.head = 0
+
+    def append(self, samples: np.ndarray) -> list[int]:
+        """ Writes samples after the newest ones; returns indices of chunks whose samples changed. """
+        samples = samples[:, -(self.capacity - self.chunk_size):]
+        n = samples.shape[1]
+        if n == 0:
+            return []
+        first = min(n, self.capacity - self.head)
+        self.data[:, self.head:self.head + first] = samples[:, :first]
+        rest = n - first
+        if rest > 0:
+            self.data[:, :rest] = samples[:, first:]
+        if self.head == 0 or rest > 0:
+            self.data[:, self.capacity] = self.data[:, 0]
+
+        # chunk before the first written sample ends with it
+        first_chunk = (self.head - 1) // self.chunk_size
+        last_chunk = (self.head + n - 1) // self.chunk_size
+        self.head = (self.head + n) % self.capacity
+        return sorted({chunk % self.num_chunks for chunk in range(first_chunk, last_chunk + 1)})
+
+    def chunk(self, chunk: int) -> np.ndarray:
+        """ Samples of the chunk and the first sample of the next one; a view into the buffer. """
+        start = chunk * self.chunk_size
+        return self.data[:, start:start + self.chunk_size + 1]
+
+    def age(self, chunk: int) -> int:
+        """ Number of samples written after the first sample of the chunk, i.e. its distance from the newest one. """
+        return (self.head - 1 - chunk * self.chunk_size) % self.capacity
+
+
+class RollSegmenter:
+    """ Turns acquired frames into roll segments on the acquisition worker. """
+
+    def __init__(self, num_channels: int, num_points: int = NUM_ROLL_POINTS):
+        self.num_channels = num_channels
+        self.num_points = num_points
+        self.point_period_s = 0.0
+        self.last_frame_at_s: Optional[float] = None
+        # fraction of a point carried over to the next frame
+        self.carry = 0.0
+        # extremes of frames that were too close together to make a point of their own
+        self.pending_min = np.full(num_channels, np.nan, dtype=np.float32)
+        self.pending_max = np.full(num_channels, np.nan, dtype=np.float32)
+
+    def reset(self, screen_time_s: float) -> None:
+        self.point_period_s = screen_time_s / self.num_points
+        self.last_frame_at_s = None
+        self.carry = 0.0
+        self.pending_min[:] = np.nan
+        self.pending_max[:] = np.nan
+
+    def segment(self, vss: list[Optional[np.ndarray]], now_s: float, screen_time_s: float) -> Optional[RollSegment]:
+        """ Takes samples of each channel (None if inactive) of a frame acquired at `now_s`. """
+        reset = self.last_frame_at_s is None or screen_time_s / self.num_points != self.point_period_s
+        if reset:
+            self.reset(screen_time_s)
+            num_points = 1
+        else:
+            points = (now_s - self.last_frame_at_s) / self.point_period_s + self.carry
+            num_points = min(int(points), self.num_points)
+            self.carry = points - int(points) if num_points < self.num_points else 0.0
+        self.last_frame_at_s = now_s
+
+        mins = np.full((self.num_channels, max(num_points, 1)), np.nan, dtype=np.float32)
+        maxs = np.full_like(mins, np.nan)
+        for channel, vs in enumerate(vss):
+            if vs is None or len(vs) == 0:
+                continue
+            v = np.asarray(vs)
+            # frame is split into one chunk per point; points beyond number of samples repeat the last one
+            starts = (np.arange(mins.shape[1]) * v.size) // mins.shape[1]
+            mins[channel] = np.minimum.reduceat(v, starts)
+            maxs[channel] = np.maximum.reduceat(v, starts)
+
+        # fmin/fmax ignore NaN of channels which had no pending extremes
+        mins[:, 0] = np.fmin(mins[:, 0], self.pending_min)
+        maxs[:, 0] = np.fmax(maxs[:, 0], self.pending_max)
+        if num_points == 0:
+            self.pending_min[:] = mins[:, 0]
+            self.pending_max[:] = maxs[:, 0]
+            return None
+        self.pending_min[:] = np.nan
+        self.pending_max[:] = np.nan
+
+        samples = np.empty((self.num_channels, 2 * num_points), dtype=np.float32)
+        samples[:, 0::2] = mins
+        samples[:, 1::2] = maxs
+        return RollSegment(samples, reset)
@@ -1,4 +1,53 @@
-from dataclasses import dataclass
+import base64
+import zlib
+from dataclasses import dataclass, field, fields
+
+import numpy as np
+
+from hspro.gui.math_channels import MathChannelDefinition
+
+SCENE_VERSION = 2
+WAVEFORM_ENCODING = "delta-int16-zlib"
+
+
+def encode_samples(v: np.ndarray) -> dict:
+    """
+    Encodes waveform samples as int16 codes spanning the range of the trace. Codes are delta-encoded
+    (wrapping in int16), so that slowly changing traces compress well, and then compressed with zlib.
+    Quantization step is (max - min) / 65535, which is well below ADC resolution.
+    """
+    samples = np.asarray(v, dtype=np.float64)
+    if samples.size == 0:
+        return {"encoding": WAVEFORM_ENCODING, "n": 0, "scale": 1.0, "offset": 0.0, "data": ""}
+
+    v_min, v_max = float(samples.min()), float(samples.max())
+    scale = (v_max - v_min) / 65535 if v_max > v_min else 1.0
+    offset = v_min + 32768 * scale
+    codes = np.rint((samples - offset) / scale).clip(-32768, 32767).astype(np.int16)
+    deltas = np.diff(codes, prepend=np.int16(0)).astype("<i2")
+    return {
+        "encoding": WAVEFORM_ENCODING,
+        "n": int(samples.size),
+        "scale": scale,
+        "offset": offset,
+        "data": base64.b64encode(zlib.compress(deltas.tobytes(), 6)).decode("ascii")
+    }
+
+
+def decode_samples(json_data) -> np.ndarray:
+    # scenes of version 1 store samples as plain list of floats
+    if isinstance(json_data, list):
+        return np.asarray(json_data, dtype=np.float32)
+
+    if json_data["encoding"] != WAVEFORM_ENCODING:
+        raise ValueError(f"Unsupported waveform encoding {json_data['encoding']}")
+
+    if json_data["n"] == 0:
+        return np.empty(0, dtype=np.float32)
+
+    deltas = np.frombuffer(zlib.decompress(base64.b64decode(json_data["data"])), dtype="<i2")
+    codes = np.cumsum(deltas, dtype=np.int16)
+    return (codes * json_data["scale"] + json_data["offset"]).astype(np.float32)
 
 
 @dataclass
@@ -12,7 +61,7 @@ class ChannelData:
     ten_x_probe: bool
     t_s_0: float
     dt_s: float
-    v: list[float]
+    v: np.ndarray
 
     @classmethod
     def value_of(cls, json_data) -> "ChannelData":
@@ -26,9 +75,14 @@ class ChannelData:
             ten_x_probe=json_data["ten_x_probe"],
             t_s_0=json_data["t_s_0"],
             dt_s=json_data["dt_s"],
-            v=json_data["v"],
+            v=decode_samples(json_data["v"]),
         )
 
+    def to_json(self) -> dict:
+        json_data = {f.name: getattr(self, f.name) for f in fields(self)}
+        json_data["v"] = encode_samples(self.v)
+        return json_data
+
 
 @dataclass
 class SceneCheckpoint:
@@ -57,6 +111,12 @@ class SceneCheckpoint:
 
     channels: list[ChannelData]
 
+    # local time when checkpoint was taken in ISO format; empty for checkpoints recorded before it was tracked
+    created_at: str = ""
+
+    # definitions of math channels; these are recomputed from the channels when checkpoint is plotted
+    math_channels: list[MathChannelDefinition] = field(default_factory=list)
+
     @classmethod
     def value_of(cls, json_data) -> "SceneCheckpoint":
         return SceneCheckpoint(
@@ -80,8 +140,16 @@ class SceneCheckpoint:
             trigger_auto_frequency=json_data["trigger_auto_frequency"],
             selected_channel=json_data["selected_channel"],
             channels=[ChannelData.value_of(cd) for cd in json_data["channels"]],
+            created_at=json_data.get("created_at", ""),
+            math_channels=[MathChannelDefinition.value_of(mc) for mc in json_data.get("math_channels", [])],
         )
 
+    def to_json(self) -> dict:
+        json_data = {f.name: getattr(self, f.name) for f in fields(self)}
+        json_data["channels"] = [cd.to_json() for cd in self.channels]
+        json_data["math_channels"] = [mc.to_json() for mc in self.math_channels]
+        return json_data
+
 
 @dataclass
 class Scene:
@@ -96,3 +164,6 @@ class Scene:
             version=json_data["version"],
             data=[SceneCheckpoint.value_of(sc) for sc in json_data["data"]]
         )
+
+    def to_json(self) -> dict:
+        return {"name": self.name, "version": SCENE_VERSION, "data": [sc.to_json() for sc in self.data]}
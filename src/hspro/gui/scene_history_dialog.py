@@ -0,0 +1,36 @@
+from typing import Callable
+
+from PySide6.QtCore import QSize
+from PySide6.QtWidgets import QWidget, QListView, QAbstractItemView
+from pytide6 import Dialog, VBoxLayout
+
+from hspro.gui.app import App, WorkerMessage
+from hspro.gui.scene_history_model import SceneHistoryModel, THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT
+
+
+class SceneHistory(Dialog):
+    def __init__(self, parent: QWidget, app: App, on_close: Callable[[], None]):
+        super().__init__(parent, windowTitle="Scene history")
+        self.on_close = on_close
+        self.hist_model = SceneHistoryModel(app.scene, self)
+
+        self.lst_view = QListView()
+        self.lst_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        # all rows have the same height, which lets the view skip measuring rows outside of visible area
+        self.lst_view.setUniformItemSizes(True)
+        self.lst_view.setIconSize(QSize(THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT))
+        self.lst_view.setModel(self.hist_model)
+        self.lst_view.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+
+        def on_click():
+            selected_indexes = self.lst_view.selectedIndexes()
+            if selected_indexes != []:
+                selected_row = selected_indexes[0].row()
+                app.worker.messages.put(WorkerMessage.ActivateCheckpoint(self.hist_model.checkpoint_num(selected_row)))
+
+        self.lst_view.clicked.connect(on_click)
+        self.setLayout(VBoxLayout([self.lst_view]))
+
+    def closeEvent(self, arg__1, /):
+        super().closeEvent(arg__1)
+        self.on_close()
@@ -0,0 +1,165 @@
+from collections import OrderedDict
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, QObject, QPointF, QRunnable, QThreadPool, Qt, Signal
+from PySide6.QtGui import QColor, QImage, QPainter, QPen, QPixmap, QPolygonF
+
+from hspro.gui.decimate import min_max_decimate
+from hspro.gui.scene import Scene, SceneCheckpoint
+
+THUMBNAIL_WIDTH = 120
+THUMBNAIL_HEIGHT = 48
+
+
+class ThumbnailSignals(QObject):
+    # generation, checkpoint number, rendered image
+    ready = Signal(int, int, QImage)
+
+
+class ThumbnailRenderer(QRunnable):
+    """ Renders preview of checkpoint traces into QImage, which unlike QPixmap is safe to paint off GUI thread. """
+
+    def __init__(self, generation: int, checkpoint_num: int, checkpoint: SceneCheckpoint, signals: ThumbnailSignals):
+        super().__init__()
+        self.setAutoDelete(True)
+        self.generation = generation
+        self.checkpoint_num = checkpoint_num
+        self.checkpoint = checkpoint
+        self.signals = signals
+
+    def run(self):
+        image = QImage(THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(QColor("black" if self.checkpoint.plot_color_scheme == "dark" else "white"))
+
+        painter = QPainter(image)
+        for cdata in self.checkpoint.channels:
+            if not cdata.active or cdata.v.size == 0:
+                continue
+
+            pen = QPen(QColor(cdata.color))
+            pen.setWidth(1)
+            painter.setPen(pen)
+            painter.setBrush(QColor(cdata.color))
+
+            # plot y-range is from -5 to 5 divisions
+            v_min, v_max = min_max_decimate(cdata.v, THUMBNAIL_WIDTH)
+            y_min = (5 - v_min) / 10 * (THUMBNAIL_HEIGHT - 1)
+            y_max = (5 - v_max) / 10 * (THUMBNAIL_HEIGHT - 1)
+            x = [i * (THUMBNAIL_WIDTH - 1) / max(len(y_min) - 1, 1) for i in range(len(y_min))]
+            envelope = [QPointF(xi, yi) for xi, yi in zip(x, y_max)] + \
+                       [QPointF(xi, yi) for xi, yi in zip(reversed(x), reversed(y_min))]
+            painter.drawPolygon(QPolygonF(envelope))
+        painter.end()
+
+        self.signals.ready.emit(self.generation, self.checkpoint_num, image)
+
+
+class SceneHistoryModel(QAbstractListModel):
+    """
+    List model over checkpoints of a scene, newest first. Rows are produced on demand, so that only visible rows
+    are ever formatted, and thumbnails are rendered lazily in the background and kept in LRU cache.
+    """
+
+    MAX_CACHED_THUMBNAILS = 512
+
+    def __init__(self, scene: Scene, parent: QObject | None = None):
+        super().__init__(parent)
+        self.scene = scene
+        self.num_checkpoints = len(scene.data)
+
+        # incremented every time scene is replaced, so that late thumbnails of previous scene are discarded
+        self.generation = 0
+        self.thumbnails: OrderedDict[int, QPixmap] = OrderedDict()
+        self.pending_thumbnails: set[int] = set()
+        self.placeholder = QPixmap(THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT)
+        self.placeholder.fill(QColor("#d0d0d0"))
+
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(2)
+        self.signals = ThumbnailSignals()
+        self.signals.ready.connect(self.thumbnail_ready, Qt.ConnectionType.QueuedConnection)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self.num_checkpoints
+
+    def checkpoint_num(self, row: int) -> int:
+        return self.num_checkpoints - row
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < self.num_checkpoints:
+            return None
+
+        checkpoint_num = self.checkpoint_num(index.row())
+        checkpoint = self.scene.data[checkpoint_num - 1]
+        match role:
+            case Qt.ItemDataRole.DisplayRole:
+                return f"Checkpoint #{checkpoint_num}   {checkpoint.created_at}\n{self.summary(checkpoint)}"
+            case Qt.ItemDataRole.DecorationRole:
+                return self.thumbnail(checkpoint_num, checkpoint)
+            case Qt.ItemDataRole.ToolTipRole:
+                return self.details(checkpoint)
+            case _:
+                return None
+
+    def thumbnail(self, checkpoint_num: int, checkpoint: SceneCheckpoint) -> QPixmap:
+        pixmap = self.thumbnails.get(checkpoint_num)
+        if pixmap is not None:
+            self.thumbnails.move_to_end(checkpoint_num)
+            return pixmap
+
+        if checkpoint_num not in self.pending_thumbnails:
+            self.pending_thumbnails.add(checkpoint_num)
+            self.thread_pool.start(ThumbnailRenderer(self.generation, checkpoint_num, checkpoint, self.signals))
+        return self.placeholder
+
+    def thumbnail_ready(self, generation: int, checkpoint_num: int, image: QImage):
+        if generation != self.generation:
+            return
+
+        self.pending_thumbnails.discard(checkpoint_num)
+        self.thumbnails[checkpoint_num] = QPixmap.fromImage(image)
+        while len(self.thumbnails) > SceneHistoryModel.MAX_CACHED_THUMBNAILS:
+            self.thumbnails.popitem(last=False)
+
+        row = self.num_checkpoints - checkpoint_num
+        if 0 <= row < self.num_checkpoints:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+    def set_scene(self, scene: Scene):
+        if scene is self.scene and len(scene.data) >= self.num_checkpoints:
+            # checkpoints are only ever appended; new ones appear at the top of the list
+            num_new = len(scene.data) - self.num_checkpoints
+            if num_new > 0:
+                self.beginInsertRows(QModelIndex(), 0, num_new - 1)
+                self.num_checkpoints = len(scene.data)
+                self.endInsertRows()
+        else:
+            self.beginResetModel()
+            self.scene = scene
+            self.num_checkpoints = len(scene.data)
+            self.generation += 1
+            self.thumbnails.clear()
+            self.pending_thumbnails.clear()
+            self.endResetModel()
+
+    @staticmethod
+    def summary(cpt: SceneCheckpoint) -> str:
+        channels = "  ".join(f"Ch{i} {cd.dV:g} V/div" for i, cd in enumerate(cpt.channels) if cd.active)
+        return f"{cpt.visual_time_scale}/div  {cpt.trigger_type}  {channels}"
+
+    @staticmethod
+    def details(cpt: SceneCheckpoint) -> str:
+        lines = [
+            f"Taken at: {cpt.created_at or 'N/A'}",
+            f"Time scale: {cpt.visual_time_scale}/div",
+            f"Memory depth: {cpt.mem_depth}, highres: {cpt.highres}",
+            f"Trigger: {cpt.trigger_type} on channel {cpt.trigger_on_channel}, level {cpt.trigger_level:.3f}, "
+            f"position {cpt.trigger_position:.3f}"
+        ]
+        for i, cd in enumerate(cpt.channels):
+            if cd.active:
+                lines.append(
+                    f"Ch #{i}: {cd.dV:g} V/div, offset {cd.offset_V:g} V, {cd.coupling}, {cd.impedance}"
+                    f"{', 10x probe' if cd.ten_x_probe else ''}"
+                )
+        return "\n".join(lines)
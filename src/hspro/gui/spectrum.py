@@ -0,0 +1,134 @@
+"""
+Spectrum of acquired frames and its waterfall history.
+
+Each frame is windowed with a Hann window and transformed with `np.fft.rfft`; magnitude is reduced to a fixed
+number of display bins by taking the maximum of each group of FFT bins, so that narrow peaks survive. Waterfall
+keeps the last spectra as rows of a preallocated image stored twice back to back: each new spectrum is written
+into one row of both copies and the displayed image is the contiguous view starting at the oldest row. Nothing is
+shifted or copied when a spectrum is added.
+"""
+import math
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from queue import Queue, Full
+from typing import Optional
+
+import numpy as np
+
+NUM_SPECTRUM_BINS = 512
+NUM_WATERFALL_ROWS = 512
+
+# magnitude shown for rows without a spectrum yet and floor of the logarithm
+FLOOR_DBV = -160.0
+
+# frames waiting for transform; further frames are skipped
+MAX_QUEUED_FRAMES = 16
+
+
+@lru_cache(maxsize=8)
+def hann_window(n: int) -> np.ndarray:
+    window = np.hanning(n).astype(np.float32)
+    window.setflags(write=False)
+    return window
+
+
+@dataclass(frozen=True)
+class Spectrum:
+    # maximum magnitude of FFT bins within each display bin
+    magnitudes_dBV: np.ndarray
+    bin_width_hz: float
+    # frequency of the strongest FFT bin other than DC
+    peak_hz: float
+
+
+def spectrum(v: np.ndarray, dt_s: float, num_bins: int = NUM_SPECTRUM_BINS) -> Spectrum:
+    """ Amplitude spectrum of samples in volts, in dBV, reduced to `num_bins` bins from DC to Nyquist. """
+    window = hann_window(v.size)
+    # amplitude of a sine wave is preserved regardless of window and record length
+    magnitudes = np.abs(np.fft.rfft(v * window)) * (2 / window.sum())
+    df_hz = 1 / (v.size * dt_s)
+    peak_hz = (int(np.argmax(magnitudes[1:])) + 1) * df_hz if magnitudes.size > 1 else 0.0
+
+    group = math.ceil(magnitudes.size / num_bins)
+    padded = np.zeros(group * num_bins, dtype=magnitudes.dtype)
+    padded[:magnitudes.size] = magnitudes
+    pooled = padded.reshape(num_bins, group).max(axis=1)
+    magnitudes_dBV = 20 * np.log10(np.maximum(pooled, 10 ** (FLOOR_DBV / 20)))
+    return Spectrum(magnitudes_dBV.astype(np.float32), group * df_hz, peak_hz)
+
+
+class Waterfall:
+    """ Last spectra, oldest first. Accumulation restarts when bin width changes, i.e. with sample rate or length. """
+
+    def __init__(self, num_rows: int = NUM_WATERFALL_ROWS, num_bins: int = NUM_SPECTRUM_BINS):
+        self.lock = threading.Lock()
+        self.num_rows = num_rows
+        self.rows = np.full((2 * num_rows, num_bins), FLOOR_DBV, dtype=np.float32)
+        # index of the oldest row
+        self.head = 0
+        self.num_spectra = 0
+        self.num_skipped_frames = 0
+        self.bin_width_hz: Optional[float] = None
+        self.peak_hz: Optional[float] = None
+
+    def reset(self) -> None:
+        with self.lock:
+            self.rows[:] = FLOOR_DBV
+            self.head = 0
+            self.num_spectra = 0
+            self.num_skipped_frames = 0
+            self.bin_width_hz = None
+            self.peak_hz = None
+
+    def add(self, s: Spectrum) -> None:
+        with self.lock:
+            if s.bin_width_hz != self.bin_width_hz:
+                self.rows[:] = FLOOR_DBV
+                self.head = 0
+                self.num_spectra = 0
+                self.bin_width_hz = s.bin_width_hz
+            self.rows[self.head] = s.magnitudes_dBV
+            self.rows[self.head + self.num_rows] = s.magnitudes_dBV
+            self.head = (self.head + 1) % self.num_rows
+            self.num_spectra += 1
+            self.peak_hz = s.peak_hz
+
+    def image(self) -> np.ndarray:
+        """
+        Rows from the oldest to the newest spectrum as a view into the ring. Row being written concurrently may show
+        partially updated, which is harmless for display.
+        """
+        head = self.head
+        return self.rows[head:head + self.num_rows]
+
+
+class WaterfallAccumulator:
+    """ Transforms frames on its own thread, so that acquisition worker only queues them. """
+
+    def __init__(self, waterfall: Waterfall):
+        self.waterfall = waterfall
+        self.frames: Queue[Optional[tuple[np.ndarray, float]]] = Queue(maxsize=MAX_QUEUED_FRAMES)
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, name="waterfall", daemon=True)
+        self.thread.start()
+
+    def offer(self, v: np.ndarray, dt_s: float) -> None:
+        try:
+            self.frames.put_nowait((v, dt_s))
+        except Full:
+            with self.waterfall.lock:
+                self.waterfall.num_skipped_frames += 1
+
+    def stop(self) -> None:
+        self.stopped = True
+        try:
+            self.frames.put_nowait(None)
+        except Full:
+            pass
+
+    def run(self) -> None:
+        while (frame := self.frames.get()) is not None and not self.stopped:
+            v, dt_s = frame
+            if v.size > 1:
+                self.waterfall.add(spectrum(v, dt_s))
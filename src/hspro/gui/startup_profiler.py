@@ -0,0 +1,135 @@
+import importlib.abc
+import os
+import sys
+import time
+from collections import defaultdict
+
+# set this environment variable to any non-empty value to print startup profile to stderr
+PROFILE_STARTUP_ENV_VAR = "HSPRO_PROFILE_STARTUP"
+
+
+class _TimingLoader(importlib.abc.Loader):
+    def __init__(self, loader, profiler: "StartupProfiler"):
+        self.loader = loader
+        self.profiler = profiler
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.profiler.enter_import()
+        started_at = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.profiler.exit_import(module.__name__, time.perf_counter() - started_at)
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    def __init__(self, profiler: "StartupProfiler"):
+        self.profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimingLoader(spec.loader, self.profiler)
+                return spec
+        return None
+
+
+class StartupProfiler:
+    """
+    Records time spent importing each module (excluding its own imports) and time at which named startup
+    phases were reached. Report is printed once first paint of the main window is marked.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases: list[tuple[str, float]] = []
+        self.import_self_time_s: dict[str, float] = {}
+        self.__nested_import_time_s: list[float] = []
+        self.__finder = _TimingFinder(self)
+        self.reported = False
+
+    @staticmethod
+    def enabled() -> bool:
+        return os.environ.get(PROFILE_STARTUP_ENV_VAR, "") != ""
+
+    def start(self) -> "StartupProfiler":
+        sys.meta_path.insert(0, self.__finder)
+        return self
+
+    def enter_import(self) -> None:
+        self.__nested_import_time_s.append(0.0)
+
+    def exit_import(self, module_name: str, elapsed_s: float) -> None:
+        nested_s = self.__nested_import_time_s.pop()
+        self.import_self_time_s[module_name] = elapsed_s - nested_s
+        if self.__nested_import_time_s:
+            self.__nested_import_time_s[-1] += elapsed_s
+
+    def mark(self, phase: str) -> None:
+        self.phases.append((phase, time.perf_counter() - self.started_at))
+
+    def mark_first_paint(self, window) -> None:
+        """ Marks the first paint event received by the window or any of its children and prints the report. """
+        from PySide6.QtCore import QEvent, QObject
+        from PySide6.QtWidgets import QApplication
+
+        profiler = self
+
+        class FirstPaintFilter(QObject):
+            def eventFilter(self, watched, event):
+                if event.type() == QEvent.Type.Paint and watched.isWidgetType() and watched.window() is window:
+                    QApplication.instance().removeEventFilter(self)
+                    if not profiler.reported:
+                        profiler.mark("first paint")
+                        profiler.report()
+                return False
+
+        self.__paint_filter = FirstPaintFilter()
+        QApplication.instance().installEventFilter(self.__paint_filter)
+
+    def report(self, top_n: int = 25) -> None:
+        self.reported = True
+        if self.__finder in sys.meta_path:
+            sys.meta_path.remove(self.__finder)
+
+        by_package: dict[str, float] = defaultdict(float)
+        for module_name, self_time_s in self.import_self_time_s.items():
+            by_package[module_name.split(".")[0]] += self_time_s
+
+        lines = ["Startup profile", "  phases:"]
+        lines += [f"    {at_s * 1000:9.1f} ms  {phase}" for phase, at_s in self.phases]
+        lines.append(f"  imports by top level package (total {sum(by_package.values()) * 1000:.1f} ms):")
+        lines += [
+            f"    {t_s * 1000:9.1f} ms  {package}"
+            for package, t_s in sorted(by_package.items(), key=lambda kv: -kv[1])[:top_n]
+        ]
+        lines.append("  slowest modules (self time):")
+        lines += [
+            f"    {t_s * 1000:9.1f} ms  {module_name}"
+            for module_name, t_s in sorted(self.import_self_time_s.items(), key=lambda kv: -kv[1])[:top_n]
+        ]
+        print("\n".join(lines), file=sys.stderr)
+
+
+class NoStartupProfiler:
+    """ Stand-in used when profiling is disabled. """
+
+    def mark(self, phase: str) -> None:
+        pass
+
+    def mark_first_paint(self, window) -> None:
+        pass
+
+
+def mk_startup_profiler() -> StartupProfiler | NoStartupProfiler:
+    return StartupProfiler().start() if StartupProfiler.enabled() else NoStartupProfiler()
@@ -113,26 +113,40 @@ class MainToolBar(Panel[QHBoxLayout]):
 
             show_hide_button.load(icon_show_hide())
 
-        def toggle_hold_release(_):
-            if app.holding:
-                icon_hold_release.value = app.icon_released_svg
-                icon_hold_release_hoover.value = app.icon_released_hoover_svg
-                icon_hold_release_pressed.value = app.icon_released_pressed_svg
-                app.holding = False
-                app.worker.messages.put(WorkerMessage.ReleaseWaveforms())
-                show_hide_button_action().setVisible(False)
-            else:
+        def set_holding(holding: bool):
+            if holding:
                 icon_hold_release.value = app.icon_holding_svg
                 icon_hold_release_hoover.value = app.icon_holding_hoover_svg
                 icon_hold_release_pressed.value = app.icon_holding_pressed_svg
                 app.holding = True
-                app.worker.messages.put(WorkerMessage.HoldWaveforms())
                 if not app.showing_holding_traces:
                     toggle_show_hide(None)
                 show_hide_button_action().setVisible(True)
+            else:
+                icon_hold_release.value = app.icon_released_svg
+                icon_hold_release_hoover.value = app.icon_released_hoover_svg
+                icon_hold_release_pressed.value = app.icon_released_pressed_svg
+                app.holding = False
+                show_hide_button_action().setVisible(False)
+
+        def toggle_hold_release(_):
+            if app.holding:
+                set_holding(False)
+                app.worker.messages.put(WorkerMessage.ReleaseWaveforms())
+            else:
+                set_holding(True)
+                app.worker.messages.put(WorkerMessage.HoldWaveforms())
 
             hold_release_button.load(icon_hold_release_hoover())
 
+        def show_holding():
+            """ Traces were held by the software trigger rather than with this button. """
+            if not app.holding:
+                set_holding(True)
+                hold_release_button.load(icon_hold_release())
+
+        app.show_holding = show_holding
+
         hold_release_button.mouseReleaseEvent = toggle_hold_release
         self.addWidget(hold_release_button)
 
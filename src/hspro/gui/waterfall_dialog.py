@@ -0,0 +1,124 @@
+from typing import Callable, Optional
+
+import numpy as np
+from PySide6.QtCore import QRectF, QTimer
+from PySide6.QtWidgets import QLabel, QWidget
+from hspro_api import Waveform
+from pyqtgraph import GraphicsLayoutWidget, ImageItem, colormap
+from pyqtgraph.graphicsItems.PlotItem import PlotItem
+from pytide6 import Dialog, VBoxLayout, HBoxPanel, PushButton, ComboBox, W, set_geometry
+
+from hspro.gui.measurements import si
+from hspro.gui.spectrum import Waterfall, WaterfallAccumulator, NUM_SPECTRUM_BINS, NUM_WATERFALL_ROWS
+
+# interval between refreshes of the displayed image
+REFRESH_INTERVAL_MS = 100
+
+# range of magnitudes shown, below the strongest one in the image
+DYNAMIC_RANGE_DB = 80
+
+
+class WaterfallDialog(Dialog):
+    """
+    Shows spectra of the last frames of one channel as a waterfall, newest at the top. Acquisition worker only queues
+    each frame; transform happens on the accumulator thread and this dialog periodically shows a view of the ring of
+    spectra as it is.
+    """
+
+    def __init__(self, parent: QWidget, app, on_close: Callable[[], None]):
+        super().__init__(parent, windowTitle="Waterfall")
+        from hspro.gui.app import App
+        self.app: App = app
+        self.on_close = on_close
+        self.setObjectName("WaterfallDialog")
+
+        self.channel = app.selected_channel if app.selected_channel is not None else 0
+        self.waterfall = Waterfall()
+        self.accumulator = WaterfallAccumulator(self.waterfall)
+
+        self.channel_cbox = ComboBox(
+            items=[f"CH{channel + 1}" for channel in app.channels],
+            current_selection=f"CH{self.channel + 1}",
+            min_width=60
+        )
+        self.channel_cbox.currentTextChanged.connect(self.reset)
+
+        self.stats_label = QLabel()
+
+        self.glw = GraphicsLayoutWidget(self)
+        self.plot: PlotItem = self.glw.addPlot(0, 0)
+        self.plot.setMenuEnabled(False)
+        self.plot.setMouseEnabled(False, False)
+        self.plot.hideButtons()
+        self.plot.setLabel("bottom", "Frequency", units="Hz")
+        self.plot.setLabel("left", "Spectra ago")
+        # rows of the ring are spectra, so that a new spectrum is one contiguous row
+        self.image = ImageItem(axisOrder="row-major")
+        self.image.setColorMap(colormap.get("viridis"))
+        self.plot.addItem(self.image)
+
+        self.setLayout(VBoxLayout([
+            HBoxPanel([
+                self.channel_cbox, PushButton("Reset", on_clicked=self.reset), W(self.stats_label, stretch=1)
+            ], margins=0),
+            W(self.glw, stretch=1)
+        ]))
+        set_geometry(app_state=app.app_persistence.state, widget=self, screen_dim=app.screen_dim, win_size_fraction=0.4)
+
+        self.reset()
+        self.app.frame_listeners.append(self.on_frame)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start()
+
+    def reset(self):
+        self.channel = self.channel_cbox.currentIndex()
+        self.waterfall.reset()
+        self.image.clear()
+
+    def on_frame(self, waveforms: tuple[Optional[Waveform], ...]) -> None:
+        """ Called by the worker with each acquired frame. """
+        channel = self.channel
+        wf = waveforms[channel] if channel < len(waveforms) else None
+        if wf is not None:
+            # offset only adds to DC, so samples are just scaled into volts
+            self.accumulator.offer(np.multiply(wf.vs, wf.dV, dtype=np.float32), wf.dt_s)
+
+    def refresh(self):
+        with self.waterfall.lock:
+            num_spectra = self.waterfall.num_spectra
+            num_skipped_frames = self.waterfall.num_skipped_frames
+            bin_width_hz = self.waterfall.bin_width_hz
+            peak_hz = self.waterfall.peak_hz
+        if num_spectra == 0 or bin_width_hz is None:
+            self.stats_label.setText("Waiting for frames")
+            return
+        image = self.waterfall.image()
+        top_dBV = float(image[-1].max())
+        self.image.setImage(image, autoLevels=False, levels=(top_dBV - DYNAMIC_RANGE_DB, top_dBV))
+        self.image.setRect(QRectF(0, -NUM_WATERFALL_ROWS, NUM_SPECTRUM_BINS * bin_width_hz, NUM_WATERFALL_ROWS))
+        self.plot.setRange(
+            xRange=(0, NUM_SPECTRUM_BINS * bin_width_hz), yRange=(-NUM_WATERFALL_ROWS, 0), padding=0
+        )
+        self.stats_label.setText(
+            f"{num_spectra} spectra ({num_skipped_frames} frames skipped)   "
+            f"peak at {si(peak_hz, 'Hz')}"
+        )
+
+    def moveEvent(self, event, /):
+        super().moveEvent(event)
+        self.app.app_persistence.state.save_geometry(self.objectName(), self.saveGeometry())
+
+    def resizeEvent(self, arg__1, /):
+        super().resizeEvent(arg__1)
+        self.app.app_persistence.state.save_geometry(self.objectName(), self.saveGeometry())
+
+    def closeEvent(self, arg__1, /):
+        super().closeEvent(arg__1)
+        self.refresh_timer.stop()
+        if self.on_frame in self.app.frame_listeners:
+            self.app.frame_listeners.remove(self.on_frame)
+        self.accumulator.stop()
+        self.on_close()
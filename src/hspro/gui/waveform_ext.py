@@ -1,5 +1,7 @@
+import copy
 from dataclasses import dataclass
 
+import numpy as np
 from hspro_api import Waveform
 
 
@@ -7,3 +9,10 @@ from hspro_api import Waveform
 class WaveformExt:
     waveform: Waveform
     color: str
+
+
+def copy_waveform(wf: Waveform) -> Waveform:
+    """ Copy with its own samples, since waveform buffers are reused by the worker for the next frame. """
+    wf_copy = copy.copy(wf)
+    wf_copy.vs = np.array(wf.vs)
+    return wf_copy
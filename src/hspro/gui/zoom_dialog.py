@@ -7,6 +7,7 @@ from pyqtgraph.graphicsItems.PlotItem import PlotItem
 from pytide6 import Dialog, VBoxLayout, set_geometry
 
 from hspro.gui.gui_ext.fn import mkPen
+from hspro.gui.measurement_cursors import MeasurementCursors
 
 
 class ZoomPlotsPanel(GraphicsLayoutWidget):
@@ -54,6 +55,12 @@ class ZoomPlotsPanel(GraphicsLayoutWidget):
 
         self.app.set_channel_color_in_zoom_window = self.channel_color_changed
 
+        # counts data updates of the traces, so that cursor measurements are cached per frame
+        self.frame_generation = 0
+        self.measurement_cursors = MeasurementCursors(self.plot, self.traces, self.app, label_pos=(5, 5))
+        self.measurement_cursors.set_visible(self.app.is_showing_measurement_cursors())
+        self.app.show_measurement_cursors_in_zoom_window = self.measurement_cursors.set_visible
+
     def update_zoom_bounds(self, view_bounds: QRectF):
         self.vbox.setXRange(view_bounds.left(), view_bounds.right(), padding=0)
         self.hbox.setYRange(view_bounds.top(), view_bounds.bottom(), padding=0)
@@ -75,6 +82,8 @@ class ZoomPlotsPanel(GraphicsLayoutWidget):
             else:
                 self.traces[i].setData(wf.get_t_vec(self.app.model.visual_time_scale.time_unit), wf.vs)
                 self.traces[i].setVisible(True)
+        self.frame_generation += 1
+        self.measurement_cursors.new_frame(self.frame_generation)
 
     def channel_color_changed(self, channel: int, color: str, select_channel: bool):
         self.pens[channel].setColor(color)